@@ -6,6 +6,7 @@ This is the core Flask application that serves monitoring data via a secure API.
 """
 
 from flask import Flask, render_template, jsonify, request
+from flask_socketio import SocketIO
 import psutil
 import platform
 import socket
@@ -19,51 +20,248 @@ from functools import wraps
 # Import modular components
 from modules.cpu import get_cpu_info
 from modules.memory import get_memory_info
-from modules.gpu import get_gpu_info
-from modules.security import get_security_info
-from modules.processes import get_process_list, get_process_summary
-from modules.storage import get_storage_summary
-from modules.network_enhanced import get_network_traffic_details, get_network_connections_detailed
-from modules.performance import get_performance_metrics
+from modules.gpu import get_gpu_info, configure_gpu
+from modules.security import get_security_info, configure_auth_log
+from modules.auth_log import DEFAULT_WINDOW_HOURS
+from modules.processes import get_process_list, get_process_summary, get_process_delta
+from modules.storage import get_storage_summary, get_directory_tree, get_scan_jobs, configure_storage, configure_mount_probes
+from modules.storage_mounts import DEFAULT_PROBE_DEADLINE
+from modules.storage_scan import DEFAULT_INDEX_DIR
+from modules.storage_jobs import JobLimitReached, DEFAULT_JOB_WORKERS, DEFAULT_RESULT_TTL
+from modules.network_enhanced import get_network_traffic_details, get_network_connections_detailed, query_connections, configure_network
+from modules.net_interfaces import DEFAULT_EWMA_WINDOW
+from modules.sock_diag import ConnectionFilter
+from modules.performance import get_performance_metrics, get_resource_limits, get_thermal_power
+from modules.k8s_informer import NotSynced
+from modules.kubernetes import get_k8s_pods, get_k8s_services, get_k8s_deployments, get_k8s_nodes, is_k8s_available, configure_k8s
+from modules.process_snapshot import configure_process_backend
+from utils.scheduler import CollectorScheduler, DEFAULT_DEADLINE
+from utils.history import HistoryStore, extract_series, DEFAULT_RETENTION
+from utils.archive import MetricArchive, DEFAULT_DATA_DIR, DEFAULT_MAX_BYTES
+from utils.stream import StreamHub
+from utils.cache import SingleFlightCache
+from utils.board import SnapshotBoard, DEFAULT_BOARD_DIR
+from utils.sysinfo import probe_static_facts
 
 # --- Configuration ---
 VERSION = "bmonitor-0.1.0"
-CACHE_TTL = 1.0  # Cache Time-To-Live in seconds
 
 CONFIG_PATH = "/opt/bmonitor/config/app.ini"
 DEFAULT_PORT = 9999
+DEFAULT_PROCESS_BACKEND = "procfs"  # 'procfs' (direct /proc parsing) or 'psutil'
+DEFAULT_GPU_STREAM_MS = 1000  # Sampling period of the long-running nvidia-smi child
+DEFAULT_K8S_CHUNK_SIZE = 500  # Items per page when listing Kubernetes resources
 
-def load_port():
-    """Load port from config file, fallback to default."""
+# Collection cadence in seconds, overridable in the [intervals] section of app.ini
+DEFAULT_INTERVALS = {
+    'system': 60,
+    'cpu': 1,
+    'memory': 1,
+    'network_traffic': 1,
+    'network_connections': 2,
+    'processes': 2,
+    'process_list': 2,
+    'performance': 2,
+    'storage': 30,
+    'security': 60,
+    'gpu': 2,
+}
+
+# Request-side wait limits in seconds for slow collectors, overridable in [deadlines]
+DEFAULT_DEADLINES = {
+    'storage': 2.0,
+    'security': 3.0,
+    'gpu': 3.0,
+}
+
+# TTLs in seconds for on-demand (unscheduled) collectors, overridable in [cache]
+DEFAULT_TTLS = {
+    'limits': 5,
+    'thermal': 5,
+    'k8s_available': 60,
+}
+
+def load_config():
+    """Load app.ini, returning an empty config if it does not exist."""
     config = configparser.ConfigParser()
     if os.path.exists(CONFIG_PATH):
         config.read(CONFIG_PATH)
-        return config.getint("server", "port", fallback=DEFAULT_PORT)
-    return DEFAULT_PORT
+    return config
+
+def load_port():
+    """Load port from config file, fallback to default."""
+    return load_config().getint("server", "port", fallback=DEFAULT_PORT)
+
+def load_process_backend():
+    """Load the process table backend from config file, fallback to default."""
+    return load_config().get("collectors", "process_backend", fallback=DEFAULT_PROCESS_BACKEND)
+
+def load_gpu_config():
+    """Load GPU source settings ([gpu] nvidia_smi, sysfs_root, stream_interval_ms)."""
+    config = load_config()
+    return {
+        'nvidia_smi': config.get("gpu", "nvidia_smi", fallback="nvidia-smi"),
+        'sysfs_root': config.get("gpu", "sysfs_root", fallback="/sys"),
+        'interval_ms': config.getint("gpu", "stream_interval_ms", fallback=DEFAULT_GPU_STREAM_MS),
+    }
+
+def load_k8s_config():
+    """Load the kubectl binary and list page size used by the Kubernetes informers."""
+    config = load_config()
+    return {
+        'kubectl': config.get("k8s", "kubectl", fallback="kubectl"),
+        'chunk_size': config.getint("k8s", "chunk_size", fallback=DEFAULT_K8S_CHUNK_SIZE),
+    }
+
+def load_storage_config():
+    """Load the storage scan index location and job pool settings ([storage])."""
+    config = load_config()
+    return {
+        'index_dir': config.get("storage", "index_dir", fallback=DEFAULT_INDEX_DIR),
+        'job_workers': config.getint("storage", "scan_workers", fallback=DEFAULT_JOB_WORKERS),
+        'job_ttl': config.getfloat("storage", "result_ttl", fallback=DEFAULT_RESULT_TTL),
+    }
+
+def load_network_config():
+    """Load interface filtering and rate smoothing ([network] include_virtual, ewma_window)."""
+    config = load_config()
+    return {
+        'include_virtual': config.getboolean("network", "include_virtual", fallback=False),
+        'ewma_window': config.getfloat("network", "ewma_window", fallback=DEFAULT_EWMA_WINDOW),
+    }
+
+def load_auth_log_config():
+    """Load the auth log to follow and its failure counting window ([security] auth_log, window_hours)."""
+    config = load_config()
+    return {
+        'path': config.get("security", "auth_log", fallback=None),
+        'window_hours': config.getint("security", "window_hours", fallback=DEFAULT_WINDOW_HOURS),
+    }
+
+def load_probe_deadline():
+    """Load how long storage collection waits on one mount's statvfs ([storage] probe_deadline)."""
+    return load_config().getfloat("storage", "probe_deadline", fallback=DEFAULT_PROBE_DEADLINE)
+
+def load_deadlines():
+    """Load per-collector request deadlines from config file, fallback to defaults."""
+    config = load_config()
+    return {key: config.getfloat("deadlines", key, fallback=DEFAULT_DEADLINES.get(key, DEFAULT_DEADLINE))
+            for key in DEFAULT_INTERVALS}
+
+def load_ttls():
+    """Load on-demand cache TTLs from config file, fallback to defaults."""
+    config = load_config()
+    return {key: config.getfloat("cache", key, fallback=default)
+            for key, default in DEFAULT_TTLS.items()}
+
+def load_history_retention():
+    """Load in-memory history retention (seconds) from config file."""
+    return load_config().getint("history", "retention", fallback=DEFAULT_RETENTION)
+
+def load_archive():
+    """Open the on-disk metric archive configured in [archive], or None if disabled."""
+    config = load_config()
+    if not config.getboolean("archive", "enabled", fallback=True):
+        return None
+    data_dir = config.get("archive", "data_dir", fallback=DEFAULT_DATA_DIR)
+    max_bytes = config.getint("archive", "max_size_mb", fallback=DEFAULT_MAX_BYTES // (1024 * 1024)) * 1024 * 1024
+    try:
+        return MetricArchive(data_dir, max_bytes)
+    except OSError as e:
+        logging.getLogger(__name__).warning("metric archive disabled: %s", e)
+        return None
+
+def load_board_path():
+    """Load the shared snapshot board directory from config file."""
+    return load_config().get("board", "path", fallback=DEFAULT_BOARD_DIR)
+
+def load_intervals():
+    """Load per-collector intervals from config file, fallback to defaults."""
+    config = load_config()
+    return {key: config.getfloat("intervals", key, fallback=default)
+            for key, default in DEFAULT_INTERVALS.items()}
 
 # --- App Initialization ---
 app = Flask(__name__,
             template_folder='../templates',
             static_folder='../static')
 
+socketio = SocketIO(app, async_mode='threading')
+
 # Disable default Flask logging to keep output clean
 log = logging.getLogger('werkzeug')
 log.setLevel(logging.ERROR)
 
-# --- Caching Mechanism ---
-cache = {}
-cache_time = {}
+# --- Background Collection ---
+def get_system_identity():
+    return {'hostname': socket.gethostname(), 'os': f"{platform.system()} {platform.release()}"}
+
+COLLECTORS = {
+    'system': get_system_identity,
+    'cpu': get_cpu_info,
+    'memory': get_memory_info,
+    'gpu': get_gpu_info,
+    'storage': get_storage_summary,
+    'network_traffic': get_network_traffic_details,
+    'network_connections': get_network_connections_detailed,
+    'processes': get_process_summary,
+    'process_list': get_process_list,
+    'performance': get_performance_metrics,
+    'security': get_security_info,
+}
+
+configure_process_backend(load_process_backend())
+configure_gpu(**load_gpu_config())
+configure_k8s(**load_k8s_config())
+configure_storage(**load_storage_config())
+configure_mount_probes(load_probe_deadline())
+configure_network(**load_network_config())
+configure_auth_log(**load_auth_log_config())
+probe_static_facts()
+
+scheduler = CollectorScheduler()
+_intervals = load_intervals()
+_deadlines = load_deadlines()
+for _key, _func in COLLECTORS.items():
+    scheduler.register(_key, _func, _intervals[_key], _deadlines[_key])
+
+history = HistoryStore(load_history_retention())
+archive = load_archive()
+
+def record_history(key, data, timestamp):
+    for name, value in extract_series(key, data):
+        history.record(name, timestamp, value, _intervals[key])
+        # Only the sampling process writes the on-disk archive
+        if archive and not scheduler.passive:
+            archive.write(name, timestamp, value)
+
+scheduler.subscribe(record_history)
+
+# Push channel: clients subscribe to collector topics instead of polling
+stream_hub = StreamHub(socketio, _intervals)
+scheduler.subscribe(stream_hub.publish)
 
-def get_cached(key, func, *args, **kwargs):
-    """Simple Time-To-Live (TTL) cache."""
-    now = time.time()
-    if key in cache and (now - cache_time.get(key, 0)) < CACHE_TTL:
-        return cache[key]
+def on_sampler_elected():
+    if archive:
+        archive.start()
 
-    data = func(*args, **kwargs)
-    cache[key] = data
-    cache_time[key] = now
-    return data
+# One process per host samples and publishes to the shared board; other
+# gunicorn workers (and the CLI) read the board instead of collecting.
+board = SnapshotBoard(load_board_path())
+scheduler.start_with_board(board, on_sampler_elected)
+stream_hub.start()
+
+def collected(key):
+    """Latest published snapshot of a collector."""
+    return scheduler.get(key)
+
+# --- On-Demand Cache ---
+cache = SingleFlightCache()
+_ttls = load_ttls()
+
+def cached(key, func):
+    """Single-flight, stale-while-revalidate cache for unscheduled collectors."""
+    return cache.get(key, func, _ttls.get(key))
 
 # --- Authentication (Placeholder) ---
 def auth_required(f):
@@ -82,53 +280,190 @@ def index():
 @app.route('/api/v1/all')
 @auth_required
 def api_all():
-    """Get all monitoring data at once."""
-    all_data = {
-        'system': get_cached('system', lambda: {'hostname': socket.gethostname(), 'os': f"{platform.system()} {platform.release()}"}),
-        'cpu': get_cached('cpu', get_cpu_info),
-        'memory': get_cached('memory', get_memory_info),
-        'gpu': get_cached('gpu', get_gpu_info),
-        'storage': get_cached('storage', get_storage_summary),
-        'network_traffic': get_cached('network_traffic', get_network_traffic_details),
-        'network_connections': get_cached('network_connections', get_network_connections_detailed),
-        'processes': get_cached('processes', get_process_summary),
-        'performance': get_cached('performance', get_performance_metrics),
-        'security': get_cached('security', get_security_info),
-    }
-    return jsonify({"status": "success", "data": all_data})
+    """Get all monitoring data at once.
+
+    Sections whose collector misses its deadline are returned stale (or null)
+    and flagged in 'meta' with their state and age instead of blocking.
+    """
+    keys = ['system', 'cpu', 'memory', 'gpu', 'storage', 'network_traffic',
+            'network_connections', 'processes', 'performance', 'security']
+    all_data, meta = scheduler.collect(keys)
+    partial = any(m['state'] != 'fresh' for m in meta.values())
+    return jsonify({"status": "success", "partial": partial, "data": all_data, "meta": meta})
 
 # --- Individual API Endpoints ---
 
 @app.route('/api/v1/cpu')
 @auth_required
 def api_cpu():
-    return jsonify(get_cached('cpu', get_cpu_info))
+    return jsonify(collected('cpu'))
 
 @app.route('/api/v1/memory')
 @auth_required
 def api_memory():
-    return jsonify(get_cached('memory', get_memory_info))
+    return jsonify(collected('memory'))
 
 @app.route('/api/v1/storage')
 @auth_required
 def api_storage():
-    return jsonify(get_cached('storage', get_storage_summary))
+    return jsonify(collected('storage'))
+
+@app.route('/api/v1/storage/tree')
+@auth_required
+def api_storage_tree():
+    """One level of the directory tree with aggregated subtree sizes."""
+    return jsonify(get_directory_tree(request.args.get('path', '/'),
+                                      request.args.get('cursor'),
+                                      request.args.get('limit', 100, type=int)))
+
+@app.route('/api/v1/storage/jobs', methods=['POST'])
+@auth_required
+def api_storage_job_submit():
+    """Start (or join an identical) background scan; poll the returned job id."""
+    params = request.get_json(silent=True) or request.args
+    if not isinstance(params, dict):
+        return jsonify({'error': 'expected a JSON object'}), 400
+    try:
+        job = get_scan_jobs().submit(params.get('kind', 'large_files'), {
+            'path': params.get('path', '/'),
+            'min_size_mb': int(params.get('min_size_mb', params.get('min_size', 100))),
+            'max_results': int(params.get('max_results', 50)),
+        })
+    except (TypeError, ValueError) as e:
+        # e.g. "abc" or null for a number
+        return jsonify({'error': str(e)}), 400
+    except JobLimitReached as e:
+        return jsonify({'error': str(e)}), 429
+    return jsonify(job.to_dict()), 202
+
+@app.route('/api/v1/storage/jobs')
+@auth_required
+def api_storage_jobs():
+    return jsonify([job.to_dict() for job in get_scan_jobs().list()])
+
+@app.route('/api/v1/storage/jobs/<job_id>', methods=['GET', 'DELETE'])
+@auth_required
+def api_storage_job(job_id):
+    jobs = get_scan_jobs()
+    job = jobs.cancel(job_id) if request.method == 'DELETE' else jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': f"unknown job: {job_id}"}), 404
+    return jsonify(job.to_dict())
 
 @app.route('/api/v1/network')
 @auth_required
 def api_network():
     data = {
-        'traffic': get_cached('network_traffic', get_network_traffic_details),
-        'connections': get_cached('network_connections', get_network_connections_detailed)
+        'traffic': collected('network_traffic'),
+        'connections': collected('network_connections')
     }
     return jsonify(data)
 
+@app.route('/api/v1/network/connections')
+@auth_required
+def api_network_connections():
+    """Filtered connection counts and one page of sockets, queried from the kernel."""
+    args = request.args
+
+    def split(name):
+        return [v for v in args.get(name, '').split(',') if v] or None
+
+    try:
+        flt = ConnectionFilter(states=split('state'), protocols=split('proto'),
+                               local_port=args.get('local_port'), remote_port=args.get('remote_port'),
+                               local_addr=args.get('local_addr'), remote_addr=args.get('remote_addr'),
+                               pid=args.get('pid'))
+        return jsonify(query_connections(flt, args.get('cursor'),
+                                         args.get('limit', 100, type=int),
+                                         args.get('top', 20, type=int)))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except PermissionError as e:
+        return jsonify({'error': str(e)}), 403
+
 @app.route('/api/v1/processes')
 @auth_required
 def api_processes():
-    return jsonify(get_cached('process_list', get_process_list))
+    return jsonify(collected('process_list'))
+
+@app.route('/api/v1/processes/delta')
+@auth_required
+def api_processes_delta():
+    """Process list changes since ?since=<version>; full table if too old."""
+    return jsonify(get_process_delta(collected('process_list'), request.args.get('since')))
+
+@app.route('/api/v1/performance/limits')
+@auth_required
+def api_resource_limits():
+    return jsonify(cached('limits', get_resource_limits))
+
+@app.route('/api/v1/thermal')
+@auth_required
+def api_thermal():
+    return jsonify(cached('thermal', get_thermal_power))
+
+K8S_RESOURCES = {
+    'pods': get_k8s_pods,
+    'services': get_k8s_services,
+    'deployments': get_k8s_deployments,
+    'nodes': get_k8s_nodes,
+}
+
+@app.route('/api/v1/k8s/available')
+@auth_required
+def api_k8s_available():
+    return jsonify({'available': cached('k8s_available', is_k8s_available)})
+
+@app.route('/api/v1/k8s/<resource>')
+@auth_required
+def api_k8s(resource):
+    if resource not in K8S_RESOURCES:
+        return jsonify({'error': f"unknown resource: {resource}"}), 404
+    # Served from the watch-fed informer index; no cache needed
+    namespace = request.args.get('namespace')
+    try:
+        if namespace and resource != 'nodes':
+            return jsonify(K8S_RESOURCES[resource](namespace))
+        return jsonify(K8S_RESOURCES[resource]())
+    except NotSynced as e:
+        return jsonify({'error': str(e)}), 503
+
+@app.route('/api/v1/cache/stats')
+@auth_required
+def api_cache_stats():
+    """Hit/miss/latency counters of the on-demand cache."""
+    return jsonify(cache.stats())
+
+@app.route('/api/v1/history')
+@auth_required
+def api_history():
+    """Metric history: ?series=cpu.total,net.*&minutes=N. Lists series names without ?series."""
+    series = request.args.get('series')
+    if not series:
+        return jsonify({'series': history.names()})
+    minutes = request.args.get('minutes', default=10, type=float)
+    since = time.time() - minutes * 60
+    patterns = [name.strip() for name in series.split(',') if name.strip()]
+    return jsonify({'since': since, 'series': history.query(patterns, since)})
+
+@app.route('/api/v1/history/archive')
+@auth_required
+def api_history_archive():
+    """Archived history: ?series=...&start=<epoch>&end=<epoch>[&resolution=1s|1m|1h]."""
+    if archive is None:
+        return jsonify({'error': 'metric archive is disabled'}), 404
+    series = request.args.get('series')
+    if not series:
+        return jsonify({'error': 'series is required'}), 400
+    end = request.args.get('end', default=time.time(), type=float)
+    start = request.args.get('start', default=end - 3600, type=float)
+    resolution = request.args.get('resolution')
+    if resolution is not None and resolution not in ('1s', '1m', '1h'):
+        return jsonify({'error': 'resolution must be 1s, 1m or 1h'}), 400
+    patterns = [name.strip() for name in series.split(',') if name.strip()]
+    return jsonify(archive.query(patterns, start, end, resolution))
 
 # --- Main Execution ---
 if __name__ == '__main__':
     port = load_port()
-    app.run(host='0.0.0.0', port=port, debug=False)
+    socketio.run(app, host='0.0.0.0', port=port, debug=False, allow_unsafe_werkzeug=True)
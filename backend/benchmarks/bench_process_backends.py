@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Process Backend Benchmark
+Author: M. Nafiurohman
+
+Measures the monitor's own CPU time for one process tick with the procfs and
+psutil backends, against a synthetic /proc tree with 1k, 10k and 50k
+processes (each holding four fds, one of them a TCP socket). A tick is what
+the process_list collector does every interval:
+
+    registry   ProcessRegistry sample and the shared process snapshot
+    sockets    socket inventory: /proc/net tables plus the /proc/*/fd sweep
+    rows       get_process_list() rows, published to a SnapshotBoard
+
+Between ticks, --active of the processes use CPU time, so the io re-read
+for busy processes is included.
+
+One run with --rounds 5 (synthetic tree on ext4, 2 s interval). Stage
+columns are CPU ms; cpu ms is their sum and us/proc is that sum per process:
+
+    processes  backend  registry  sockets   rows   cpu ms  us/proc  % of core
+         1000   procfs      14.8     21.1   11.5     47.4     47.4      2.37%
+         5000   procfs     105.2    145.8   84.0    334.9     67.0     16.75%
+        10000   procfs     204.7    289.6  145.4    639.7     64.0     31.99%
+        50000   procfs     882.1   1425.8  590.4   2898.3     58.0    144.92%
+         5000   psutil     470.4    113.3   58.7    642.4    128.5     32.12%
+
+The 1% target is not met above about 400 processes at a 2 s interval.
+Every tick opens each pid's stat file and every fd link, since nothing else
+shows which processes changed, so the cost grows linearly with the process
+count. To stay under 1% of one core, choose the interval as
+
+    interval (s) >= processes x us/proc / 10,000
+
+where us/proc is measured on the target host. For example, 5,000 processes
+at 67 us/proc need at least a 34 s interval. Set it as [intervals]
+process_list (and processes, which reads the same snapshot).
+
+Usage (from backend/):
+    python benchmarks/bench_process_backends.py [--counts 1000 10000 50000] [--interval 2]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import psutil
+from modules import process_snapshot, processes, sockets
+from modules.procfs import ProcfsReader
+from modules.process_registry import ProcessRegistry, PsutilReader
+from utils.board import SnapshotBoard
+
+STAT_LINE = "{pid} (worker-{pid}) S 1 {pid} {pid} 0 -1 4194560 120 0 0 0 {utime} {stime} 0 0 20 0 {threads} 0 {start} 12345678 {rss} 18446744073709551615 1 1 0 0 0 0 0 0 0 0 0 0 17 0 0 0 0 0 0\n"
+STATUS_TEXT = "Name:\tworker-{pid}\nState:\tS (sleeping)\nPid:\t{pid}\nPPid:\t1\nUid:\t{uid}\t{uid}\t{uid}\t{uid}\nGid:\t0\t0\t0\t0\nThreads:\t{threads}\nvoluntary_ctxt_switches:\t10\nnonvoluntary_ctxt_switches:\t2\n"
+IO_TEXT = "rchar: 1000\nwchar: 2000\nsyscr: 10\nsyscw: 20\nread_bytes: {read}\nwrite_bytes: {write}\ncancelled_write_bytes: 0\n"
+TCP_HEADER = "  sl  local_address rem_address   st tx_queue rx_queue tr tm->when retrnsmt   uid  timeout inode\n"
+TCP_ROW = "{sl:4}: 0100007F:{lport:04X} 0100007F:{rport:04X} 01 00000000:00000000 00:00000000 00000000  1000        0 {inode} 1 0000000000000000 20 4 30 10 -1\n"
+SOCKET_INODE_BASE = 100000
+
+
+def build_proc_tree(root, count):
+    """Write a minimal fake /proc with `count` processes"""
+    with open(os.path.join(root, 'stat'), 'w') as f:
+        f.write("cpu  100 0 100 1000 0 0 0 0 0 0\nbtime 1700000000\n")
+    uid = os.getuid()
+    for pid in range(1, count + 1):
+        d = os.path.join(root, str(pid))
+        os.mkdir(d)
+        with open(os.path.join(d, 'stat'), 'w') as f:
+            f.write(STAT_LINE.format(pid=pid, utime=pid % 500, stime=pid % 300,
+                                     threads=1 + pid % 8, start=1000 + pid, rss=256 + pid % 1024))
+        with open(os.path.join(d, 'statm'), 'w') as f:
+            f.write(f"10000 {256 + pid % 1024} 100 10 0 500 0\n")
+        with open(os.path.join(d, 'status'), 'w') as f:
+            f.write(STATUS_TEXT.format(pid=pid, uid=uid, threads=1 + pid % 8))
+        with open(os.path.join(d, 'io'), 'w') as f:
+            f.write(IO_TEXT.format(read=pid * 4096, write=pid * 8192))
+        fd_dir = os.path.join(d, 'fd')
+        os.mkdir(fd_dir)
+        for fd, target in enumerate(('/dev/null', f'pipe:[{pid}]', '/var/log/app.log',
+                                     f'socket:[{SOCKET_INODE_BASE + pid}]')):
+            os.symlink(target, os.path.join(fd_dir, str(fd)))
+    os.mkdir(os.path.join(root, 'net'))
+    with open(os.path.join(root, 'net', 'tcp'), 'w') as f:
+        f.write(TCP_HEADER)
+        for pid in range(1, count + 1):
+            f.write(TCP_ROW.format(sl=pid - 1, lport=1024 + pid % 60000, rport=443,
+                                   inode=SOCKET_INODE_BASE + pid))
+
+
+def touch_active(root, count, active, tick):
+    """Advance the CPU time of the first `active` fraction of processes, as a busy host would"""
+    for pid in range(1, int(count * active) + 1):
+        with open(os.path.join(root, str(pid), 'stat'), 'w') as f:
+            f.write(STAT_LINE.format(pid=pid, utime=pid % 500 + tick, stime=pid % 300,
+                                     threads=1 + pid % 8, start=1000 + pid, rss=256 + pid % 1024))
+
+
+def tick(root, board):
+    """One process_list collection; CPU seconds spent in each stage"""
+    c0 = time.process_time()
+    snapshot = process_snapshot.take_process_snapshot()
+    c1 = time.process_time()
+    inventory = sockets.take_socket_inventory(root)
+    c2 = time.process_time()
+    processes.get_process_snapshot = lambda: snapshot
+    processes.get_socket_inventory = lambda: inventory
+    board.publish('process_list', processes.get_process_list(), time.time())
+    board.publish('processes', processes.get_process_summary(), time.time())
+    c3 = time.process_time()
+    return c1 - c0, c2 - c1, c3 - c2
+
+
+def measure(registry, rounds, root, count, active):
+    """Average wall and per-stage CPU seconds per steady-state tick"""
+    process_snapshot._registry = registry
+    saved = processes.get_process_snapshot, processes.get_socket_inventory
+    board_dir = tempfile.mkdtemp(prefix='bmonitor-board-')
+    board = SnapshotBoard(board_dir)
+    try:
+        tick(root, board)  # warm-up: populates static attributes
+        wall = 0.0
+        stages = [0.0, 0.0, 0.0]
+        for n in range(1, rounds + 1):
+            touch_active(root, count, active, n)
+            w0 = time.perf_counter()
+            for i, spent in enumerate(tick(root, board)):
+                stages[i] += spent
+            wall += time.perf_counter() - w0
+    finally:
+        processes.get_process_snapshot, processes.get_socket_inventory = saved
+        shutil.rmtree(board_dir, ignore_errors=True)
+    return wall / rounds, [spent / rounds for spent in stages]
+
+
+def make_registry(backend, root):
+    registry = ProcessRegistry('psutil')
+    if backend == 'procfs':
+        reader = ProcfsReader(root)
+        reader.available()
+        registry.reader = reader
+    else:
+        registry.reader = PsutilReader()
+    return registry
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--counts', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--active', type=float, default=0.1, help='fraction of processes using CPU between samples')
+    parser.add_argument('--interval', type=float, default=2.0, help='sampling interval used for the CPU budget column')
+    args = parser.parse_args()
+
+    print(f"{'processes':>10} {'backend':>8} {'registry':>9} {'sockets':>8} {'rows':>8} "
+          f"{'cpu ms':>9} {'us/proc':>8} {'% of core':>10}")
+    for count in args.counts:
+        root = tempfile.mkdtemp(prefix='bmonitor-proc-')
+        try:
+            build_proc_tree(root, count)
+            for backend in ('procfs', 'psutil'):
+                saved = psutil.PROCFS_PATH
+                psutil.PROCFS_PATH = root
+                try:
+                    _, stages = measure(make_registry(backend, root), args.rounds, root, count, args.active)
+                finally:
+                    psutil.PROCFS_PATH = saved
+                cpu = sum(stages)
+                budget = cpu / args.interval * 100
+                registry, inventory, rows = (spent * 1000 for spent in stages)
+                print(f"{count:>10} {backend:>8} {registry:>9.1f} {inventory:>8.1f} {rows:>8.1f} "
+                      f"{cpu * 1000:>9.1f} {cpu / count * 1e6:>8.1f} {budget:>9.2f}%")
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -3,7 +3,10 @@ from .cpu import get_cpu_info
 from .memory import get_memory_info
 from .gpu import get_gpu_info
 from .security import get_security_info
-from .processes import get_process_list, get_process_summary
+from .processes import get_process_list, get_process_summary, get_process_delta
 from .storage import get_directory_tree, find_large_files, get_storage_summary
 from .network_enhanced import get_network_traffic_details, get_network_connections_detailed
 from .kubernetes import get_k8s_pods, get_k8s_services, get_k8s_deployments, get_k8s_nodes, is_k8s_available
+from .process_snapshot import get_process_snapshot
+from .sockets import get_socket_inventory
+from .cpu_accounting import get_cpu_accounting
@@ -0,0 +1,293 @@
+"""
+Incremental Authentication Log Tailer
+Author: M. Nafiurohman
+
+Follows auth.log (or /var/log/secure) from a checkpoint of (inode, byte offset)
+so each refresh parses only the bytes appended since the last one. The file
+stays open between refreshes: when logrotate renames it, the rest of the old
+file is still read through the open descriptor before switching to the new
+one, and a file that shrinks below the offset (copytruncate) is re-read from
+the start. Rotated files (auth.log.1, auth.log.2.gz, ...) young enough to hold
+events inside the window are read once, in the background, at startup.
+
+Failed logins are counted per source IP and per user in hourly buckets over a
+rolling window. Each bucket keeps at most BUCKET_KEYS keys; when it overflows
+the lower-count half is dropped, so memory stays bounded under a spray of
+spoofed addresses while heavy hitters survive.
+"""
+
+import glob
+import gzip
+import heapq
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+
+log = logging.getLogger(__name__)
+
+AUTH_LOGS = ('/var/log/auth.log', '/var/log/secure')
+DEFAULT_WINDOW_HOURS = 24
+BUCKET_SECONDS = 3600
+BUCKET_KEYS = 4096          # Distinct IPs (and users) remembered per bucket
+MAX_READ = 32 * 1024 * 1024 # Bytes parsed per refresh; the rest waits for the next one
+RECENT_EVENTS = 20
+HEAD_BYTES = 64             # Leading bytes remembered to spot a truncate-and-refill
+TOP_OFFENDERS = 10
+
+# sshd: "Failed password for [invalid user ]<user> from <ip> port <n> ssh2",
+# optionally wrapped in syslog's "message repeated N times: [ ... ]"
+FAILED_RE = re.compile(
+    rb'(?:message repeated (?P<repeat>\d+) times: \[ )?'
+    rb'Failed (?P<method>[\w/-]+) for (?P<invalid>invalid user )?(?P<user>.*?) from (?P<ip>[0-9A-Fa-f:.]+) port')
+SYSLOG_TS_RE = re.compile(rb'^(?P<ts>[A-Z][a-z]{2} [ \d]\d \d\d:\d\d:\d\d) ')
+ISO_TS_RE = re.compile(rb'^(?P<ts>\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d(?:\.\d+)?(?:[+-]\d\d:\d\d|Z)?) ')
+
+
+def parse_timestamp(line, now):
+    """Epoch seconds of a syslog (no year) or RFC 3339 line prefix; None if neither"""
+    match = ISO_TS_RE.match(line)
+    if match:
+        try:
+            return datetime.fromisoformat(match.group('ts').decode().replace('Z', '+00:00')).timestamp()
+        except ValueError:
+            return None
+    match = SYSLOG_TS_RE.match(line)
+    if not match:
+        return None
+    try:
+        ts = datetime.strptime(f"{time.localtime(now).tm_year} {match.group('ts').decode()}",
+                               '%Y %b %d %H:%M:%S').timestamp()
+    except ValueError:
+        return None
+    # Syslog omits the year; a date in the future belongs to last year
+    if ts > now + 86400:
+        ts = datetime.fromtimestamp(ts).replace(year=time.localtime(now).tm_year - 1).timestamp()
+    return ts
+
+
+class _Bucket:
+    __slots__ = ('ips', 'users', 'failures')
+
+    def __init__(self):
+        self.ips = Counter()
+        self.users = Counter()
+        self.failures = 0
+
+
+class FailureCounters:
+    """Rolling per-IP and per-user failure counts in bounded memory"""
+
+    def __init__(self, window=DEFAULT_WINDOW_HOURS * 3600):
+        self.window = window
+        self._buckets = {}          # bucket number -> _Bucket
+        self._ips = Counter()       # running totals over all live buckets
+        self._users = Counter()
+        self.failures = 0
+        self.recent = deque(maxlen=RECENT_EVENTS)
+
+    def _oldest(self, now):
+        return int((now - self.window) // BUCKET_SECONDS) + 1
+
+    def add(self, timestamp, ip, user, method, invalid, count, now):
+        number = int(timestamp // BUCKET_SECONDS)
+        if number < self._oldest(now):
+            return
+        bucket = self._buckets.get(number)
+        if bucket is None:
+            bucket = self._buckets[number] = _Bucket()
+        bucket.failures += count
+        self.failures += count
+        for counts, totals, key in ((bucket.ips, self._ips, ip), (bucket.users, self._users, user)):
+            counts[key] += count
+            totals[key] += count
+            if len(counts) > BUCKET_KEYS:
+                self._shrink(counts, totals)
+        if not self.recent or timestamp >= self.recent[-1]['timestamp']:
+            self.recent.append({'timestamp': timestamp, 'user': user, 'ip': ip,
+                                'method': method, 'invalid_user': invalid, 'count': count})
+
+    @staticmethod
+    def _shrink(counts, totals):
+        """Drop the lower-count half of an overflowing bucket"""
+        for key, count in sorted(counts.items(), key=lambda kv: kv[1])[:len(counts) // 2]:
+            del counts[key]
+            FailureCounters._subtract(totals, key, count)
+
+    @staticmethod
+    def _subtract(totals, key, count):
+        remaining = totals[key] - count
+        if remaining > 0:
+            totals[key] = remaining
+        else:
+            del totals[key]
+
+    def expire(self, now):
+        oldest = self._oldest(now)
+        for number in [n for n in self._buckets if n < oldest]:
+            bucket = self._buckets.pop(number)
+            self.failures -= bucket.failures
+            for counts, totals in ((bucket.ips, self._ips), (bucket.users, self._users)):
+                for key, count in counts.items():
+                    self._subtract(totals, key, count)
+
+    def top(self, n=TOP_OFFENDERS):
+        return {
+            'ips': [{'ip': ip, 'count': count}
+                    for ip, count in heapq.nlargest(n, self._ips.items(), key=lambda kv: kv[1])],
+            'users': [{'user': user, 'count': count}
+                      for user, count in heapq.nlargest(n, self._users.items(), key=lambda kv: kv[1])]
+        }
+
+
+class AuthLogTailer:
+    """Parses only what was appended to the auth log since the last refresh"""
+
+    def __init__(self, path=None, window_hours=DEFAULT_WINDOW_HOURS):
+        self.path = path or next((p for p in AUTH_LOGS if os.path.exists(p)), AUTH_LOGS[0])
+        self.counters = FailureCounters(window_hours * 3600)
+        self._file = None
+        self._inode = None
+        self._offset = 0
+        self._size = 0
+        self._head = b''
+        self._backfill = None
+        self._lock = threading.Lock()
+        self._poll_lock = threading.Lock()
+
+    def checkpoint(self):
+        return {'path': self.path, 'inode': self._inode, 'offset': self._offset, 'size': self._size}
+
+    def _ingest(self, lines, now):
+        for line in lines:
+            if b'Failed ' not in line:
+                continue
+            match = FAILED_RE.search(line)
+            if not match:
+                continue
+            timestamp = parse_timestamp(line, now)
+            if timestamp is None:
+                timestamp = now
+            self.counters.add(timestamp, match.group('ip').decode(),
+                              match.group('user').decode(errors='replace'),
+                              match.group('method').decode(), bool(match.group('invalid')),
+                              int(match.group('repeat') or 1), now)
+
+    def _read_from_offset(self, limit):
+        """Parse complete lines after the offset, at most `limit` bytes"""
+        self._file.seek(self._offset)
+        data = self._file.read(limit)
+        end = data.rfind(b'\n') + 1
+        if end == 0 and len(data) == limit:
+            end = len(data)  # a single line longer than limit: skip it rather than stall
+        with self._lock:
+            self._ingest(data[:end].split(b'\n'), time.time())
+        self._offset += end
+        return end
+
+    def _open(self):
+        try:
+            f = open(self.path, 'rb')
+        except OSError:
+            return False
+        self._file = f
+        self._inode = os.fstat(f.fileno()).st_ino
+        self._offset = 0
+        self._head = b''
+        return True
+
+    def _truncated(self):
+        """Shrunk below the offset, or rewritten from the start (copytruncate, then refilled)"""
+        fd = self._file.fileno()
+        if os.fstat(fd).st_size < self._offset:
+            return True
+        return bool(self._head) and os.pread(fd, len(self._head), 0) != self._head
+
+    def poll(self):
+        """Catch up with the log; returns the number of bytes parsed"""
+        with self._poll_lock:
+            budget = MAX_READ
+            if self._file is None and not self._open():
+                return 0
+            try:
+                st = os.stat(self.path)
+            except OSError:
+                st = None   # rotated away and not recreated yet: keep draining the old file
+            if st is not None and st.st_ino != self._inode:
+                # Rotated: finish the old file through the open descriptor, then switch
+                budget -= self._read_from_offset(budget)
+                if budget <= 0:
+                    return MAX_READ
+                self._file.close()
+                self._file = None
+                if not self._open():
+                    return MAX_READ - budget
+            elif self._truncated():
+                log.info("%s was truncated; reading from the start", self.path)
+                self._offset = 0
+                self._head = b''
+            budget -= self._read_from_offset(budget)
+            self._size = os.fstat(self._file.fileno()).st_size
+            if len(self._head) < HEAD_BYTES:
+                self._head = os.pread(self._file.fileno(), HEAD_BYTES, 0)
+            return MAX_READ - budget
+
+    def rotated_files(self, now):
+        """Rotated logs that can still hold events inside the window, oldest first"""
+        def generation(path):
+            suffix = path[len(self.path) + 1:].split('.')[0]
+            return int(suffix) if suffix.isdigit() else 0
+
+        candidates = [p for p in glob.glob(glob.escape(self.path) + '.*') if generation(p) > 0]
+        recent = []
+        for path in sorted(candidates, key=generation, reverse=True):
+            try:
+                if os.stat(path).st_mtime >= now - self.counters.window:
+                    recent.append(path)
+            except OSError:
+                continue
+        return recent
+
+    def _read_rotated(self):
+        now = time.time()
+        for path in self.rotated_files(now):
+            try:
+                opener = gzip.open if path.endswith('.gz') else open
+                with opener(path, 'rb') as f:
+                    chunk = []
+                    for line in f:
+                        chunk.append(line)
+                        if len(chunk) >= 10000:
+                            with self._lock:
+                                self._ingest(chunk, now)
+                            chunk = []
+                    with self._lock:
+                        self._ingest(chunk, now)
+            except (OSError, EOFError) as e:
+                log.warning("skipping rotated auth log %s: %s", path, e)
+
+    def start_backfill(self):
+        """Read rotated files once, in the background"""
+        if self._backfill is None:
+            self._backfill = threading.Thread(target=self._read_rotated, name="auth-log-backfill", daemon=True)
+            self._backfill.start()
+
+    def summary(self):
+        self.start_backfill()
+        self.poll()
+        now = time.time()
+        with self._lock:
+            self.counters.expire(now)
+            top = self.counters.top()
+            return {
+                'source': self.path,
+                'window_hours': self.counters.window // 3600,
+                'total': self.counters.failures,
+                'top_ips': top['ips'],
+                'top_users': top['users'],
+                'recent': list(self.counters.recent),
+                'backfilling': self._backfill.is_alive()
+            }
@@ -6,19 +6,23 @@ Author: M. Nafiurohman
 import psutil
 import platform
 from utils.helpers import get_cpu_name, IS_WINDOWS, run_cmd
+from utils.sysinfo import l3_cache_size
+from utils.pseudofiles import sensors
+from modules.cpu_accounting import get_cpu_accounting
 
 def get_cpu_info():
     """Get detailed CPU information with per-thread monitoring"""
     try:
         cpu_freq = psutil.cpu_freq()
-        cpu_percent_per_core = psutil.cpu_percent(interval=0.1, percpu=True)
+        accounting = get_cpu_accounting()
+        cpu_percent_per_core = [core['busy'] for core in accounting.cores]
         load_avg = psutil.getloadavg() if hasattr(psutil, 'getloadavg') else (0, 0, 0)
         
         # CPU temperature
         cpu_temp = 0
         try:
             if not IS_WINDOWS:
-                temps = psutil.sensors_temperatures()
+                temps = sensors.temperatures()
                 if 'coretemp' in temps:
                     cpu_temp = temps['coretemp'][0].current
                 elif 'cpu_thermal' in temps:
@@ -38,8 +42,7 @@ def get_cpu_info():
                             cache_size = f"{line.strip()} KB"
                             break
             else:
-                cache = run_cmd("lscpu | grep 'L3 cache' | awk '{print $3}'")
-                cache_size = cache if cache else "N/A"
+                cache_size = l3_cache_size() or "N/A"
         except:
             pass
         
@@ -49,10 +52,14 @@ def get_cpu_info():
         
         # Per-thread usage
         threads_usage = []
-        for i, usage in enumerate(cpu_percent_per_core):
+        for i, core in enumerate(accounting.cores):
             threads_usage.append({
                 'thread': i,
-                'usage': round(usage, 1)
+                'usage': core['busy'],
+                'user': core['user'],
+                'system': core['system'],
+                'iowait': core['iowait'],
+                'steal': core['steal']
             })
         
         return {
@@ -66,7 +73,8 @@ def get_cpu_info():
             },
             'usage_per_core': cpu_percent_per_core,
             'threads_usage': threads_usage,
-            'usage_total': round(sum(cpu_percent_per_core) / len(cpu_percent_per_core), 1),
+            'usage_total': accounting.total['busy'],
+            'times_percent': accounting.total,
             'load_average': {
                 '1min': round(load_avg[0], 2),
                 '5min': round(load_avg[1], 2),
@@ -0,0 +1,161 @@
+"""
+CPU Accounting Engine
+Author: M. Nafiurohman
+
+Keeps the previous /proc/stat counters and derives per-core user/nice/system/
+iowait/irq/softirq/steal/idle percentages, plus context-switch and interrupt
+rates, from the delta between samples. Nothing sleeps: the first sample reports
+averages since boot and every later one covers the time since the previous.
+"""
+
+import threading
+import time
+from collections import namedtuple
+import psutil
+from utils.pseudofiles import files
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Columns of a /proc/stat cpu line that make up total time (guest time is
+# already included in user/nice)
+FIELDS = ('user', 'nice', 'system', 'idle', 'iowait', 'irq', 'softirq', 'steal')
+SAMPLE_MAX_AGE = 0.5  # Seconds a sample is shared before reading /proc/stat again
+
+Counters = namedtuple('Counters', ['timestamp', 'total', 'cores', 'ctx_switches', 'interrupts',
+                                   'soft_interrupts', 'procs_running', 'procs_blocked'])
+
+CpuAccounting = namedtuple('CpuAccounting', ['timestamp', 'interval', 'total', 'cores',
+                                             'ctx_switches', 'interrupts', 'soft_interrupts',
+                                             'ctx_switches_rate', 'interrupts_rate',
+                                             'soft_interrupts_rate', 'procs_running', 'procs_blocked'])
+
+
+def read_proc_stat(path='/proc/stat'):
+    """Parse /proc/stat into Counters; per-field values are in clock ticks"""
+    total = None
+    cores = []
+    ctx = intr = softirq = running = blocked = 0
+    for line in files.read(path).split(b'\n'):
+        if line.startswith(b'cpu'):
+            parts = line.split()
+            values = [float(v) for v in parts[1:len(FIELDS) + 1]]
+            values += [0.0] * (len(FIELDS) - len(values))
+            if parts[0] == b'cpu':
+                total = values
+            else:
+                cores.append(values)
+        elif line.startswith(b'ctxt '):
+            ctx = int(line.split()[1])
+        elif line.startswith(b'intr '):
+            intr = int(line.split(None, 2)[1])
+        elif line.startswith(b'softirq '):
+            softirq = int(line.split(None, 2)[1])
+        elif line.startswith(b'procs_running '):
+            running = int(line.split()[1])
+        elif line.startswith(b'procs_blocked '):
+            blocked = int(line.split()[1])
+    return Counters(time.monotonic(), total, cores, ctx, intr, softirq, running, blocked)
+
+
+def read_psutil_counters():
+    """Counters from psutil for hosts without /proc/stat"""
+    def row(t):
+        return [float(getattr(t, name, 0.0)) for name in FIELDS]
+    stats = psutil.cpu_stats()
+    return Counters(time.monotonic(), row(psutil.cpu_times()),
+                    [row(t) for t in psutil.cpu_times(percpu=True)],
+                    stats.ctx_switches, stats.interrupts, getattr(stats, 'soft_interrupts', 0), 0, 0)
+
+
+def _percentages(current, previous):
+    """Per-row field shares (%) of total elapsed time, for a list of rows"""
+    if np is not None:
+        cur = np.asarray(current, dtype=np.float64)
+        delta = cur - np.asarray(previous, dtype=np.float64) if previous is not None else cur
+        delta = np.clip(delta, 0, None)
+        totals = delta.sum(axis=1, keepdims=True)
+        totals[totals == 0] = 1
+        return (delta / totals * 100).round(1).tolist()
+
+    result = []
+    for i, row in enumerate(current):
+        delta = [max(0.0, c - p) for c, p in zip(row, previous[i])] if previous is not None else row
+        total = sum(delta) or 1
+        result.append([round(d / total * 100, 1) for d in delta])
+    return result
+
+
+def _breakdown(shares):
+    entry = dict(zip(FIELDS, shares))
+    entry['busy'] = round(100 - entry['idle'] - entry['iowait'], 1)
+    return entry
+
+
+class CpuAccountingEngine:
+    """Delta-based CPU accounting over successive counter samples"""
+
+    def __init__(self, reader=None):
+        self._reader = reader
+        self._previous = None
+        self._latest = None
+        self._lock = threading.Lock()
+
+    def _read(self):
+        if self._reader is None:
+            try:
+                counters = read_proc_stat()
+                self._reader = read_proc_stat
+                return counters
+            except (OSError, ValueError):
+                self._reader = read_psutil_counters
+        return self._reader()
+
+    def sample(self):
+        """Take a sample and compute breakdowns against the previous one"""
+        current = self._read()
+        prev = self._previous
+        # Hot-plugged CPUs change the core count; restart from since-boot averages
+        if prev is not None and len(prev.cores) != len(current.cores):
+            prev = None
+
+        rows = [current.total] + current.cores
+        prev_rows = [prev.total] + prev.cores if prev else None
+        shares = _percentages(rows, prev_rows)
+
+        interval = current.timestamp - prev.timestamp if prev else 0
+        def rate(name):
+            return round((getattr(current, name) - getattr(prev, name)) / interval, 1) if interval > 0 else 0
+
+        self._previous = current
+        return CpuAccounting(
+            timestamp=time.time(),
+            interval=round(interval, 3),
+            total=_breakdown(shares[0]),
+            cores=[_breakdown(row) for row in shares[1:]],
+            ctx_switches=current.ctx_switches,
+            interrupts=current.interrupts,
+            soft_interrupts=current.soft_interrupts,
+            ctx_switches_rate=rate('ctx_switches'),
+            interrupts_rate=rate('interrupts'),
+            soft_interrupts_rate=rate('soft_interrupts'),
+            procs_running=current.procs_running,
+            procs_blocked=current.procs_blocked
+        )
+
+    def get(self, max_age=SAMPLE_MAX_AGE):
+        """Latest accounting, sampling only if it is older than max_age"""
+        with self._lock:
+            if self._latest is None or time.time() - self._latest.timestamp >= max_age:
+                self._latest = self.sample()
+            return self._latest
+
+
+_engine = CpuAccountingEngine()
+
+
+def get_cpu_accounting(max_age=SAMPLE_MAX_AGE):
+    """Shared CPU accounting for the cpu and performance collectors"""
+    return _engine.get(max_age)
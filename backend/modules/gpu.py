@@ -3,66 +3,52 @@ GPU Monitoring Module - NVIDIA & AMD Support
 Author: M. Nafiurohman
 """
 
-import subprocess
+import atexit
 from utils.helpers import run_cmd, IS_WINDOWS
+from modules.gpu_sources import (NvidiaSmiStream, DrmGpuReader, NVIDIA_FIELDS,
+                                 DEFAULT_STREAM_INTERVAL_MS, parse_nvidia_line)
 
-def get_gpu_info():
-    """Get GPU information for NVIDIA and AMD"""
+_nvidia = None
+_drm = None
+
+
+def configure_gpu(nvidia_smi='nvidia-smi', sysfs_root='/sys', interval_ms=DEFAULT_STREAM_INTERVAL_MS):
+    """Select the nvidia-smi binary, sysfs root and streaming interval"""
+    global _nvidia, _drm
+    if _nvidia is not None:
+        _nvidia.stop()
+    _nvidia = NvidiaSmiStream(nvidia_smi, interval_ms)
+    _drm = DrmGpuReader(sysfs_root)
+    if not IS_WINDOWS:
+        _drm.cards()  # enumerate PCI devices once, up front
+
+
+def _sources():
+    if _nvidia is None:
+        configure_gpu()
+    return _nvidia, _drm
+
+
+@atexit.register
+def _stop_stream():
+    if _nvidia is not None:
+        _nvidia.stop()
+
+
+def _windows_gpus():
+    """One-shot queries; Windows has no sysfs and no cheap long-lived alternative"""
     gpus = []
-    
-    # Try NVIDIA
     try:
-        if IS_WINDOWS:
-            nvidia_cmd = "nvidia-smi --query-gpu=name,temperature.gpu,utilization.gpu,utilization.memory,memory.total,memory.used,memory.free --format=csv,noheader,nounits"
-        else:
-            nvidia_cmd = "nvidia-smi --query-gpu=name,temperature.gpu,utilization.gpu,utilization.memory,memory.total,memory.used,memory.free --format=csv,noheader,nounits"
-        
-        result = run_cmd(nvidia_cmd)
-        if result:
-            for line in result.split('\n'):
-                if line.strip():
-                    parts = [p.strip() for p in line.split(',')]
-                    if len(parts) >= 7:
-                        gpus.append({
-                            'vendor': 'NVIDIA',
-                            'name': parts[0],
-                            'temperature': float(parts[1]) if parts[1] != '[N/A]' else 0,
-                            'utilization': float(parts[2]) if parts[2] != '[N/A]' else 0,
-                            'memory_utilization': float(parts[3]) if parts[3] != '[N/A]' else 0,
-                            'memory_total': int(parts[4]) if parts[4] != '[N/A]' else 0,
-                            'memory_used': int(parts[5]) if parts[5] != '[N/A]' else 0,
-                            'memory_free': int(parts[6]) if parts[6] != '[N/A]' else 0
-                        })
+        result = run_cmd(f"nvidia-smi --query-gpu={','.join(NVIDIA_FIELDS)} --format=csv,noheader,nounits")
+        for line in result.split('\n'):
+            gpu = parse_nvidia_line(line)
+            if gpu is not None:
+                gpus.append(gpu)
     except:
         pass
-    
-    # Try AMD (Linux only)
-    if not IS_WINDOWS:
-        try:
-            amd_cmd = "rocm-smi --showtemp --showuse --showmeminfo vram"
-            result = run_cmd(amd_cmd)
-            if result and 'GPU' in result:
-                gpus.append({
-                    'vendor': 'AMD',
-                    'name': 'AMD GPU',
-                    'temperature': 0,
-                    'utilization': 0,
-                    'memory_utilization': 0,
-                    'memory_total': 0,
-                    'memory_used': 0,
-                    'memory_free': 0
-                })
-        except:
-            pass
-    
-    # Try Intel (basic detection)
+
     try:
-        if IS_WINDOWS:
-            intel_cmd = "wmic path win32_VideoController get name"
-        else:
-            intel_cmd = "lspci | grep -i vga"
-        
-        result = run_cmd(intel_cmd)
+        result = run_cmd("wmic path win32_VideoController get name")
         if result and ('Intel' in result or 'intel' in result):
             if not any(gpu['vendor'] in ['NVIDIA', 'AMD'] for gpu in gpus):
                 gpus.append({
@@ -77,7 +63,21 @@ def get_gpu_info():
                 })
     except:
         pass
-    
+    return gpus
+
+
+def get_gpu_info():
+    """Get GPU information for NVIDIA, AMD and Intel"""
+    if IS_WINDOWS:
+        gpus = _windows_gpus()
+    else:
+        nvidia, drm = _sources()
+        gpus = nvidia.sample()
+        try:
+            gpus += drm.sample()
+        except OSError:
+            pass
+
     return {
         'available': len(gpus) > 0,
         'count': len(gpus),
@@ -0,0 +1,204 @@
+"""
+GPU Metric Sources
+Author: M. Nafiurohman
+
+NVIDIA: one long-running `nvidia-smi --query-gpu ... -lms <interval>` child
+whose streaming CSV is parsed by a reader thread into the latest sample per
+GPU, so a collection never pays nvidia-smi's start-up cost.
+
+AMD / Intel: read directly from /sys/class/drm/card*/device (gpu_busy_percent,
+mem_info_vram_total/used, hwmon temp1_input). The card list and PCI identity
+are enumerated once; only the counters are re-read.
+
+The nvidia-smi binary and the sysfs root are parameters so both sources can be
+pointed at a fake script and a fixture tree.
+"""
+
+import glob
+import logging
+import os
+import subprocess
+import threading
+import time
+from utils.pseudofiles import files
+
+log = logging.getLogger(__name__)
+
+NVIDIA_FIELDS = ('index', 'name', 'temperature.gpu', 'utilization.gpu', 'utilization.memory',
+                 'memory.total', 'memory.used', 'memory.free')
+DEFAULT_STREAM_INTERVAL_MS = 1000
+RESTART_BACKOFF = 30.0  # Seconds before relaunching an nvidia-smi child that exited
+
+PCI_VENDORS = {'0x10de': 'NVIDIA', '0x1002': 'AMD', '0x8086': 'Intel'}
+MIB = 1024 * 1024
+
+
+def _number(value, cast=float):
+    """nvidia-smi reports unsupported fields as '[N/A]' or '[Not Supported]'"""
+    try:
+        return cast(value)
+    except ValueError:
+        return 0
+
+
+def parse_nvidia_line(line):
+    """One CSV row of the query fields into a GPU dict, or None if malformed"""
+    parts = [p.strip() for p in line.split(',')]
+    if len(parts) < len(NVIDIA_FIELDS):
+        return None
+    return {
+        'vendor': 'NVIDIA',
+        'index': _number(parts[0], int),
+        'name': parts[1],
+        'temperature': _number(parts[2]),
+        'utilization': _number(parts[3]),
+        'memory_utilization': _number(parts[4]),
+        'memory_total': _number(parts[5], int),
+        'memory_used': _number(parts[6], int),
+        'memory_free': _number(parts[7], int)
+    }
+
+
+class NvidiaSmiStream:
+    """Latest per-GPU sample from a long-lived nvidia-smi loop"""
+
+    def __init__(self, binary='nvidia-smi', interval_ms=DEFAULT_STREAM_INTERVAL_MS):
+        self.binary = binary
+        self.interval_ms = interval_ms
+        self.available = True     # False once the binary is known to be missing
+        self._proc = None
+        self._latest = {}         # index -> (gpu dict, monotonic time)
+        self._next_start = 0.0
+        self._lock = threading.Lock()
+
+    def _command(self):
+        return [self.binary, f"--query-gpu={','.join(NVIDIA_FIELDS)}",
+                '--format=csv,noheader,nounits', '-lms', str(self.interval_ms)]
+
+    def _ensure_running(self):
+        if self._proc is not None and self._proc.poll() is None:
+            return
+        now = time.monotonic()
+        if now < self._next_start:
+            return
+        self._next_start = now + RESTART_BACKOFF
+        try:
+            self._proc = subprocess.Popen(self._command(), stdout=subprocess.PIPE,
+                                          stderr=subprocess.DEVNULL, stdin=subprocess.DEVNULL,
+                                          text=True, bufsize=1)
+        except OSError:
+            self.available = False
+            self._proc = None
+            return
+        threading.Thread(target=self._read, args=(self._proc,), name="nvidia-smi-reader",
+                         daemon=True).start()
+
+    def _read(self, proc):
+        for line in proc.stdout:
+            gpu = parse_nvidia_line(line)
+            if gpu is None:
+                continue
+            with self._lock:
+                self._latest[gpu['index']] = (gpu, time.monotonic())
+        proc.wait()
+        log.info("nvidia-smi exited with status %s", proc.returncode)
+
+    def sample(self, max_age=None):
+        """Latest sample of every GPU seen within max_age seconds, ordered by index"""
+        if not self.available:
+            return []
+        self._ensure_running()
+        if max_age is None:
+            max_age = max(5.0, self.interval_ms / 1000 * 3)
+        now = time.monotonic()
+        with self._lock:
+            return [dict(gpu) for index, (gpu, seen) in sorted(self._latest.items())
+                    if now - seen <= max_age]
+
+    def stop(self):
+        proc, self._proc = self._proc, None
+        if proc is not None and proc.poll() is None:
+            proc.terminate()
+            try:
+                proc.wait(timeout=2)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+
+def _read_static(path):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+class DrmGpuReader:
+    """AMD/Intel GPU counters from the DRM sysfs tree"""
+
+    def __init__(self, sysfs_root='/sys', skip_vendors=('NVIDIA',)):
+        self.sysfs_root = sysfs_root
+        self.skip_vendors = skip_vendors
+        self._cards = None
+
+    def enumerate(self):
+        """Cards with a PCI device, identified once (vendor, name, slot, paths)"""
+        cards = []
+        seen = set()
+        for card in sorted(glob.glob(os.path.join(self.sysfs_root, 'class/drm/card[0-9]*'))):
+            name = os.path.basename(card)
+            if '-' in name:
+                continue  # connector entries such as card0-HDMI-A-1
+            device = os.path.join(card, 'device')
+            vendor = PCI_VENDORS.get(_read_static(os.path.join(device, 'vendor')))
+            if vendor is None or vendor in self.skip_vendors:
+                continue
+            uevent = _read_static(os.path.join(device, 'uevent')) or ''
+            fields = dict(line.split('=', 1) for line in uevent.splitlines() if '=' in line)
+            slot = fields.get('PCI_SLOT_NAME', name)
+            if slot in seen:
+                continue
+            seen.add(slot)
+            product = _read_static(os.path.join(device, 'product_name'))
+            device_id = _read_static(os.path.join(device, 'device')) or ''
+            hwmon = sorted(glob.glob(os.path.join(device, 'hwmon/hwmon*/temp1_input')))
+            cards.append({
+                'card': name,
+                'vendor': vendor,
+                'name': product or f"{vendor} GPU [{device_id}]",
+                'pci_slot': slot,
+                'driver': fields.get('DRIVER'),
+                'device': device,
+                'temp_input': hwmon[0] if hwmon else None
+            })
+        return cards
+
+    def cards(self):
+        if self._cards is None:
+            self._cards = self.enumerate()
+        return self._cards
+
+    def sample(self):
+        gpus = []
+        for card in self.cards():
+            device = card['device']
+            busy = files.read_int(os.path.join(device, 'gpu_busy_percent'), None)
+            vram_total = files.read_int(os.path.join(device, 'mem_info_vram_total'), None)
+            vram_used = files.read_int(os.path.join(device, 'mem_info_vram_used'), None)
+            temp = files.read_int(card['temp_input'], None) if card['temp_input'] else None
+
+            total_mib = vram_total // MIB if vram_total else 0
+            used_mib = vram_used // MIB if vram_used is not None else 0
+            gpus.append({
+                'vendor': card['vendor'],
+                'name': card['name'],
+                'pci_slot': card['pci_slot'],
+                'driver': card['driver'],
+                'temperature': temp / 1000 if temp is not None else 0,
+                'utilization': float(busy) if busy is not None else 0,
+                'memory_utilization': round(used_mib / total_mib * 100, 1) if total_mib else 0,
+                'memory_total': total_mib,
+                'memory_used': used_mib,
+                'memory_free': total_mib - used_mib
+            })
+        return gpus
@@ -0,0 +1,185 @@
+"""
+Kubernetes Informer Cache
+Author: M. Nafiurohman
+
+Keeps an in-memory copy of one resource type, the way client-go informers do:
+list once in pages through `kubectl get --raw <path>?limit=N`, then follow a long-lived
+`kubectl get --raw <path>?watch=1&resourceVersion=<rv>` stream and apply its
+ADDED/MODIFIED/DELETED events to an index by namespace and name. Only the
+projected fields the dashboard shows are kept. A watch that ends is resumed
+from the last seen resourceVersion; one that reports 410 Gone triggers a relist.
+"""
+
+import json
+import logging
+import subprocess
+import threading
+import time
+from modules.k8s_pager import PagedList, ContinueExpired, DEFAULT_CHUNK_SIZE
+
+log = logging.getLogger(__name__)
+
+RETRY_BASE = 1.0
+RETRY_MAX = 60.0
+SYNC_WAIT = 5.0  # Seconds a reader waits while the first list attempt is running
+
+
+class ListExpired(Exception):
+    """The watch's resourceVersion is too old (HTTP 410); a relist is needed"""
+
+
+class NotSynced(Exception):
+    """No list has succeeded yet and the last attempt failed"""
+
+
+class ResourceInformer:
+    """Listed-then-watched cache of one resource type"""
+
+    def __init__(self, resource, api_path, project, kubectl='kubectl', chunk_size=DEFAULT_CHUNK_SIZE):
+        self.resource = resource
+        self.api_path = api_path
+        self.project = project
+        self.kubectl = kubectl
+        self.chunk_size = chunk_size
+        self.error = None
+        self._index = {}          # namespace -> {name: projected item}
+        self._resource_version = None
+        self._version = 0         # bumped on every change
+        self._listed = {}         # namespace or None -> (version, list)
+        self._synced = threading.Event()
+        self._attempted = threading.Event()  # set once the first list succeeded or failed
+        self._lock = threading.Lock()
+        self._thread = None
+        self._proc = None
+        self._stopped = False
+
+    # --- Accessors ---
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=f"k8s-informer-{self.resource}",
+                                                daemon=True)
+                self._thread.start()
+
+    def items(self, namespace=None, wait=SYNC_WAIT):
+        """Projected items, optionally for one namespace
+
+        Waits only while the first list attempt is in flight; once an attempt
+        has failed and nothing is synced, raises NotSynced at once.
+        """
+        self.start()
+        if not self._synced.is_set():
+            self._attempted.wait(wait)
+            if not self._synced.is_set():
+                if self.error:
+                    raise NotSynced(self.error)
+                return []
+        with self._lock:
+            cached = self._listed.get(namespace)
+            if cached is not None and cached[0] == self._version:
+                return cached[1]
+            if namespace is None:
+                result = [item for names in self._index.values() for item in names.values()]
+            else:
+                result = list(self._index.get(namespace, {}).values())
+            self._listed[namespace] = (self._version, result)
+            return result
+
+    def get(self, namespace, name):
+        with self._lock:
+            return self._index.get(namespace or '', {}).get(name)
+
+    # --- Sync loop ---
+
+    def _kubectl(self, path):
+        return [self.kubectl, 'get', '--raw', path]
+
+    def _run(self):
+        failures = 0
+        while not self._stopped:
+            try:
+                if self._resource_version is None:
+                    self._list()
+                self._watch()
+                failures = 0
+            except (ListExpired, ContinueExpired):
+                self._resource_version = None
+                continue
+            except Exception as e:
+                self.error = str(e)
+                self._attempted.set()
+                failures += 1
+                log.warning("k8s %s informer: %s", self.resource, e)
+                time.sleep(min(RETRY_MAX, RETRY_BASE * 2 ** (failures - 1)))
+
+    def _list(self):
+        pages = PagedList(self.kubectl, self.api_path, self.chunk_size)
+        index = {}
+        for item in pages:
+            metadata = item.get('metadata', {})
+            index.setdefault(metadata.get('namespace', ''), {})[metadata.get('name')] = self.project(item)
+        with self._lock:
+            self._index = index
+            self._resource_version = pages.resource_version
+            self._version += 1
+            self.error = None
+        self._synced.set()
+        self._attempted.set()
+
+    def _watch(self):
+        separator = '&' if '?' in self.api_path else '?'
+        path = (f"{self.api_path}{separator}watch=1&allowWatchBookmarks=true"
+                f"&resourceVersion={self._resource_version}")
+        with self._lock:
+            # stop() may have run while the list was in flight
+            if self._stopped:
+                return
+            self._proc = subprocess.Popen(self._kubectl(path), stdout=subprocess.PIPE,
+                                          stderr=subprocess.DEVNULL, stdin=subprocess.DEVNULL,
+                                          text=True, bufsize=1)
+        try:
+            for line in self._proc.stdout:
+                if line.strip():
+                    self.apply(json.loads(line))
+        finally:
+            if self._proc.poll() is None:
+                self._proc.terminate()
+            self._proc.stdout.close()
+            self._proc.wait()
+        if self._proc.returncode != 0:
+            raise RuntimeError(f"watch exited with {self._proc.returncode}")
+
+    def apply(self, event):
+        """Apply one watch event to the index"""
+        kind = event.get('type')
+        obj = event.get('object', {})
+        metadata = obj.get('metadata', {})
+        if kind == 'ERROR':
+            if obj.get('code') == 410:
+                raise ListExpired()
+            raise RuntimeError(obj.get('message', 'watch error'))
+
+        with self._lock:
+            self._resource_version = metadata.get('resourceVersion', self._resource_version)
+            if kind == 'BOOKMARK':
+                return
+            namespace = metadata.get('namespace', '')
+            name = metadata.get('name')
+            if kind == 'DELETED':
+                names = self._index.get(namespace, {})
+                names.pop(name, None)
+                if not names:
+                    self._index.pop(namespace, None)
+            elif kind in ('ADDED', 'MODIFIED'):
+                self._index.setdefault(namespace, {})[name] = self.project(obj)
+            else:
+                return
+            self._version += 1
+
+    def stop(self):
+        with self._lock:
+            self._stopped = True
+            proc = self._proc
+        if proc is not None and proc.poll() is None:
+            proc.terminate()
@@ -0,0 +1,188 @@
+"""
+Chunked Kubernetes List Reader
+Author: M. Nafiurohman
+
+Lists a resource page by page (`kubectl get --raw <path>?limit=N&continue=...`)
+and decodes each page's `items[]` one element at a time straight from the pipe.
+Callers project every item as it arrives, so peak memory is one item plus the
+read buffer rather than the whole cluster's JSON, and no overall timeout is
+needed because progress is made continuously. A page that stops making
+progress for IDLE_TIMEOUT seconds (a stalled API server, a hung credential
+plugin) is killed and reported as an error. kubectl's stderr goes to a temporary
+file that is read once it exits, so warnings it prints never fill a pipe
+nobody is draining.
+"""
+
+import json
+import subprocess
+import tempfile
+import threading
+import time
+from urllib.parse import quote
+
+DEFAULT_CHUNK_SIZE = 500
+READ_SIZE = 64 * 1024
+REQUEST_TIMEOUT = '60s'   # kubectl's own per-request limit
+IDLE_TIMEOUT = 60.0       # Seconds without new output before a page's kubectl is killed
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+INCOMPLETE_TAIL = 6       # Chars a truncated literal or \uXXXX escape can leave at the buffer's end
+
+
+class ContinueExpired(Exception):
+    """The continue token expired mid-listing (HTTP 410); restart the list"""
+
+
+class _Reader:
+    """Incremental JSON tokens over a text stream"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        self.last_read = time.monotonic()
+
+    def _fill(self):
+        chunk = self.stream.read(READ_SIZE)
+        self.last_read = time.monotonic()
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Next non-whitespace character, or '' at end of input"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"expected {char!r} at offset {self.pos}")
+        self.pos += 1
+
+    def value(self):
+        """Decode one complete JSON value, reading more input until it parses"""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as e:
+                # Only a value cut off by the buffer's end can parse after more input;
+                # anything else is malformed, so fail now instead of reading to EOF
+                truncated = e.pos >= len(self.buffer) - INCOMPLETE_TAIL or e.msg.startswith('Unterminated string')
+                if not truncated or self.eof or not self._fill():
+                    raise
+                continue
+            # A number at the buffer's end may still be incomplete
+            if end == len(self.buffer) and not self.eof and self._fill():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_list(stream, metadata, reader=None):
+    """Yield the items of a k8s List object; top-level fields land in metadata"""
+    reader = reader or _Reader(stream)
+    reader.expect('{')
+    while reader.peek() != '}':
+        key = reader.value()
+        reader.expect(':')
+        if key == 'items' and reader.peek() == '[':
+            reader.expect('[')
+            while reader.peek() != ']':
+                yield reader.value()
+                if reader.peek() == ',':
+                    reader.pos += 1
+            reader.expect(']')
+        else:
+            metadata[key] = reader.value()
+        if reader.peek() == ',':
+            reader.pos += 1
+
+
+class PagedList:
+    """Iterates every item of a resource over limit/continue pages"""
+
+    def __init__(self, kubectl, path, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.kubectl = kubectl
+        self.path = path
+        self.chunk_size = chunk_size
+        self.resource_version = None
+        self.pages = 0
+
+    def _page_path(self, token):
+        separator = '&' if '?' in self.path else '?'
+        path = f"{self.path}{separator}limit={self.chunk_size}"
+        return f"{path}&continue={quote(token, safe='')}" if token else path
+
+    @staticmethod
+    def _watchdog(proc, reader, done, stalled):
+        """Kill the child once it has produced nothing for IDLE_TIMEOUT"""
+        while not done.wait(1.0):
+            if time.monotonic() - reader.last_read > IDLE_TIMEOUT:
+                stalled.set()
+                proc.kill()
+                return
+
+    def __iter__(self):
+        token = None
+        while True:
+            errors = tempfile.TemporaryFile(mode='w+')
+            try:
+                proc = subprocess.Popen([self.kubectl, 'get', '--raw', self._page_path(token),
+                                         f'--request-timeout={REQUEST_TIMEOUT}'],
+                                        stdout=subprocess.PIPE, stderr=errors,
+                                        stdin=subprocess.DEVNULL, text=True)
+            except OSError:
+                errors.close()
+                raise
+            metadata = {}
+            reader = _Reader(proc.stdout)
+            done = threading.Event()
+            stalled = threading.Event()
+            threading.Thread(target=self._watchdog, args=(proc, reader, done, stalled),
+                             name="k8s-page-watchdog", daemon=True).start()
+            parse_error = None
+            completed = False
+            try:
+                yield from iter_list(proc.stdout, metadata, reader)
+                proc.stdout.read()  # trailing whitespace; lets the child exit by itself
+                completed = True
+            except ValueError as e:
+                parse_error = e
+            finally:
+                done.set()
+                # Never wait() on a child that may still be writing to an undrained pipe
+                if not completed and proc.poll() is None:
+                    proc.kill()
+                proc.stdout.close()
+                proc.wait()
+                errors.seek(0)
+                stderr = errors.read()
+                errors.close()
+            if stalled.is_set():
+                raise RuntimeError(f"kubectl produced no output for {IDLE_TIMEOUT:.0f}s")
+            if proc.returncode != 0 and (stderr.strip() or parse_error is None):
+                if token and ('Expired' in stderr or '410' in stderr):
+                    raise ContinueExpired(stderr.strip())
+                raise RuntimeError(stderr.strip() or f"kubectl exited with {proc.returncode}")
+            if parse_error is not None:
+                raise parse_error
+
+            self.pages += 1
+            list_meta = metadata.get('metadata', {})
+            if token is None:
+                # Every page of a paged list is served at the first page's version
+                self.resource_version = list_meta.get('resourceVersion')
+            token = list_meta.get('continue')
+            if not token:
+                return
@@ -1,12 +1,17 @@
 import subprocess
-import json
+from modules.k8s_informer import ResourceInformer
+from modules.k8s_pager import DEFAULT_CHUNK_SIZE
 
-def run_kubectl(command):
+_kubectl = 'kubectl'
+_chunk_size = DEFAULT_CHUNK_SIZE
+_informers = {}
+
+
+def run_kubectl(*args):
     """Run kubectl command"""
     try:
         result = subprocess.run(
-            f"kubectl {command}",
-            shell=True,
+            [_kubectl, *args],
             capture_output=True,
             text=True,
             timeout=5
@@ -15,126 +20,126 @@ def run_kubectl(command):
     except:
         return None
 
-def get_k8s_pods():
+
+def project_pod(item):
+    metadata = item.get('metadata', {})
+    spec = item.get('spec', {})
+    status = item.get('status', {})
+
+    # Calculate restarts
+    restarts = sum(cs.get('restartCount', 0) for cs in status.get('containerStatuses', []))
+
+    return {
+        'name': metadata.get('name', 'N/A'),
+        'namespace': metadata.get('namespace', 'default'),
+        'status': status.get('phase', 'Unknown'),
+        'restarts': restarts,
+        'age': metadata.get('creationTimestamp', 'N/A'),
+        'node': spec.get('nodeName', 'N/A'),
+        'ip': status.get('podIP', 'N/A')
+    }
+
+
+def project_service(item):
+    metadata = item.get('metadata', {})
+    spec = item.get('spec', {})
+
+    ports = ', '.join([f"{p.get('port')}/{p.get('protocol', 'TCP')}"
+                      for p in spec.get('ports', [])])
+
+    return {
+        'name': metadata.get('name', 'N/A'),
+        'namespace': metadata.get('namespace', 'default'),
+        'type': spec.get('type', 'ClusterIP'),
+        'cluster_ip': spec.get('clusterIP', 'N/A'),
+        'external_ip': spec.get('externalIPs', ['None'])[0] if spec.get('externalIPs') else 'None',
+        'ports': ports or 'N/A'
+    }
+
+
+def project_deployment(item):
+    metadata = item.get('metadata', {})
+    spec = item.get('spec', {})
+    status = item.get('status', {})
+
+    return {
+        'name': metadata.get('name', 'N/A'),
+        'namespace': metadata.get('namespace', 'default'),
+        'replicas': spec.get('replicas', 0),
+        'ready': status.get('readyReplicas', 0),
+        'available': status.get('availableReplicas', 0),
+        'age': metadata.get('creationTimestamp', 'N/A')
+    }
+
+
+def project_node(item):
+    metadata = item.get('metadata', {})
+    status = item.get('status', {})
+
+    # Get node status
+    conditions = status.get('conditions', [])
+    ready = next((c.get('status') for c in conditions if c.get('type') == 'Ready'), 'Unknown')
+    roles = [label.split('/', 1)[1] for label in metadata.get('labels', {})
+             if label.startswith('node-role.kubernetes.io/')]
+
+    return {
+        'name': metadata.get('name', 'N/A'),
+        'status': 'Ready' if ready == 'True' else 'NotReady',
+        'roles': ', '.join(roles) or 'worker',
+        'version': status.get('nodeInfo', {}).get('kubeletVersion', 'N/A'),
+        'os': status.get('nodeInfo', {}).get('osImage', 'N/A')
+    }
+
+
+# resource -> (API list path, projection)
+RESOURCES = {
+    'pods': ('/api/v1/pods', project_pod),
+    'services': ('/api/v1/services', project_service),
+    'deployments': ('/apis/apps/v1/deployments', project_deployment),
+    'nodes': ('/api/v1/nodes', project_node),
+}
+
+
+def configure_k8s(kubectl='kubectl', chunk_size=DEFAULT_CHUNK_SIZE):
+    """Select the kubectl binary and list page size used for listing and watching"""
+    global _kubectl, _chunk_size
+    for informer in _informers.values():
+        informer.stop()
+    _informers.clear()
+    _kubectl = kubectl
+    _chunk_size = chunk_size
+
+
+def get_informer(resource):
+    """Shared informer for a resource, started on first use"""
+    informer = _informers.get(resource)
+    if informer is None:
+        path, project = RESOURCES[resource]
+        informer = _informers.setdefault(resource, ResourceInformer(resource, path, project, _kubectl, _chunk_size))
+    informer.start()
+    return informer
+
+
+def get_k8s_pods(namespace=None):
     """Get Kubernetes pods"""
-    output = run_kubectl("get pods -A -o json")
-    if not output:
-        return []
-    
-    try:
-        data = json.loads(output)
-        pods = []
-        
-        for item in data.get('items', []):
-            metadata = item.get('metadata', {})
-            spec = item.get('spec', {})
-            status = item.get('status', {})
-            
-            # Calculate restarts
-            restarts = sum(cs.get('restartCount', 0) for cs in status.get('containerStatuses', []))
-            
-            pods.append({
-                'name': metadata.get('name', 'N/A'),
-                'namespace': metadata.get('namespace', 'default'),
-                'status': status.get('phase', 'Unknown'),
-                'restarts': restarts,
-                'age': metadata.get('creationTimestamp', 'N/A'),
-                'node': spec.get('nodeName', 'N/A'),
-                'ip': status.get('podIP', 'N/A')
-            })
-        
-        return pods
-    except:
-        return []
+    return get_informer('pods').items(namespace)
+
 
-def get_k8s_services():
+def get_k8s_services(namespace=None):
     """Get Kubernetes services"""
-    output = run_kubectl("get services -A -o json")
-    if not output:
-        return []
-    
-    try:
-        data = json.loads(output)
-        services = []
-        
-        for item in data.get('items', []):
-            metadata = item.get('metadata', {})
-            spec = item.get('spec', {})
-            
-            ports = ', '.join([f"{p.get('port')}/{p.get('protocol', 'TCP')}" 
-                              for p in spec.get('ports', [])])
-            
-            services.append({
-                'name': metadata.get('name', 'N/A'),
-                'namespace': metadata.get('namespace', 'default'),
-                'type': spec.get('type', 'ClusterIP'),
-                'cluster_ip': spec.get('clusterIP', 'N/A'),
-                'external_ip': spec.get('externalIPs', ['None'])[0] if spec.get('externalIPs') else 'None',
-                'ports': ports or 'N/A'
-            })
-        
-        return services
-    except:
-        return []
+    return get_informer('services').items(namespace)
+
 
-def get_k8s_deployments():
+def get_k8s_deployments(namespace=None):
     """Get Kubernetes deployments"""
-    output = run_kubectl("get deployments -A -o json")
-    if not output:
-        return []
-    
-    try:
-        data = json.loads(output)
-        deployments = []
-        
-        for item in data.get('items', []):
-            metadata = item.get('metadata', {})
-            spec = item.get('spec', {})
-            status = item.get('status', {})
-            
-            deployments.append({
-                'name': metadata.get('name', 'N/A'),
-                'namespace': metadata.get('namespace', 'default'),
-                'replicas': spec.get('replicas', 0),
-                'ready': status.get('readyReplicas', 0),
-                'available': status.get('availableReplicas', 0),
-                'age': metadata.get('creationTimestamp', 'N/A')
-            })
-        
-        return deployments
-    except:
-        return []
+    return get_informer('deployments').items(namespace)
+
 
 def get_k8s_nodes():
     """Get Kubernetes nodes"""
-    output = run_kubectl("get nodes -o json")
-    if not output:
-        return []
-    
-    try:
-        data = json.loads(output)
-        nodes = []
-        
-        for item in data.get('items', []):
-            metadata = item.get('metadata', {})
-            status = item.get('status', {})
-            
-            # Get node status
-            conditions = status.get('conditions', [])
-            ready = next((c.get('status') for c in conditions if c.get('type') == 'Ready'), 'Unknown')
-            
-            nodes.append({
-                'name': metadata.get('name', 'N/A'),
-                'status': 'Ready' if ready == 'True' else 'NotReady',
-                'roles': ', '.join(metadata.get('labels', {}).get('node-role.kubernetes.io', {}).keys()) or 'worker',
-                'version': status.get('nodeInfo', {}).get('kubeletVersion', 'N/A'),
-                'os': status.get('nodeInfo', {}).get('osImage', 'N/A')
-            })
-        
-        return nodes
-    except:
-        return []
+    return get_informer('nodes').items()
+
 
 def is_k8s_available():
     """Check if kubectl is available"""
-    return run_kubectl("version --client --short") is not None
+    return run_kubectl("version", "--client") is not None
@@ -4,31 +4,25 @@ Author: M. Nafiurohman
 """
 
 import psutil
-from utils.helpers import run_cmd, IS_WINDOWS
+from utils.helpers import IS_WINDOWS, IS_LINUX
+from utils.pseudofiles import read_meminfo, read_swap
+from utils import sysinfo
 
 def get_memory_info():
     """Get detailed memory information with breakdown"""
     try:
-        mem = psutil.virtual_memory()
-        swap = psutil.swap_memory()
+        if IS_LINUX:
+            mem = read_meminfo()
+            swap = read_swap()
+        else:
+            mem = psutil.virtual_memory()
+            swap = psutil.swap_memory()
         
         # ZRAM detection (Linux only)
         zram_devices = []
         if not IS_WINDOWS:
             try:
-                zram_info = run_cmd("zramctl --output NAME,DISKSIZE,DATA,COMPR,TOTAL --raw --noheadings")
-                if zram_info:
-                    for line in zram_info.split('\n'):
-                        if line.strip():
-                            parts = line.split()
-                            if len(parts) >= 5:
-                                zram_devices.append({
-                                    'device': parts[0],
-                                    'disksize': parts[1],
-                                    'data': parts[2],
-                                    'compr': parts[3],
-                                    'total': parts[4]
-                                })
+                zram_devices = sysinfo.zram_devices()
             except:
                 pass
         
@@ -0,0 +1,181 @@
+"""
+Network Interface Catalog and Rate Engine
+Author: M. Nafiurohman
+
+Interface metadata (addresses, link state, speed, MTU, virtual or physical)
+is read with one net_if_addrs()/net_if_stats() pair and cached. A NETLINK_ROUTE
+socket subscribed to the link and address groups says when to read it again;
+without netlink the cache is refreshed when an unknown interface shows up in
+the counters or once it is META_MAX_AGE old.
+
+RateEngine turns successive counter readings into per-interface rates with
+EWMA smoothing. There is one engine, fed only by the traffic collector, so
+concurrent readers never share or disturb its previous-sample state. A counter
+that goes backwards is taken as a 32-bit wrap when that explains the drop and
+as a reset (interface recreated) otherwise.
+"""
+
+import errno
+import math
+import os
+import socket
+import threading
+import time
+from collections import namedtuple
+import psutil
+
+META_MAX_AGE = 30.0          # Seconds between metadata refreshes without netlink
+DEFAULT_EWMA_WINDOW = 5.0    # Seconds; time constant of the smoothed rates
+WRAP_32 = 2 ** 32
+
+NETLINK_ROUTE = 0
+RTMGRP_LINK = 0x1
+RTMGRP_IPV4_IFADDR = 0x10
+RTMGRP_IPV6_IFADDR = 0x100
+
+# Name prefixes of virtual interfaces, for systems without /sys/class/net
+VIRTUAL_PREFIXES = ('lo', 'veth', 'docker', 'br-', 'virbr', 'cali', 'flannel', 'cni', 'vxlan',
+                    'tun', 'tap', 'kube-', 'cilium', 'weave', 'utun', 'awdl', 'llw', 'bridge')
+
+InterfaceMeta = namedtuple('InterfaceMeta', ['ip', 'ipv6', 'mac', 'is_up', 'speed', 'mtu', 'virtual'])
+
+Rates = namedtuple('Rates', ['tx_bytes', 'rx_bytes', 'tx_packets', 'rx_packets',
+                             'tx_bytes_avg', 'rx_bytes_avg'])
+
+RATE_FIELDS = ('bytes_sent', 'bytes_recv', 'packets_sent', 'packets_recv')
+NO_RATES = Rates(0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+
+
+def is_virtual(name, sys_class_net='/sys/class/net'):
+    """Software interfaces live under /sys/devices/virtual on Linux"""
+    path = f"{sys_class_net}/{name}"
+    if os.path.exists(path):
+        return '/devices/virtual/' in os.path.realpath(path)
+    return name.startswith(VIRTUAL_PREFIXES)
+
+
+class InterfaceCatalog:
+    """Cached interface metadata, re-read when the kernel reports a change"""
+
+    def __init__(self, max_age=META_MAX_AGE):
+        self.max_age = max_age
+        self._meta = None
+        self._loaded_at = 0.0
+        self._watch = None
+        self._watch_opened = False
+        self._lock = threading.Lock()
+
+    def _open_watch(self):
+        self._watch_opened = True
+        try:
+            sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW | socket.SOCK_NONBLOCK, NETLINK_ROUTE)
+            sock.bind((0, RTMGRP_LINK | RTMGRP_IPV4_IFADDR | RTMGRP_IPV6_IFADDR))
+        except (OSError, AttributeError):
+            return None
+        return sock
+
+    def _changed(self):
+        """Drain pending link/address notifications; True if there were any"""
+        if not self._watch_opened:
+            self._watch = self._open_watch()
+            return True
+        if self._watch is None:
+            return time.monotonic() - self._loaded_at >= self.max_age
+        changed = False
+        while True:
+            try:
+                self._watch.recv(65536)
+            except BlockingIOError:
+                return changed
+            except OSError as e:
+                if e.errno != errno.ENOBUFS:
+                    return True
+                # Notifications were dropped; keep draining and reload
+            changed = True
+
+    def _refresh(self):
+        addrs = psutil.net_if_addrs()
+        stats = psutil.net_if_stats()
+        meta = {}
+        for name in set(addrs) | set(stats):
+            entries = addrs.get(name, [])
+            st = stats.get(name)
+            meta[name] = InterfaceMeta(
+                ip=next((a.address for a in entries if a.family == socket.AF_INET), 'N/A'),
+                ipv6=next((a.address for a in entries if a.family == socket.AF_INET6), None),
+                mac=next((a.address for a in entries if a.family == psutil.AF_LINK), None),
+                is_up=st.isup if st else False,
+                speed=st.speed if st else 0,
+                mtu=st.mtu if st else 0,
+                virtual=is_virtual(name))
+        self._meta = meta
+        self._loaded_at = time.monotonic()
+
+    def get(self, names=()):
+        """Metadata by interface name; names seen in the counters but not here force a reload"""
+        with self._lock:
+            changed = self._changed()
+            if self._meta is None or changed or any(name not in self._meta for name in names):
+                self._refresh()
+            return self._meta
+
+
+def counter_delta(previous, current):
+    """Increase of a kernel counter, or None if it was reset"""
+    if current >= previous:
+        return current - previous
+    if WRAP_32 // 2 <= previous < WRAP_32:
+        return current + WRAP_32 - previous
+    return None
+
+
+class _InterfaceState:
+    __slots__ = ('counters', 'at', 'rates')
+
+    def __init__(self, counters, at):
+        self.counters = counters
+        self.at = at
+        self.rates = None  # until a second reading arrives
+
+
+class RateEngine:
+    """Per-interface rates from successive counter readings, smoothed with an EWMA"""
+
+    def __init__(self, window=DEFAULT_EWMA_WINDOW):
+        self.window = window
+        self._states = {}
+        self._lock = threading.Lock()
+
+    def update(self, counters, now):
+        """Fold one reading (name -> counters) in; returns name -> Rates"""
+        with self._lock:
+            rates = {}
+            for name, stats in counters.items():
+                values = tuple(getattr(stats, field) for field in RATE_FIELDS)
+                state = self._states.get(name)
+                if state is None:
+                    self._states[name] = state = _InterfaceState(values, now)
+                elif now > state.at:
+                    state.rates = self._advance(state, values, now - state.at)
+                    state.counters = values
+                    state.at = now
+                rates[name] = state.rates or NO_RATES
+            for name in set(self._states) - set(counters):
+                del self._states[name]
+            return rates
+
+    def _advance(self, state, values, elapsed):
+        deltas = [counter_delta(p, c) for p, c in zip(state.counters, values)]
+        previous = state.rates
+        if None in deltas:
+            # Counters were reset: keep the averages and start over from this reading
+            return NO_RATES._replace(tx_bytes_avg=previous.tx_bytes_avg,
+                                     rx_bytes_avg=previous.rx_bytes_avg) if previous else None
+        tx, rx, tx_packets, rx_packets = (d / elapsed for d in deltas)
+        if previous is None:
+            tx_avg, rx_avg = tx, rx
+        else:
+            alpha = 1.0 - math.exp(-elapsed / self.window)
+            tx_avg = previous.tx_bytes_avg + alpha * (tx - previous.tx_bytes_avg)
+            rx_avg = previous.rx_bytes_avg + alpha * (rx - previous.rx_bytes_avg)
+        return Rates(tx, rx, tx_packets, rx_packets, tx_avg, rx_avg)
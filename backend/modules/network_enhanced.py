@@ -1,92 +1,182 @@
 import psutil
 import time
+import heapq
+import socket
+from collections import Counter
+from modules.sockets import get_inode_index
+from modules.net_interfaces import InterfaceCatalog, RateEngine, DEFAULT_EWMA_WINDOW
+from modules.sock_diag import ConnectionFilter, STATE_NAMES, dump_sockets, state_name, endpoint, tcp_info
+from utils.helpers import IS_LINUX
+from utils.pseudofiles import read_net_dev
+
+_catalog = InterfaceCatalog()
+_engine = RateEngine()
+_include_virtual = False
+
+
+def configure_network(include_virtual=False, ewma_window=DEFAULT_EWMA_WINDOW):
+    """Choose whether virtual interfaces are reported and how much rates are smoothed"""
+    global _engine, _include_virtual
+    _include_virtual = include_virtual
+    _engine = RateEngine(ewma_window)
 
-# Store previous network stats for rate calculation
-_prev_net_io = {}
-_prev_time = time.time()
 
 def get_network_traffic_details():
     """Get detailed network traffic per interface"""
-    global _prev_net_io, _prev_time
-    
-    current_io = psutil.net_io_counters(pernic=True)
-    current_time = time.time()
-    time_delta = current_time - _prev_time
-    
+    current_io = read_net_dev() if IS_LINUX else psutil.net_io_counters(pernic=True)
+    meta = _catalog.get(current_io)
+    if not _include_virtual:
+        current_io = {name: stats for name, stats in current_io.items()
+                      if name in meta and not meta[name].virtual}
+    rates = _engine.update(current_io, time.monotonic())
+
     interfaces = []
-    
+
     for iface, stats in current_io.items():
-        # Calculate rates
-        if iface in _prev_net_io and time_delta > 0:
-            prev = _prev_net_io[iface]
-            upload_rate = (stats.bytes_sent - prev.bytes_sent) / time_delta
-            download_rate = (stats.bytes_recv - prev.bytes_recv) / time_delta
-            packets_sent_rate = (stats.packets_sent - prev.packets_sent) / time_delta
-            packets_recv_rate = (stats.packets_recv - prev.packets_recv) / time_delta
-        else:
-            upload_rate = download_rate = packets_sent_rate = packets_recv_rate = 0
-        
-        # Get interface addresses
-        addrs = psutil.net_if_addrs().get(iface, [])
-        ip_address = next((addr.address for addr in addrs if addr.family == 2), 'N/A')
-        
-        # Get interface status
-        if_stats = psutil.net_if_stats().get(iface)
-        is_up = if_stats.isup if if_stats else False
-        speed = if_stats.speed if if_stats else 0
-        
+        info = meta.get(iface)
+        rate = rates[iface]
+        speed = info.speed if info else 0
+
         interfaces.append({
             'name': iface,
-            'ip': ip_address,
-            'status': 'up' if is_up else 'down',
+            'ip': info.ip if info else 'N/A',
+            'ipv6': info.ipv6 if info else None,
+            'mac': info.mac if info else None,
+            'status': 'up' if info and info.is_up else 'down',
             'speed': f"{speed} Mbps" if speed > 0 else 'Unknown',
+            'mtu': info.mtu if info else 0,
+            'virtual': info.virtual if info else False,
             'bytes_sent': stats.bytes_sent,
             'bytes_recv': stats.bytes_recv,
             'bytes_sent_human': format_bytes(stats.bytes_sent),
             'bytes_recv_human': format_bytes(stats.bytes_recv),
-            'upload_rate': upload_rate,
-            'download_rate': download_rate,
-            'upload_rate_human': f"{format_bytes(upload_rate)}/s",
-            'download_rate_human': f"{format_bytes(download_rate)}/s",
+            'upload_rate': rate.tx_bytes_avg,
+            'download_rate': rate.rx_bytes_avg,
+            'upload_rate_instant': rate.tx_bytes,
+            'download_rate_instant': rate.rx_bytes,
+            'upload_rate_human': f"{format_bytes(rate.tx_bytes_avg)}/s",
+            'download_rate_human': f"{format_bytes(rate.rx_bytes_avg)}/s",
             'packets_sent': stats.packets_sent,
             'packets_recv': stats.packets_recv,
-            'packets_sent_rate': int(packets_sent_rate),
-            'packets_recv_rate': int(packets_recv_rate),
+            'packets_sent_rate': int(rate.tx_packets),
+            'packets_recv_rate': int(rate.rx_packets),
             'errors_in': stats.errin,
             'errors_out': stats.errout,
             'drops_in': stats.dropin,
             'drops_out': stats.dropout
         })
-    
-    # Update previous stats
-    _prev_net_io = current_io
-    _prev_time = current_time
-    
+
     return interfaces
 
+
+CONNECTION_PAGE_SIZE = 100
+CONNECTION_PAGE_MAX = 1000
+CONNECTION_TOP = 20
+PROTOCOL_ORDER = {'tcp': 0, 'udp': 1}
+
+
+def _connection_key(row):
+    """Stable sort key of a socket; cursors are encoded from it"""
+    return (row.inode, row.cookie, PROTOCOL_ORDER[row.proto], row.sport, row.dport,
+            int.from_bytes(row.dst, 'big'))
+
+
+def _parse_cursor(cursor):
+    if not cursor:
+        return None
+    key = tuple(int(part) for part in cursor.split('.'))
+    if len(key) != 6:
+        raise ValueError(f"invalid cursor: {cursor}")
+    return key
+
+
+def _connection_entry(row, owners):
+    info = tcp_info(row.info)
+    return {
+        'protocol': row.proto.upper(),
+        'local': endpoint(row.family, row.src, row.sport),
+        'remote': endpoint(row.family, row.dst, row.dport) if row.dport else 'N/A',
+        'status': state_name(row.proto, row.state),
+        'pid': owners.get(row.inode) or 'N/A',
+        'uid': row.uid,
+        'inode': row.inode,
+        'recv_queue': row.rqueue,
+        'send_queue': row.wqueue,
+        'tcp_info': {
+            'rtt_ms': info.rtt_us / 1000,
+            'rttvar_ms': info.rttvar_us / 1000,
+            'retransmits': info.retransmits,
+            'total_retrans': info.total_retrans,
+            'lost': info.lost,
+            'unacked': info.unacked,
+            'snd_cwnd': info.snd_cwnd,
+            'bytes_acked': info.bytes_acked,
+            'bytes_received': info.bytes_received
+        } if info else None
+    }
+
+
+def query_connections(flt=None, cursor=None, limit=CONNECTION_PAGE_SIZE, top=CONNECTION_TOP):
+    """Counts per state, remote peer and local port, plus one page of matching sockets
+
+    Everything comes from a single filtered dump. Rows are ordered by a stable
+    socket key; pass the returned next_cursor to continue after the last row.
+    """
+    flt = flt or ConnectionFilter()
+    after = _parse_cursor(cursor)
+    limit = max(0, min(int(limit), CONNECTION_PAGE_MAX))
+    by_state = Counter()
+    by_peer = Counter()
+    by_port = Counter()
+    total = 0
+    page = []  # max-heap (negated keys) of the `limit + 1` smallest keys past the cursor
+
+    for row in dump_sockets(flt, with_info=limit > 0):
+        total += 1
+        by_state[(row.proto, row.state)] += 1
+        if row.dport:
+            by_peer[(row.family, row.dst)] += 1
+        by_port[(row.proto, row.sport)] += 1
+        if not limit:
+            continue
+        key = _connection_key(row)
+        if after is not None and key <= after:
+            continue
+        item = (tuple(-k for k in key), total, row)
+        if len(page) <= limit:
+            heapq.heappush(page, item)
+        elif item > page[0]:
+            heapq.heapreplace(page, item)
+
+    rows = [row for _, _, row in sorted(page, reverse=True)]
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = '.'.join(str(k) for k in _connection_key(rows[-1]))
+    owners = get_inode_index() if rows else {}
+
+    states = Counter()
+    for (proto, state), count in by_state.items():
+        states[state_name(proto, state)] += count
+    return {
+        'total': total,
+        'by_state': dict(states),
+        'top_remote_peers': [{'address': socket.inet_ntop(family, raw), 'count': count}
+                             for (family, raw), count in by_peer.most_common(top)],
+        'top_local_ports': [{'protocol': proto.upper(), 'port': port, 'count': count}
+                            for (proto, port), count in by_port.most_common(top)],
+        'connections': [_connection_entry(row, owners) for row in rows],
+        'next_cursor': next_cursor
+    }
+
+
 def get_network_connections_detailed():
     """Get detailed network connections"""
-    connections = []
-    
     try:
-        for conn in psutil.net_connections(kind='inet'):
-            if conn.status == 'LISTEN':
-                continue
-            
-            local_addr = f"{conn.laddr.ip}:{conn.laddr.port}" if conn.laddr else 'N/A'
-            remote_addr = f"{conn.raddr.ip}:{conn.raddr.port}" if conn.raddr else 'N/A'
-            
-            connections.append({
-                'protocol': 'TCP' if conn.type == 1 else 'UDP',
-                'local': local_addr,
-                'remote': remote_addr,
-                'status': conn.status,
-                'pid': conn.pid or 'N/A'
-            })
-    except:
-        pass
-    
-    return connections[:100]  # Limit to 100 connections
+        states = [name for name in set(STATE_NAMES.values()) if name != 'LISTEN'] + ['NONE']
+        return query_connections(ConnectionFilter(states=states), top=0)['connections']
+    except OSError:
+        return []
 
 def format_bytes(bytes_val):
     """Format bytes to human readable"""
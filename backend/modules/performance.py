@@ -5,29 +5,34 @@ Author: M. Nafiurohman
 
 import psutil
 import os
-from utils.helpers import run_cmd, IS_WINDOWS
+from utils.helpers import IS_WINDOWS, IS_LINUX
+from utils import sysinfo
+from utils.pseudofiles import sensors
+from modules.process_snapshot import get_process_snapshot
+from modules.sockets import get_socket_inventory
+from modules.cpu_accounting import get_cpu_accounting
 
 def get_performance_metrics():
     """Get deep performance metrics"""
     try:
         metrics = {}
         
-        # Context switches
-        if hasattr(psutil, 'cpu_stats'):
-            cpu_stats = psutil.cpu_stats()
-            metrics['ctx_switches'] = cpu_stats.ctx_switches
-            metrics['interrupts'] = cpu_stats.interrupts
-            metrics['soft_interrupts'] = getattr(cpu_stats, 'soft_interrupts', 0)
-        else:
-            metrics['ctx_switches'] = 0
-            metrics['interrupts'] = 0
-            metrics['soft_interrupts'] = 0
+        # Context switches and interrupts, with rates since the previous sample
+        accounting = get_cpu_accounting()
+        metrics['ctx_switches'] = accounting.ctx_switches
+        metrics['interrupts'] = accounting.interrupts
+        metrics['soft_interrupts'] = accounting.soft_interrupts
+        metrics['ctx_switches_rate'] = accounting.ctx_switches_rate
+        metrics['interrupts_rate'] = accounting.interrupts_rate
+        metrics['soft_interrupts_rate'] = accounting.soft_interrupts_rate
+        metrics['procs_running'] = accounting.procs_running
+        metrics['procs_blocked'] = accounting.procs_blocked
         
         # File descriptors
         if not IS_WINDOWS:
             try:
                 fd_count = len(os.listdir('/proc/self/fd'))
-                fd_limit = int(run_cmd("ulimit -n") or "1024")
+                fd_limit = sysinfo.open_files_limit() or 1024
                 metrics['file_descriptors'] = {
                     'current': fd_count,
                     'limit': fd_limit,
@@ -39,12 +44,12 @@ def get_performance_metrics():
             metrics['file_descriptors'] = {'current': 0, 'limit': 0, 'percent': 0}
         
         # Process stats
-        metrics['total_threads'] = sum([p.num_threads() for p in psutil.process_iter() if hasattr(p, 'num_threads')])
-        metrics['total_processes'] = len(psutil.pids())
+        snapshot = get_process_snapshot()
+        metrics['total_threads'] = snapshot.total_threads
+        metrics['total_processes'] = len(snapshot.processes)
         
         # Zombie processes
-        zombies = len([p for p in psutil.process_iter(['status']) if p.info['status'] == 'zombie'])
-        metrics['zombie_processes'] = zombies
+        metrics['zombie_processes'] = snapshot.status_counts.get(psutil.STATUS_ZOMBIE, 0)
         
         # Load average
         if hasattr(psutil, 'getloadavg'):
@@ -69,55 +74,49 @@ def get_resource_limits():
         if not IS_WINDOWS:
             # Max open files
             try:
-                max_files = run_cmd("cat /proc/sys/fs/file-max")
-                current_files = run_cmd("cat /proc/sys/fs/file-nr | awk '{print $1}'")
+                current_files, max_files = sysinfo.file_handles()
                 limits['open_files'] = {
-                    'current': int(current_files or 0),
-                    'max': int(max_files or 0),
-                    'percent': round((int(current_files or 0) / int(max_files or 1)) * 100, 1)
+                    'current': current_files,
+                    'max': max_files,
+                    'percent': round((current_files / (max_files or 1)) * 100, 1)
                 }
             except:
                 limits['open_files'] = {'current': 0, 'max': 0, 'percent': 0}
             
             # Max user processes
             try:
-                max_proc = run_cmd("ulimit -u")
-                limits['max_processes'] = int(max_proc or 0)
+                limits['max_processes'] = sysinfo.max_user_processes()
             except:
                 limits['max_processes'] = 0
             
             # Socket exhaustion
             try:
-                sockets = len(psutil.net_connections())
+                sockets = len(get_socket_inventory().sockets)
                 limits['sockets'] = sockets
             except:
                 limits['sockets'] = 0
             
             # Ephemeral ports
             try:
-                port_range = run_cmd("cat /proc/sys/net/ipv4/ip_local_port_range")
+                port_range = sysinfo.local_port_range()
                 if port_range:
-                    parts = port_range.split()
-                    if len(parts) == 2:
-                        limits['ephemeral_ports'] = {
-                            'min': int(parts[0]),
-                            'max': int(parts[1]),
-                            'range': int(parts[1]) - int(parts[0])
-                        }
+                    low, high = port_range
+                    limits['ephemeral_ports'] = {
+                        'min': low,
+                        'max': high,
+                        'range': high - low
+                    }
             except:
                 pass
             
             # Inode usage
             try:
-                df_output = run_cmd("df -i / | tail -1")
-                if df_output:
-                    parts = df_output.split()
-                    if len(parts) >= 5:
-                        limits['inodes'] = {
-                            'used': parts[2],
-                            'total': parts[1],
-                            'percent': parts[4].replace('%', '')
-                        }
+                used, total, percent = sysinfo.inode_usage('/')
+                limits['inodes'] = {
+                    'used': used,
+                    'total': total,
+                    'percent': percent
+                }
             except:
                 pass
         
@@ -132,7 +131,7 @@ def get_thermal_power():
         
         # CPU Temperature
         try:
-            temps = psutil.sensors_temperatures()
+            temps = sensors.temperatures() if IS_LINUX else psutil.sensors_temperatures()
             if temps:
                 cpu_temps = []
                 for name, entries in temps.items():
@@ -164,8 +163,7 @@ def get_thermal_power():
         # Thermal throttling (Linux)
         if not IS_WINDOWS:
             try:
-                throttle = run_cmd("cat /sys/devices/system/cpu/cpu0/thermal_throttle/core_throttle_count")
-                thermal['throttle_count'] = int(throttle or 0)
+                thermal['throttle_count'] = sysinfo.throttle_count()
             except:
                 thermal['throttle_count'] = 0
         
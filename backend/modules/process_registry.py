@@ -0,0 +1,169 @@
+"""
+Persistent Process Registry
+Author: M. Nafiurohman
+
+Keeps one entry per live process between samples, keyed by (pid, create_time).
+Static attributes (name, user, start time) are read once, and CPU% / disk I/O
+rates are computed from the previous sample's counters. Raw counters come from
+a pluggable reader: direct procfs parsing, or psutil where procfs is unavailable.
+"""
+
+import time
+import psutil
+from modules.procfs import ProcfsReader, ProcReading
+
+BACKENDS = ('procfs', 'psutil')
+
+
+class PsutilReader:
+    """Counter reader built on long-lived psutil.Process handles"""
+
+    def __init__(self):
+        self._handles = {}   # (pid, create_time) -> psutil.Process
+        self._by_pid = {}    # pid -> handle read in the current pass
+
+    def read_all(self):
+        handles = {}
+        self._by_pid = {}
+        for pid in psutil.pids():
+            try:
+                # A fresh Process reads the pid's current create time, so a reused
+                # pid gets a new key and never the previous process's handle
+                probe = psutil.Process(pid)
+                key = (pid, probe.create_time())
+                proc = self._handles.get(key, probe)
+                reading = self._read(proc)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+            handles[key] = proc
+            self._by_pid[pid] = proc
+            yield reading
+        self._handles = handles
+
+    def _read(self, proc):
+        try:
+            with proc.oneshot():
+                cpu = proc.cpu_times()
+                status = proc.status()
+                num_threads = proc.num_threads()
+                rss = proc.memory_info().rss
+                try:
+                    io = proc.io_counters()
+                except (psutil.AccessDenied, AttributeError):
+                    io = None
+        except psutil.ZombieProcess:
+            return ProcReading(proc.pid, proc.create_time(), proc.name(), psutil.STATUS_ZOMBIE,
+                               0, 0, 0.0, None, None)
+        return ProcReading(
+            pid=proc.pid,
+            create_time=proc.create_time(),
+            name=proc.name(),
+            status=status,
+            num_threads=num_threads,
+            rss=rss,
+            cpu_total=cpu.user + cpu.system,
+            io_read=io.read_bytes if io else None,
+            io_write=io.write_bytes if io else None
+        )
+
+    def username(self, pid):
+        proc = self._by_pid.get(pid)
+        try:
+            return (proc or psutil.Process(pid)).username()
+        except (psutil.Error, KeyError):
+            return None
+
+
+def make_reader(backend='procfs'):
+    """Build the requested counter reader, falling back to psutil"""
+    if backend == 'procfs':
+        reader = ProcfsReader()
+        if reader.available():
+            return reader
+    return PsutilReader()
+
+
+class TrackedProcess:
+    """Registry entry: cached static attributes plus the latest sample"""
+
+    __slots__ = ('pid', 'create_time', 'name', 'username',
+                 'status', 'num_threads', 'memory_rss', 'cpu_percent',
+                 'cpu_total', 'io_read', 'io_write', 'io_read_rate', 'io_write_rate',
+                 'sampled_at', 'io_at')
+
+    def __init__(self, reading, username):
+        self.pid = reading.pid
+        self.create_time = reading.create_time
+        self.name = reading.name
+        self.username = username
+        self.status = 'unknown'
+        self.num_threads = 0
+        self.memory_rss = 0
+        self.cpu_percent = 0.0
+        self.cpu_total = None
+        self.io_read = None
+        self.io_write = None
+        self.io_read_rate = 0.0
+        self.io_write_rate = 0.0
+        self.sampled_at = None
+        self.io_at = None
+
+    @property
+    def key(self):
+        return (self.pid, self.create_time)
+
+
+class ProcessRegistry:
+    """Long-lived registry of tracked processes, evicting entries on exit"""
+
+    def __init__(self, backend='procfs'):
+        self.reader = make_reader(backend)
+        self._entries = {}  # (pid, create_time) -> TrackedProcess
+
+    @property
+    def backend(self):
+        return 'procfs' if isinstance(self.reader, ProcfsReader) else 'psutil'
+
+    def __len__(self):
+        return len(self._entries)
+
+    def sample(self):
+        """Refresh every live process and return the tracked entries"""
+        now = time.monotonic()
+        entries = {}
+
+        for reading in self.reader.read_all():
+            key = (reading.pid, reading.create_time)
+            tracked = self._entries.get(key)
+            if tracked is None:
+                tracked = TrackedProcess(reading, self.reader.username(reading.pid))
+            self._update(tracked, reading, now)
+            entries[key] = tracked
+
+        # Processes that were not seen this pass have exited
+        self._entries = entries
+        return list(entries.values())
+
+    def _update(self, tracked, reading, now):
+        """Apply one reading, deriving rates from the previous sample"""
+        elapsed = (now - tracked.sampled_at) if tracked.sampled_at else 0
+        if elapsed > 0:
+            tracked.cpu_percent = max(0, reading.cpu_total - tracked.cpu_total) / elapsed * 100
+        # The reader may reuse io counters of an idle process; rates span the reads themselves
+        io_at = reading.io_at if reading.io_at is not None else now
+        if reading.io_read is not None and tracked.io_read is not None:
+            io_elapsed = io_at - tracked.io_at
+            if io_elapsed > 0:
+                tracked.io_read_rate = max(0, reading.io_read - tracked.io_read) / io_elapsed
+                tracked.io_write_rate = max(0, reading.io_write - tracked.io_write) / io_elapsed
+            else:
+                tracked.io_read_rate = tracked.io_write_rate = 0.0
+
+        tracked.status = reading.status
+        tracked.num_threads = reading.num_threads
+        tracked.memory_rss = reading.rss
+        tracked.cpu_total = reading.cpu_total
+        tracked.io_read = reading.io_read
+        tracked.io_write = reading.io_write
+        tracked.io_at = io_at
+        tracked.sampled_at = now
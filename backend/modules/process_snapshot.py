@@ -0,0 +1,91 @@
+"""
+Shared Process Snapshot Engine
+Author: M. Nafiurohman
+
+Walks the process table once per tick and hands the same immutable snapshot to
+every collector that needs process data (process list and summary, performance,
+security). Per-process counters live in a persistent ProcessRegistry.
+"""
+
+import os
+import threading
+import time
+from collections import namedtuple
+import psutil
+from modules.process_registry import ProcessRegistry, BACKENDS
+
+SNAPSHOT_MAX_AGE = 1.0  # Seconds a snapshot is reused before walking /proc again
+
+ProcessEntry = namedtuple('ProcessEntry', [
+    'pid', 'name', 'username', 'status', 'num_threads', 'create_time',
+    'cpu_percent', 'memory_percent', 'memory_rss',
+    'io_read_bytes', 'io_write_bytes', 'io_read_rate', 'io_write_rate'
+])
+
+ProcessSnapshot = namedtuple('ProcessSnapshot', [
+    'version', 'timestamp', 'processes', 'status_counts', 'total_threads'
+])
+
+_lock = threading.Lock()
+_current = None
+_version = 0
+# Versions restart with the process; the epoch tells a new run's versions apart
+EPOCH = f"{int(time.time()):x}{os.urandom(4).hex()}"
+_registry = ProcessRegistry()
+_total_memory = psutil.virtual_memory().total
+
+
+def take_process_snapshot():
+    """Walk the process table once and build an immutable snapshot"""
+    global _version
+    entries = []
+    status_counts = {}
+    total_threads = 0
+
+    for tracked in _registry.sample():
+        entry = ProcessEntry(
+            pid=tracked.pid,
+            name=tracked.name or 'Unknown',
+            username=tracked.username,
+            status=tracked.status,
+            num_threads=tracked.num_threads,
+            create_time=tracked.create_time,
+            cpu_percent=tracked.cpu_percent,
+            memory_percent=tracked.memory_rss / _total_memory * 100 if _total_memory else 0,
+            memory_rss=tracked.memory_rss,
+            io_read_bytes=tracked.io_read or 0,
+            io_write_bytes=tracked.io_write or 0,
+            io_read_rate=tracked.io_read_rate,
+            io_write_rate=tracked.io_write_rate
+        )
+        entries.append(entry)
+        status_counts[entry.status] = status_counts.get(entry.status, 0) + 1
+        total_threads += entry.num_threads
+
+    _version += 1
+    return ProcessSnapshot(
+        version=_version,
+        timestamp=time.time(),
+        processes=tuple(entries),
+        status_counts=status_counts,
+        total_threads=total_threads
+    )
+
+
+def get_process_snapshot(max_age=SNAPSHOT_MAX_AGE):
+    """Return the current snapshot, walking /proc only if it is older than max_age"""
+    global _current
+    with _lock:
+        if _current is None or (time.time() - _current.timestamp) >= max_age:
+            _current = take_process_snapshot()
+        return _current
+
+
+def configure_process_backend(backend):
+    """Select the process counter reader ('procfs' or 'psutil')"""
+    global _registry
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown process backend: {backend}")
+    with _lock:
+        _registry = ProcessRegistry(backend)
+    return _registry.backend
@@ -3,68 +3,142 @@ Process Manager Module - Task Manager Style
 Author: M. Nafiurohman
 """
 
+import threading
+from collections import deque, OrderedDict
 import psutil
 from datetime import datetime
+from modules.process_snapshot import get_process_snapshot, EPOCH
+from modules.sockets import get_socket_inventory
+
+# Fields sent by the delta API; 'started' is left to the client to format
+DELTA_FIELDS = ('pid', 'name', 'user', 'cpu', 'memory', 'memory_mb', 'status', 'threads',
+                'connections', 'disk_read', 'disk_write', 'disk_read_rate', 'disk_write_rate',
+                'create_time')
+DELTA_HISTORY = 10  # Process tables retained for computing deltas
+DELTA_CACHE_SIZE = 16
+
+_tables_lock = threading.Lock()
+_tables = deque(maxlen=DELTA_HISTORY)  # (version, {pid: row tuple})
+_delta_cache = OrderedDict()
+
+def _process_row(proc, connection_counts):
+    """Build one delta row as a tuple ordered like DELTA_FIELDS"""
+    return (
+        proc.pid,
+        proc.name,
+        proc.username or 'N/A',
+        round(proc.cpu_percent, 1),
+        round(proc.memory_percent, 1),
+        round(proc.memory_rss / 1024 / 1024, 1),
+        proc.status,
+        proc.num_threads,
+        connection_counts.get(proc.pid, 0),
+        proc.io_read_bytes,
+        proc.io_write_bytes,
+        round(proc.io_read_rate, 1),
+        round(proc.io_write_rate, 1),
+        proc.create_time
+    )
+
+def _ingest_table(process_list):
+    """Retain the table of a published process_list snapshot, once per version
+
+    Tables are rebuilt from the snapshot rather than recorded by the collector,
+    so workers that only follow the board can serve deltas too.
+    """
+    version = process_list.get('version')
+    if version is None:
+        return
+    with _tables_lock:
+        if any(v == version for v, _ in _tables):
+            return
+    rows = {p['pid']: tuple(p[field] for field in DELTA_FIELDS) for p in process_list.get('processes', [])}
+    with _tables_lock:
+        if not any(v == version for v, _ in _tables):
+            _tables.append((version, rows))
 
 def get_process_list():
     """Get detailed process list like Task Manager"""
     processes = []
-    
-    for proc in psutil.process_iter(['pid', 'name', 'username', 'cpu_percent', 'memory_percent', 'memory_info', 'status', 'create_time', 'num_threads']):
-        try:
-            # Get IO counters if available
-            try:
-                io_counters = proc.io_counters()
-            except:
-                io_counters = None
-            
-            # Get network connections count
-            try:
-                connections = len(proc.connections())
-            except:
-                connections = 0
-            
-            process_info = {
-                'pid': proc.info.get('pid', 0),
-                'name': proc.info.get('name', 'Unknown'),
-                'user': proc.info.get('username') or 'N/A',
-                'cpu': round(proc.info.get('cpu_percent') or 0, 1),
-                'memory': round(proc.info.get('memory_percent') or 0, 1),
-                'memory_mb': round((proc.info.get('memory_info').rss / 1024 / 1024) if proc.info.get('memory_info') else 0, 1),
-                'status': proc.info.get('status', 'unknown'),
-                'threads': proc.info.get('num_threads') or 0,
-                'connections': connections,
-                'disk_read': 0,
-                'disk_write': 0,
-                'started': datetime.fromtimestamp(proc.info.get('create_time', 0)).strftime('%Y-%m-%d %H:%M:%S') if proc.info.get('create_time') else 'N/A'
-            }
-            
-            # Add IO if available
-            if io_counters:
-                process_info['disk_read'] = io_counters.read_bytes
-                process_info['disk_write'] = io_counters.write_bytes
-            
-            processes.append(process_info)
-        except (psutil.NoSuchProcess, psutil.AccessDenied, KeyError):
-            continue
-    
+    connection_counts = get_socket_inventory().counts_by_pid
+    snapshot = get_process_snapshot()
+
+    for proc in snapshot.processes:
+        process_info = dict(zip(DELTA_FIELDS, _process_row(proc, connection_counts)))
+        process_info['started'] = datetime.fromtimestamp(proc.create_time).strftime('%Y-%m-%d %H:%M:%S') if proc.create_time else 'N/A'
+        processes.append(process_info)
+
     return {
+        'version': f"{EPOCH}.{snapshot.version}",
         'total': len(processes),
         'processes': processes
     }
 
+def get_process_delta(process_list, since=None):
+    """Get process list changes since a previously returned version.
+
+    process_list is the latest published get_process_list() snapshot. Versions
+    are '<epoch>.<n>' strings, so a `since` from before a restart or sampler
+    takeover never matches. Returns added rows, removed pids and changed
+    fields, or a full table when `since` is missing or no longer retained.
+    """
+    _ingest_table(process_list)
+    with _tables_lock:
+        if not _tables:
+            return {'version': None, 'full': True, 'total': 0, 'processes': []}
+        version, rows = _tables[-1]
+        base = next((table for v, table in _tables if v == since), None)
+
+    if base is None:
+        return {
+            'version': version,
+            'full': True,
+            'total': len(rows),
+            'processes': [dict(zip(DELTA_FIELDS, row)) for row in rows.values()]
+        }
+
+    key = (since, version)
+    with _tables_lock:
+        if key in _delta_cache:
+            _delta_cache.move_to_end(key)
+            return _delta_cache[key]
+
+    added = []
+    changed = []
+    for pid, row in rows.items():
+        old = base.get(pid)
+        if old is None:
+            added.append(dict(zip(DELTA_FIELDS, row)))
+        elif old != row:
+            diff = {field: value for field, value, prev in zip(DELTA_FIELDS, row, old) if value != prev}
+            diff['pid'] = pid
+            changed.append(diff)
+    removed = [pid for pid in base if pid not in rows]
+
+    delta = {
+        'version': version,
+        'full': False,
+        'total': len(rows),
+        'added': added,
+        'removed': removed,
+        'changed': changed
+    }
+    with _tables_lock:
+        _delta_cache[key] = delta
+        while len(_delta_cache) > DELTA_CACHE_SIZE:
+            _delta_cache.popitem(last=False)
+    return delta
+
 def get_process_summary():
     """Get process summary statistics"""
     try:
-        total = len(psutil.pids())
-        running = len([p for p in psutil.process_iter(['status']) if p.info['status'] == 'running'])
-        sleeping = len([p for p in psutil.process_iter(['status']) if p.info['status'] == 'sleeping'])
+        snapshot = get_process_snapshot()
         
         return {
-            'total': total,
-            'running': running,
-            'sleeping': sleeping,
-            'threads': sum([p.num_threads() for p in psutil.process_iter() if hasattr(p, 'num_threads')])
+            'total': len(snapshot.processes),
+            'running': snapshot.status_counts.get(psutil.STATUS_RUNNING, 0),
+            'sleeping': snapshot.status_counts.get(psutil.STATUS_SLEEPING, 0),
+            'threads': snapshot.total_threads
         }
     except:
         return {'total': 0, 'running': 0, 'sleeping': 0, 'threads': 0}
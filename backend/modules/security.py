@@ -6,6 +6,22 @@ Author: M. Nafiurohman
 import psutil
 from datetime import datetime
 from utils.helpers import run_cmd, IS_WINDOWS
+from modules.process_snapshot import get_process_snapshot
+from modules.sockets import get_socket_inventory
+from modules.auth_log import AuthLogTailer, DEFAULT_WINDOW_HOURS
+
+BRUTE_FORCE_ATTEMPTS = 10  # Failures from one address within the window that cost score
+
+_auth_log = None
+_auth_log_path = None
+_auth_log_window = DEFAULT_WINDOW_HOURS
+
+def configure_auth_log(path=None, window_hours=DEFAULT_WINDOW_HOURS):
+    """Select the auth log to follow (auto-detected when None) and the counting window"""
+    global _auth_log, _auth_log_path, _auth_log_window
+    _auth_log = None
+    _auth_log_path = path
+    _auth_log_window = window_hours
 
 def get_security_info():
     """Enhanced security monitoring"""
@@ -28,7 +44,8 @@ def get_security_info():
             score -= 20
         if len(security_data['open_ports']) > 10:
             score -= 10
-        if len(security_data['failed_logins']) > 5:
+        top_ips = security_data['failed_logins'].get('top_ips', [])
+        if top_ips and top_ips[0]['count'] >= BRUTE_FORCE_ATTEMPTS:
             score -= 10
         
         security_data['security_score'] = max(0, score)
@@ -100,7 +117,8 @@ def get_open_ports_detailed():
     """Get detailed open ports with protocol and risk level"""
     ports = []
     try:
-        connections = psutil.net_connections(kind='inet')
+        connections = get_socket_inventory().sockets
+        process_names = {proc.pid: proc.name for proc in get_process_snapshot().processes}
         
         # Dangerous ports list
         dangerous_ports = {
@@ -131,13 +149,7 @@ def get_open_ports_detailed():
                 service = dangerous_ports.get(port, get_service_name(port))
                 
                 # Get process name
-                process_name = 'Unknown'
-                if conn.pid:
-                    try:
-                        proc = psutil.Process(conn.pid)
-                        process_name = proc.name()
-                    except:
-                        pass
+                process_name = process_names.get(conn.pid, 'Unknown')
                 
                 ports.append({
                     'port': port,
@@ -162,14 +174,17 @@ def get_service_name(port):
     return common_ports.get(port, 'Unknown')
 
 def get_failed_logins():
-    """Get failed login attempts"""
+    """Get failed login attempts: totals, top offending IPs/users and recent events"""
+    global _auth_log
     if IS_WINDOWS:
         cmd = "wevtutil qe Security /c:20 /rd:true /f:text /q:\"*[System[(EventID=4625)]]\""
         result = run_cmd(cmd)
-        return result.split('\n')[:20] if result else []
-    else:
-        result = run_cmd("grep 'Failed password' /var/log/auth.log 2>/dev/null | tail -20")
-        return result.split('\n') if result else []
+        lines = result.split('\n')[:20] if result else []
+        return {'source': 'Security event log', 'total': len(lines), 'top_ips': [], 'top_users': [],
+                'recent': lines}
+    if _auth_log is None:
+        _auth_log = AuthLogTailer(_auth_log_path, _auth_log_window)
+    return _auth_log.summary()
 
 def get_logged_users():
     """Get currently logged users"""
@@ -188,15 +203,13 @@ def get_suspicious_processes():
     suspicious = []
     suspicious_names = ['nc', 'netcat', 'nmap', 'mimikatz', 'psexec']
     
-    for proc in psutil.process_iter(['pid', 'name', 'username']):
-        try:
-            if any(sus in proc.info['name'].lower() for sus in suspicious_names):
-                suspicious.append({
-                    'pid': proc.info['pid'],
-                    'name': proc.info['name'],
-                    'user': proc.info['username']
-                })
-        except:
-            continue
+    for proc in get_process_snapshot().processes:
+        name = proc.name.lower()
+        if any(sus in name for sus in suspicious_names):
+            suspicious.append({
+                'pid': proc.pid,
+                'name': proc.name,
+                'user': proc.username
+            })
     
     return suspicious
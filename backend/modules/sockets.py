@@ -0,0 +1,177 @@
+"""
+Shared Socket Inventory
+Author: M. Nafiurohman
+
+Parses /proc/net/{tcp,tcp6,udp,udp6} once per tick and maps socket inodes to
+pids with a single sweep of /proc/<pid>/fd. Open ports, the connection list and
+per-process connection counts all read from the same inventory, and the
+netlink connection query reuses its inode index.
+"""
+
+import os
+import socket
+import threading
+import time
+from collections import namedtuple
+import psutil
+
+INVENTORY_MAX_AGE = 1.0  # Seconds an inventory is reused before rescanning
+
+Addr = namedtuple('Addr', ['ip', 'port'])
+
+SocketEntry = namedtuple('SocketEntry', [
+    'family', 'type', 'laddr', 'raddr', 'status', 'inode', 'pid'
+])
+
+SocketInventory = namedtuple('SocketInventory', [
+    'timestamp', 'sockets', 'counts_by_pid'
+])
+
+# /proc/net/tcp 'st' column, named like psutil.CONN_*
+TCP_STATES = {
+    '01': 'ESTABLISHED', '02': 'SYN_SENT', '03': 'SYN_RECV', '04': 'FIN_WAIT1',
+    '05': 'FIN_WAIT2', '06': 'TIME_WAIT', '07': 'CLOSE', '08': 'CLOSE_WAIT',
+    '09': 'LAST_ACK', '0A': 'LISTEN', '0B': 'CLOSING', '0C': 'SYN_RECV'
+}
+
+PROC_NET_FILES = [
+    ('tcp', socket.AF_INET, socket.SOCK_STREAM),
+    ('tcp6', socket.AF_INET6, socket.SOCK_STREAM),
+    ('udp', socket.AF_INET, socket.SOCK_DGRAM),
+    ('udp6', socket.AF_INET6, socket.SOCK_DGRAM),
+]
+
+_lock = threading.Lock()
+_current = None
+_inode_lock = threading.Lock()
+_inode_index = (0.0, {})
+
+
+def decode_address(value, family):
+    """Decode a '0100007F:0016' style /proc/net address"""
+    host, port = value.split(':')
+    raw = bytes.fromhex(host)
+    if family == socket.AF_INET:
+        raw = raw[::-1]
+    else:
+        # IPv6 is stored as four host-order 32-bit words
+        raw = b''.join(raw[i:i + 4][::-1] for i in range(0, 16, 4))
+    return Addr(socket.inet_ntop(family, raw), int(port, 16))
+
+
+def parse_proc_net(path, family, sock_type):
+    """Parse one /proc/net table into (laddr, raddr, status, inode) tuples"""
+    rows = []
+    with open(path) as f:
+        next(f, None)  # header
+        for line in f:
+            parts = line.split()
+            if len(parts) < 10:
+                continue
+            laddr = decode_address(parts[1], family)
+            raddr = decode_address(parts[2], family)
+            if raddr.port == 0:
+                raddr = None
+            status = TCP_STATES.get(parts[3], 'NONE') if sock_type == socket.SOCK_STREAM else 'NONE'
+            rows.append((laddr, raddr, status, int(parts[9])))
+    return rows
+
+
+def build_inode_index(proc_root='/proc'):
+    """Map socket inode -> pid with one pass over every process's fd table"""
+    index = {}
+    for name in os.listdir(proc_root):
+        if not name.isdigit():
+            continue
+        fd_dir = f"{proc_root}/{name}/fd"
+        try:
+            fds = os.listdir(fd_dir)
+        except OSError:
+            continue
+        pid = int(name)
+        for fd in fds:
+            try:
+                target = os.readlink(f"{fd_dir}/{fd}")
+            except OSError:
+                continue
+            if target.startswith('socket:['):
+                index[int(target[8:-1])] = pid
+    return index
+
+
+def pid_socket_inodes(pid, proc_root='/proc'):
+    """Socket inodes held open by one process"""
+    inodes = set()
+    fd_dir = f"{proc_root}/{pid}/fd"
+    for fd in os.listdir(fd_dir):
+        try:
+            target = os.readlink(f"{fd_dir}/{fd}")
+        except OSError:
+            continue
+        if target.startswith('socket:['):
+            inodes.add(int(target[8:-1]))
+    return inodes
+
+
+def get_inode_index(max_age=INVENTORY_MAX_AGE):
+    """Shared inode -> pid index, rebuilt only if older than max_age"""
+    global _inode_index
+    with _inode_lock:
+        built_at, index = _inode_index
+        if time.time() - built_at >= max_age:
+            index = build_inode_index()
+            _inode_index = (time.time(), index)
+        return index
+
+
+def _scan_procfs(proc_root='/proc'):
+    tables = []
+    for name, family, sock_type in PROC_NET_FILES:
+        try:
+            tables.append((family, sock_type, parse_proc_net(f"{proc_root}/net/{name}", family, sock_type)))
+        except FileNotFoundError:
+            # tcp6/udp6 are missing when IPv6 is disabled
+            continue
+    if not tables:
+        raise OSError('no /proc/net tables')
+
+    # The cached index is shared with query_connections, so a tick sweeps /proc/*/fd once
+    inodes = get_inode_index() if proc_root == '/proc' else build_inode_index(proc_root)
+    sockets = []
+    for family, sock_type, rows in tables:
+        for laddr, raddr, status, inode in rows:
+            sockets.append(SocketEntry(family, sock_type, laddr, raddr, status, inode, inodes.get(inode)))
+    return sockets
+
+
+def _scan_psutil():
+    sockets = []
+    for conn in psutil.net_connections(kind='inet'):
+        laddr = Addr(conn.laddr.ip, conn.laddr.port) if conn.laddr else None
+        raddr = Addr(conn.raddr.ip, conn.raddr.port) if conn.raddr else None
+        sockets.append(SocketEntry(conn.family, conn.type, laddr, raddr, conn.status, None, conn.pid))
+    return sockets
+
+
+def take_socket_inventory(proc_root='/proc'):
+    """Scan every inet socket once and attribute it to its owning pid"""
+    try:
+        sockets = _scan_procfs(proc_root)
+    except OSError:
+        sockets = _scan_psutil()
+
+    counts = {}
+    for entry in sockets:
+        if entry.pid:
+            counts[entry.pid] = counts.get(entry.pid, 0) + 1
+
+    return SocketInventory(timestamp=time.time(), sockets=tuple(sockets), counts_by_pid=counts)
+
+
+def get_socket_inventory(max_age=INVENTORY_MAX_AGE):
+    """Return the current inventory, rescanning only if it is older than max_age"""
+    global _current
+    with _lock:
+        if _current is None or (time.time() - _current.timestamp) >= max_age:
+            _current = take_socket_inventory()
+        return _current
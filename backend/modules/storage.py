@@ -1,102 +1,151 @@
 import os
-import psutil
-from pathlib import Path
+from modules.storage_scan import DirectoryIndex, BackgroundSizer, largest_files, DEFAULT_INDEX_DIR
+from modules.storage_jobs import ScanJobManager, DEFAULT_JOB_WORKERS, DEFAULT_RESULT_TTL
+from modules.storage_mounts import MountTable, MountProber, DEFAULT_PROBE_DEADLINE
 
-def get_directory_tree(path='/', max_depth=2, current_depth=0):
-    """Get directory tree with file sizes"""
+TREE_PAGE_SIZE = 100
+TREE_PAGE_MAX = 1000
+
+_index = DirectoryIndex()
+_sizer = BackgroundSizer(_index)
+_jobs = None
+_job_workers = DEFAULT_JOB_WORKERS
+_job_ttl = DEFAULT_RESULT_TTL
+_mount_table = MountTable()
+_prober = MountProber()
+
+def get_directory_tree(path='/', cursor=None, limit=TREE_PAGE_SIZE):
+    """One level of a du-style tree: children with aggregated sizes, paginated"""
     try:
-        if current_depth >= max_depth:
-            return None
-        
-        path_obj = Path(path)
-        if not path_obj.exists() or not path_obj.is_dir():
-            return None
-        
-        result = {
-            'name': path_obj.name or path,
-            'path': str(path_obj),
-            'type': 'directory',
-            'children': []
-        }
-        
+        path = os.path.realpath(path)
+        if not os.path.isdir(path):
+            return {'error': f"not a directory: {path}"}
+        _index.load()
+
+        children = []
+        unsized = False
         try:
-            items = sorted(path_obj.iterdir(), key=lambda x: (not x.is_dir(), x.name.lower()))
-            for item in items[:50]:  # Limit to 50 items
-                if item.is_dir():
-                    child = get_directory_tree(str(item), max_depth, current_depth + 1)
-                    if child:
-                        result['children'].append(child)
-                else:
+            with os.scandir(path) as it:
+                for entry in it:
                     try:
-                        size = item.stat().st_size
-                        result['children'].append({
-                            'name': item.name,
-                            'path': str(item),
-                            'type': 'file',
-                            'size': size,
-                            'size_human': format_bytes(size)
-                        })
-                    except:
+                        st = entry.stat(follow_symlinks=False)
+                        if entry.is_dir(follow_symlinks=False):
+                            total = _index.totals.get(entry.path)
+                            record = _index.records.get(entry.path)
+                            # Children a finished scan could not size (other filesystems,
+                            # unreadable) stay unsized rather than being queued again
+                            if total is None and not _sizer.covered(entry.path, st.st_ctime):
+                                unsized = True
+                            children.append({
+                                'name': entry.name,
+                                'path': entry.path,
+                                'type': 'directory',
+                                'size': total.bytes if total else None,
+                                'size_human': format_bytes(total.bytes) if total else None,
+                                'files': total.files if total else None,
+                                'stale': record is not None and record.mtime_ns != st.st_mtime_ns,
+                                'scanned_at': total.scanned_at if total else None
+                            })
+                        else:
+                            children.append({
+                                'name': entry.name,
+                                'path': entry.path,
+                                'type': 'file' if entry.is_file(follow_symlinks=False) else 'other',
+                                'size': st.st_size,
+                                'size_human': format_bytes(st.st_size)
+                            })
+                    except OSError:
                         pass
         except PermissionError:
-            result['error'] = 'Permission denied'
-        
-        return result
-    except:
-        return None
+            return {'path': path, 'error': 'Permission denied'}
+
+        # Missing or outdated subtree totals are filled in by a background scan
+        if unsized or any(c.get('stale') for c in children):
+            _sizer.request(path)
+
+        children.sort(key=lambda c: (c['size'] is None, -(c['size'] or 0), c['name']))
+        offset = int(cursor or 0)
+        limit = max(1, min(int(limit), TREE_PAGE_MAX))
+        page = children[offset:offset + limit]
+        total = _index.totals.get(path)
+        return {
+            'name': os.path.basename(path) or path,
+            'path': path,
+            'type': 'directory',
+            'size': total.bytes if total else None,
+            'size_human': format_bytes(total.bytes) if total else None,
+            'files': total.files if total else None,
+            'scanning': _sizer.pending(path),
+            'children': page,
+            'count': len(children),
+            'next_cursor': str(offset + limit) if offset + limit < len(children) else None
+        }
+    except Exception as e:
+        return {'error': str(e)}
+
+def configure_storage(index_dir=DEFAULT_INDEX_DIR, job_workers=DEFAULT_JOB_WORKERS, job_ttl=DEFAULT_RESULT_TTL):
+    """Select the size index location and the scan job pool size and result TTL"""
+    global _index, _sizer, _jobs, _job_workers, _job_ttl
+    _index = DirectoryIndex(index_dir)
+    _sizer = BackgroundSizer(_index)
+    _jobs = None
+    _job_workers = job_workers
+    _job_ttl = job_ttl
+
+def _file_entry(size, filepath):
+    return {
+        'path': filepath,
+        'name': os.path.basename(filepath),
+        'size': size,
+        'size_human': format_bytes(size)
+    }
 
 def find_large_files(path='/', min_size_mb=100, max_results=50):
-    """Find large files in directory"""
-    large_files = []
-    min_size = min_size_mb * 1024 * 1024
-    
+    """Find the largest files in directory (synchronously; see get_scan_jobs)"""
     try:
-        for root, dirs, files in os.walk(path):
-            # Skip system directories
-            dirs[:] = [d for d in dirs if d not in ['.git', 'node_modules', '__pycache__', '.cache']]
-            
-            for file in files:
-                try:
-                    filepath = os.path.join(root, file)
-                    size = os.path.getsize(filepath)
-                    if size >= min_size:
-                        large_files.append({
-                            'path': filepath,
-                            'name': file,
-                            'size': size,
-                            'size_human': format_bytes(size)
-                        })
-                except:
-                    pass
-            
-            if len(large_files) >= max_results:
-                break
-        
-        return sorted(large_files, key=lambda x: x['size'], reverse=True)[:max_results]
+        top, _ = largest_files(path, min_size_mb * 1024 * 1024, max_results, _index)
+        return [_file_entry(size, filepath) for size, filepath in top]
     except:
         return []
 
+def get_scan_jobs():
+    """Manager for background storage scans; job state is shared by all workers"""
+    global _jobs
+    if _jobs is None:
+        _jobs = ScanJobManager(_index, _file_entry, os.path.join(_index.index_dir, "jobs"),
+                               _job_workers, _job_ttl)
+    return _jobs
+
+def configure_mount_probes(deadline=DEFAULT_PROBE_DEADLINE):
+    """Set how long a storage collection waits for any one mount's statvfs"""
+    global _prober
+    _prober = MountProber(deadline)
+
 def get_storage_summary():
     """Get storage summary with filesystem details"""
     partitions = []
-    
-    for partition in psutil.disk_partitions(all=False):
-        try:
-            usage = psutil.disk_usage(partition.mountpoint)
-            partitions.append({
-                'device': partition.device,
-                'mountpoint': partition.mountpoint,
-                'fstype': partition.fstype,
-                'total': usage.total,
-                'used': usage.used,
-                'free': usage.free,
-                'percent': usage.percent,
-                'total_human': format_bytes(usage.total),
-                'used_human': format_bytes(usage.used),
-                'free_human': format_bytes(usage.free)
-            })
-        except:
-            pass
+    mounts = _mount_table.mounts()
+    probes = _prober.probe([m.mountpoint for m in mounts])
+
+    for partition in mounts:
+        probe = probes[partition.mountpoint]
+        usage = probe['usage']
+        if usage is None and probe['health'] == 'error':
+            continue  # never readable, e.g. permission denied
+        partitions.append({
+            'device': partition.device,
+            'mountpoint': partition.mountpoint,
+            'fstype': partition.fstype,
+            'total': usage.total if usage else None,
+            'used': usage.used if usage else None,
+            'free': usage.free if usage else None,
+            'percent': usage.percent if usage else None,
+            'total_human': format_bytes(usage.total) if usage else 'N/A',
+            'used_human': format_bytes(usage.used) if usage else 'N/A',
+            'free_human': format_bytes(usage.free) if usage else 'N/A',
+            'health': probe['health'],
+            'age': probe['age']
+        })
     
     return partitions
 
@@ -0,0 +1,298 @@
+"""
+Storage Scan Jobs
+Author: M. Nafiurohman
+
+Runs long storage scans off the request path. Submitting a scan returns a job
+id at once. Identical requests share one job while it is queued or running,
+and completed results are served from cache until they expire. Jobs run on a
+small bounded pool whose threads drop to the idle I/O scheduling class, report
+progress and partial top-K results while running, and can be cancelled.
+
+Job state lives in one JSON file per job under a directory every gunicorn
+worker shares, so any worker can report or cancel a job and deduplication and
+MAX_QUEUED hold across workers. Only the worker that runs a job writes its
+progress; submissions and state changes take an flock on jobs.lock, another
+worker cancels a running job by leaving a marker file its owner polls, and a
+job whose owner has exited is marked failed.
+"""
+
+import fcntl
+import json
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from modules.storage_scan import scan_tree, scan_floor, in_skipped_dir, set_idle_io_priority, TopK, ScanCancelled
+
+log = logging.getLogger(__name__)
+
+DEFAULT_JOB_WORKERS = 2
+DEFAULT_RESULT_TTL = 600   # Seconds finished jobs (and their results) are kept
+MAX_QUEUED = 16            # Queued + running jobs before new submissions are refused
+PARTIAL_EVERY = 0.5        # Seconds between partial-result (and progress) snapshots
+
+ACTIVE_STATES = ('queued', 'running')
+JOB_ID_RE = re.compile(r'scan-[0-9a-f]{12}')
+
+
+class JobLimitReached(Exception):
+    """Too many scans are queued or running"""
+
+
+class ScanJob:
+    """State of one submitted scan"""
+
+    RECORD_FIELDS = ('id', 'kind', 'params', 'state', 'error', 'result', 'partial', 'progress',
+                     'created_at', 'started_at', 'finished_at', 'owner')
+
+    def __init__(self, job_id, kind, params):
+        self.id = job_id
+        self.kind = kind
+        self.params = params
+        self.state = 'queued'
+        self.error = None
+        self.result = None
+        self.partial = None
+        self.progress = {'directories': 0, 'files': 0, 'bytes': 0}
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.owner = os.getpid()
+        self.cancel = threading.Event()
+
+    @classmethod
+    def from_record(cls, record):
+        job = cls(record['id'], record['kind'], record['params'])
+        for field in cls.RECORD_FIELDS:
+            setattr(job, field, record.get(field))
+        return job
+
+    def record(self):
+        return {field: getattr(self, field) for field in self.RECORD_FIELDS}
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'params': self.params,
+            'state': self.state,
+            'progress': dict(self.progress),
+            'result': self.result if self.state == 'done' else self.partial,
+            'partial': self.state != 'done',
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at
+        }
+
+
+class JobStore:
+    """One JSON file per job in a directory shared by every worker"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def _file(self, job_id, suffix='.json'):
+        return os.path.join(self.path, job_id + suffix)
+
+    @contextmanager
+    def locked(self):
+        """Exclusive across processes and threads: each caller opens its own descriptor"""
+        os.makedirs(self.path, exist_ok=True)
+        fd = os.open(os.path.join(self.path, "jobs.lock"), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)
+
+    def save(self, job):
+        tmp = self._file(job.id, f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp, 'w') as f:
+            json.dump(job.record(), f, separators=(',', ':'))
+        os.replace(tmp, self._file(job.id))
+
+    def load(self, job_id):
+        try:
+            with open(self._file(job_id)) as f:
+                return ScanJob.from_record(json.load(f))
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def all(self):
+        try:
+            names = os.listdir(self.path)
+        except OSError:
+            return []
+        jobs = (self.load(name[:-5]) for name in names if JOB_ID_RE.fullmatch(name[:-5]) and name.endswith('.json'))
+        return sorted((job for job in jobs if job is not None), key=lambda job: job.created_at)
+
+    def remove(self, job_id):
+        for suffix in ('.json', '.cancel'):
+            try:
+                os.unlink(self._file(job_id, suffix))
+            except FileNotFoundError:
+                pass
+
+    def request_cancel(self, job_id):
+        with open(self._file(job_id, '.cancel'), 'w'):
+            pass
+
+    def cancel_requested(self, job_id):
+        return os.path.exists(self._file(job_id, '.cancel'))
+
+
+class ScanJobManager:
+    """Deduplicated, bounded, cancellable storage scans with a result TTL"""
+
+    KINDS = ('large_files',)
+
+    def __init__(self, index, format_entry, state_dir, workers=DEFAULT_JOB_WORKERS,
+                 result_ttl=DEFAULT_RESULT_TTL):
+        self.index = index
+        self.format_entry = format_entry   # (size, path) -> response dict
+        self.result_ttl = result_ttl
+        self.store = JobStore(state_dir)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="storage-job",
+                                        initializer=set_idle_io_priority)
+        self._local = {}   # job id -> ScanJob queued or running in this process
+
+    def _owner_alive(self, job):
+        if job.owner == os.getpid():
+            return job.id in self._local
+        try:
+            os.kill(job.owner, 0)
+        except ProcessLookupError:
+            return False
+        except OSError:
+            pass  # exists, but belongs to another user
+        return True
+
+    def _live_jobs(self):
+        """All jobs, with expired ones removed and orphaned ones failed; call under the store lock"""
+        now = time.time()
+        jobs = []
+        for job in self.store.all():
+            if job.state in ACTIVE_STATES and not self._owner_alive(job):
+                self._finish(job, 'failed', "worker exited before the scan finished")
+                self.store.save(job)
+            if job.finished_at is not None and now - job.finished_at > self.result_ttl:
+                self.store.remove(job.id)
+                continue
+            jobs.append(job)
+        return jobs
+
+    def submit(self, kind, params):
+        """Return the job for these parameters, starting one only if none is live or cached"""
+        if kind not in self.KINDS:
+            raise ValueError(f"unknown scan kind: {kind}")
+        if int(params.get('max_results', 50)) <= 0:
+            raise ValueError("max_results must be positive")
+        if int(params.get('min_size_mb', 100)) < 0:
+            raise ValueError("min_size_mb must not be negative")
+        params = dict(params, path=os.path.realpath(params.get('path', '/')))
+        with self.store.locked():
+            jobs = self._live_jobs()
+            for existing in jobs:
+                if existing.kind == kind and existing.params == params and \
+                        existing.state in ACTIVE_STATES + ('done',):
+                    return existing
+            if sum(job.state in ACTIVE_STATES for job in jobs) >= MAX_QUEUED:
+                raise JobLimitReached(f"{MAX_QUEUED} storage scans already queued or running")
+            job = ScanJob(f"scan-{os.urandom(6).hex()}", kind, params)
+            self._local[job.id] = job
+            self.store.save(job)
+        self._pool.submit(self._run, job)
+        return job
+
+    def get(self, job_id):
+        if not JOB_ID_RE.fullmatch(job_id):
+            return None
+        with self.store.locked():
+            return next((job for job in self._live_jobs() if job.id == job_id), None)
+
+    def list(self):
+        with self.store.locked():
+            return self._live_jobs()
+
+    def cancel(self, job_id):
+        if not JOB_ID_RE.fullmatch(job_id):
+            return None
+        with self.store.locked():
+            job = next((job for job in self._live_jobs() if job.id == job_id), None)
+            if job is None or job.state not in ACTIVE_STATES:
+                return job
+            self.store.request_cancel(job.id)
+            local = self._local.get(job.id)
+            if local is not None:
+                local.cancel.set()
+            if job.state == 'queued':
+                self._finish(job, 'cancelled')
+                self.store.save(job)
+        return job
+
+    @staticmethod
+    def _finish(job, state, error=None):
+        job.state = state
+        job.error = error
+        job.finished_at = time.time()
+
+    def _run(self, job):
+        try:
+            with self.store.locked():
+                current = self.store.load(job.id)
+                if current is None or current.state != 'queued':
+                    return
+                job.state = 'running'
+                job.started_at = time.time()
+                self.store.save(job)
+            try:
+                result = self._large_files(job)
+            except ScanCancelled:
+                self._finish(job, 'cancelled')
+            except Exception as e:
+                log.warning("storage job %s failed: %s", job.id, e)
+                self._finish(job, 'failed', str(e))
+            else:
+                job.result = result
+                job.partial = None
+                self._finish(job, 'done')
+            with self.store.locked():
+                self.store.save(job)
+        except OSError as e:
+            log.warning("storage job %s state not saved: %s", job.id, e)
+        finally:
+            self._local.pop(job.id, None)
+
+    def _large_files(self, job):
+        params = job.params
+        min_size = int(params.get('min_size_mb', 100)) * 1024 * 1024
+        top = TopK(int(params.get('max_results', 50)))
+        last_snapshot = [0.0]
+
+        def collect(path, record):
+            progress = job.progress
+            progress['directories'] += 1
+            progress['files'] += record.files
+            progress['bytes'] += record.bytes
+            if not in_skipped_dir(path, params['path']):
+                for name, size in record.large:
+                    if size >= min_size:
+                        top.push(size, os.path.join(path, name))
+            now = time.monotonic()
+            if now - last_snapshot[0] >= PARTIAL_EVERY:
+                last_snapshot[0] = now
+                job.partial = [self.format_entry(size, p) for size, p in top.largest()]
+                if self.store.cancel_requested(job.id):
+                    job.cancel.set()
+                try:
+                    self.store.save(job)
+                except OSError as e:
+                    log.warning("storage job %s progress not saved: %s", job.id, e)
+
+        scan_tree(params['path'], self.index, scan_floor(min_size), collect,
+                  cancel=job.cancel, thread_init=set_idle_io_priority)
+        return [self.format_entry(size, p) for size, p in top.largest()]
@@ -0,0 +1,212 @@
+"""
+Mount Table and Isolated Disk Usage Probes
+Author: M. Nafiurohman
+
+statvfs() on an unresponsive NFS/CIFS mount blocks the calling thread with no
+way to interrupt it. Each probe therefore runs in its own sacrificial daemon
+thread and the caller waits only up to a deadline. A mount is:
+
+    ok    - the probe answered within SLOW_AFTER
+    slow  - it answered, but late
+    hung  - it has not answered by the deadline; its value is the last known good
+
+A mount whose previous probe is still stuck gets no new thread, and its retries
+back off exponentially once that probe returns. The mount list is parsed from
+/proc/self/mountinfo and re-parsed only when poll() reports a table change.
+"""
+
+import select
+import threading
+import time
+from collections import namedtuple
+import psutil
+
+DEFAULT_PROBE_DEADLINE = 1.0
+SLOW_AFTER = 0.25          # Seconds after which an answered probe counts as slow
+BACKOFF_BASE = 5.0
+BACKOFF_MAX = 300.0
+MAX_STUCK_PROBES = 16      # Leaked threads tolerated before new probes are refused
+
+NETWORK_FS = frozenset(['nfs', 'nfs4', 'cifs', 'smb3', 'smbfs', 'ceph', 'glusterfs', 'fuse.sshfs',
+                        'fuse.glusterfs', 'fuse.cephfs', '9p', 'afs'])
+
+Mount = namedtuple('Mount', ['device', 'mountpoint', 'fstype', 'opts'])
+
+
+def _unescape(field):
+    """mountinfo escapes space, tab, newline and backslash as octal"""
+    return (field.replace('\\040', ' ').replace('\\011', '\t')
+            .replace('\\012', '\n').replace('\\134', '\\'))
+
+
+def _physical_fstypes():
+    fstypes = set()
+    try:
+        with open('/proc/filesystems') as f:
+            for line in f:
+                if not line.startswith('nodev'):
+                    fstypes.add(line.strip())
+    except OSError:
+        pass
+    fstypes.add('zfs')
+    return fstypes
+
+
+def parse_mountinfo(text, fstypes):
+    """Disk-backed and network mounts, like psutil.disk_partitions() plus NFS/CIFS"""
+    mounts = []
+    for line in text.splitlines():
+        left, sep, right = line.partition(' - ')
+        if not sep:
+            continue
+        fields = left.split()
+        fstype, source, super_opts = (right.split(' ', 2) + ['', ''])[:3]
+        if fstype not in fstypes and fstype not in NETWORK_FS:
+            continue
+        mounts.append(Mount(_unescape(source), _unescape(fields[4]), fstype, fields[5]))
+    return mounts
+
+
+class MountTable:
+    """Cached mount list, re-read when /proc/self/mountinfo signals a change"""
+
+    def __init__(self, path='/proc/self/mountinfo'):
+        self.path = path
+        self._mounts = None
+        self._fstypes = None
+        self._file = None
+        self._poller = None
+        self._lock = threading.Lock()
+
+    def _changed(self):
+        if self._file is None:
+            try:
+                self._file = open(self.path)
+            except OSError:
+                return True
+            self._poller = select.poll()
+            # The kernel flags mount table changes as POLLERR | POLLPRI
+            self._poller.register(self._file, select.POLLERR | select.POLLPRI)
+            return True
+        return bool(self._poller.poll(0))
+
+    def mounts(self):
+        with self._lock:
+            changed = self._changed()
+            if self._file is None:
+                # No mountinfo (non-Linux): psutil decides, uncached
+                return [Mount(p.device, p.mountpoint, p.fstype, p.opts)
+                        for p in psutil.disk_partitions(all=False)]
+            if self._mounts is not None and not changed:
+                return self._mounts
+            if self._fstypes is None:
+                self._fstypes = _physical_fstypes()
+            self._file.seek(0)
+            self._mounts = parse_mountinfo(self._file.read(), self._fstypes)
+            return self._mounts
+
+
+class _MountState:
+    __slots__ = ('health', 'usage', 'measured_at', 'probe', 'failures', 'retry_at', 'error')
+
+    def __init__(self):
+        self.health = None
+        self.usage = None        # last known good psutil usage
+        self.measured_at = None
+        self.probe = None        # (thread, started, done event, result holder) while in flight
+        self.failures = 0
+        self.retry_at = 0.0
+        self.error = None
+
+
+class MountProber:
+    """disk_usage per mount with deadlines, health states and last-known-good values"""
+
+    def __init__(self, deadline=DEFAULT_PROBE_DEADLINE, usage=psutil.disk_usage):
+        self.deadline = deadline
+        self.usage = usage
+        self._states = {}
+        self._lock = threading.Lock()
+
+    def _stuck(self):
+        return sum(1 for s in self._states.values() if s.probe and not s.probe[2].is_set())
+
+    def _start(self, mountpoint, state, now):
+        done = threading.Event()
+        holder = {}
+
+        def run():
+            try:
+                holder['usage'] = self.usage(mountpoint)
+            except Exception as e:
+                holder['error'] = str(e)
+            holder['finished'] = time.monotonic()
+            done.set()
+
+        thread = threading.Thread(target=run, name=f"disk-probe {mountpoint}", daemon=True)
+        state.probe = (thread, now, done, holder)
+        thread.start()
+        return done
+
+    def _settle(self, state, now):
+        """Fold a finished probe into the state; True if it finished"""
+        _, started, done, holder = state.probe
+        if not done.is_set():
+            return False
+        elapsed = holder['finished'] - started
+        state.probe = None
+        if 'usage' in holder:
+            state.usage = holder['usage']
+            state.measured_at = time.time()
+            state.error = None
+            late = elapsed > self.deadline
+            state.health = 'slow' if late or elapsed > SLOW_AFTER else 'ok'
+            if late:
+                # It came back, but only after being declared hung: keep backing off
+                state.retry_at = now + min(BACKOFF_MAX, BACKOFF_BASE * 2 ** state.failures)
+                state.failures += 1
+            else:
+                state.failures = 0
+                state.retry_at = 0.0
+        else:
+            state.error = holder['error']
+            state.health = 'error'
+        return True
+
+    def probe(self, mountpoints):
+        """Probe all mountpoints concurrently; never waits longer than the deadline"""
+        now = time.monotonic()
+        waiting = []
+        with self._lock:
+            for mountpoint in mountpoints:
+                state = self._states.setdefault(mountpoint, _MountState())
+                if state.probe is not None and not self._settle(state, now):
+                    continue  # still stuck in the kernel; never stack another thread
+                if now < state.retry_at or self._stuck() >= MAX_STUCK_PROBES:
+                    continue
+                waiting.append(self._start(mountpoint, state, now))
+
+        end = now + self.deadline
+        for done in waiting:
+            done.wait(max(0.0, end - time.monotonic()))
+
+        now = time.monotonic()
+        results = {}
+        with self._lock:
+            for mountpoint in mountpoints:
+                state = self._states[mountpoint]
+                if state.probe is not None and not self._settle(state, now):
+                    if now - state.probe[1] >= self.deadline and state.health != 'hung':
+                        state.health = 'hung'
+                        state.failures += 1
+                        state.retry_at = now + min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (state.failures - 1))
+                results[mountpoint] = {
+                    'health': state.health or 'pending',
+                    'usage': state.usage,
+                    'age': round(time.time() - state.measured_at, 1) if state.measured_at else None,
+                    'error': state.error
+                }
+            for mountpoint in set(self._states) - set(mountpoints):
+                if self._states[mountpoint].probe is None:
+                    del self._states[mountpoint]  # unmounted
+        return results
@@ -0,0 +1,378 @@
+"""
+Parallel Storage Scanner
+Author: M. Nafiurohman
+
+Walks a directory tree with os.scandir across a thread pool (one task per
+directory, reusing each DirEntry's cached stat) and keeps a per-directory
+index of subdirectories, direct byte/file totals and files above a size floor.
+
+The index is keyed by directory mtime and persisted between runs. A directory
+whose mtime is unchanged is not listed again: its cached record supplies its
+subdirectories and large files, so a rescan costs one stat per directory
+instead of a readdir plus a stat per file. Directory mtimes only move when
+entries are added, removed or renamed, so indexed large files are re-stat'ed
+to pick up in-place growth; files that grow past the floor without any
+directory change are found on the next change to their directory.
+
+Aggregated subtree totals (bytes, files, directories) are derived from the
+records after every scan and on load, and feed the du-style tree view.
+"""
+
+import ctypes
+import heapq
+import json
+import logging
+import os
+import platform
+import queue
+import stat
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+log = logging.getLogger(__name__)
+
+DEFAULT_INDEX_DIR = "/opt/bmonitor/data/storage-index"
+INDEX_VERSION = 2           # 2: skip-list directories are indexed too
+INDEX_FLOOR = 1024 * 1024   # Files at least this big are remembered per directory
+SCAN_WORKERS = 8
+SKIP_DIRS = frozenset(['.git', 'node_modules', '__pycache__', '.cache'])  # left out of largest-file results only
+
+# ioprio_set(2) syscall numbers; Python has no wrapper for it
+IOPRIO_SYSCALLS = {'x86_64': 251, 'aarch64': 30, 'i686': 289, 'i386': 289, 'armv7l': 314}
+IOPRIO_WHO_PROCESS = 1
+IOPRIO_CLASS_IDLE = 3
+IOPRIO_CLASS_SHIFT = 13
+
+
+def set_idle_io_priority():
+    """Move the calling thread to the idle I/O class (like `ionice -c3`); best effort"""
+    number = IOPRIO_SYSCALLS.get(platform.machine())
+    if number is None:
+        return False
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        # who=0 with IOPRIO_WHO_PROCESS means the calling thread
+        return libc.syscall(number, IOPRIO_WHO_PROCESS, 0, IOPRIO_CLASS_IDLE << IOPRIO_CLASS_SHIFT) == 0
+    except (OSError, AttributeError):
+        return False
+
+
+DirRecord = namedtuple('DirRecord', ['mtime_ns', 'subdirs', 'large', 'bytes', 'files'])
+ScanStats = namedtuple('ScanStats', ['directories', 'listed', 'reused', 'errors'])
+
+
+class ScanCancelled(Exception):
+    """Raised by scan_tree when its cancel event is set"""
+
+
+TreeTotal = namedtuple('TreeTotal', ['bytes', 'files', 'directories', 'scanned_at'])
+
+
+class DirectoryIndex:
+    """mtime-validated per-directory records, persisted as JSON"""
+
+    def __init__(self, index_dir=DEFAULT_INDEX_DIR):
+        self.index_dir = index_dir
+        self.records = {}
+        self.totals = {}   # path -> TreeTotal of the whole subtree
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._loaded = False
+
+    def _file(self):
+        return os.path.join(self.index_dir, "index.json")
+
+    def load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            with open(self._file()) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('version') != INDEX_VERSION:
+            return
+        self.records = {path: DirRecord(r[0], tuple(r[1]), tuple(map(tuple, r[2])), r[3], r[4])
+                        for path, r in data.get('records', {}).items()}
+        scanned_at = data.get('saved_at', 0)
+        for root in self._roots():
+            self.aggregate(root, scanned_at)
+
+    def save(self):
+        """Write the index atomically; the index stays in memory if that fails"""
+        try:
+            os.makedirs(self.index_dir, exist_ok=True)
+            tmp = self._file() + ".tmp"
+            with self._lock:
+                payload = {'version': INDEX_VERSION, 'saved_at': time.time(),
+                           'records': {p: list(r) for p, r in self.records.items()}}
+            with self._save_lock:
+                with open(tmp, 'w') as f:
+                    json.dump(payload, f, separators=(',', ':'))
+                os.replace(tmp, self._file())
+        except OSError as e:
+            log.warning("storage index not saved: %s", e)
+
+    def get(self, path, mtime_ns):
+        record = self.records.get(path)
+        return record if record is not None and record.mtime_ns == mtime_ns else None
+
+    def put(self, path, record):
+        with self._lock:
+            self.records[path] = record
+
+    def prune(self, root, visited):
+        """Drop records under root for directories that no longer exist"""
+        prefix = root.rstrip('/') + '/'
+        with self._lock:
+            for path in [p for p in self.records if (p == root or p.startswith(prefix)) and p not in visited]:
+                del self.records[path]
+                self.totals.pop(path, None)
+
+    def _roots(self):
+        """Indexed directories whose parent is not indexed"""
+        return [p for p in self.records if os.path.dirname(p) not in self.records or p == '/']
+
+    def aggregate(self, root, scanned_at=None):
+        """Recompute subtree totals under root, then along root's indexed ancestors"""
+        scanned_at = time.time() if scanned_at is None else scanned_at
+        with self._lock:
+            # Iterative post-order over the indexed subtree
+            order = []
+            stack = [root]
+            while stack:
+                path = stack.pop()
+                record = self.records.get(path)
+                if record is None:
+                    continue
+                order.append(path)
+                stack.extend(os.path.join(path, name) for name in record.subdirs)
+            for path in reversed(order):
+                self._total(path, scanned_at)
+            path = root
+            while path != '/' and os.path.dirname(path) in self.records:
+                path = os.path.dirname(path)
+                self._total(path, scanned_at)
+
+    def _total(self, path, scanned_at):
+        record = self.records[path]
+        size, files, dirs = record.bytes, record.files, 0
+        for name in record.subdirs:
+            child = self.totals.get(os.path.join(path, name))
+            if child is not None:
+                size += child.bytes
+                files += child.files
+                dirs += child.directories + 1
+        self.totals[path] = TreeTotal(size, files, dirs, scanned_at)
+
+
+def _list_directory(path, floor):
+    """scandir one directory into a DirRecord (mtime filled in by the caller)"""
+    subdirs = []
+    large = []
+    total = count = 0
+    with os.scandir(path) as it:
+        for entry in it:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.name)
+                elif entry.is_file(follow_symlinks=False):
+                    size = entry.stat(follow_symlinks=False).st_size
+                    total += size
+                    count += 1
+                    if size >= floor:
+                        large.append((entry.name, size))
+            except OSError:
+                continue
+    return subdirs, large, total, count
+
+
+def _refresh_sizes(path, large):
+    """Re-stat remembered large files; drop ones that vanished"""
+    refreshed = []
+    for name, _ in large:
+        try:
+            st = os.lstat(os.path.join(path, name))
+        except OSError:
+            continue
+        if stat.S_ISREG(st.st_mode):
+            refreshed.append((name, st.st_size))
+    return refreshed
+
+
+def scan_tree(root, index=None, floor=INDEX_FLOOR, on_directory=None, workers=SCAN_WORKERS,
+              one_filesystem=True, cancel=None, thread_init=None):
+    """Walk root in parallel, calling on_directory(path, record) for every directory
+
+    cancel is an optional threading.Event; once set the walk stops and raises
+    ScanCancelled. thread_init runs in each worker thread (e.g. to lower I/O priority).
+    """
+    root = os.path.realpath(root)
+    root_dev = os.lstat(root).st_dev
+    use_index = index is not None and floor >= INDEX_FLOOR
+    if use_index:
+        index.load()
+    visited = set()
+    listed = reused = errors = 0
+
+    def visit(path):
+        st = os.lstat(path)
+        if one_filesystem and st.st_dev != root_dev:
+            return None
+        if use_index:
+            record = index.get(path, st.st_mtime_ns)
+            if record is not None:
+                large = _refresh_sizes(path, record.large)
+                return path, record._replace(large=tuple(large)), True
+        subdirs, large, total, count = _list_directory(path, floor)
+        record = DirRecord(st.st_mtime_ns, tuple(subdirs), tuple(large), total, count)
+        return path, record, False
+
+    # Completed futures are collected through a queue: concurrent.futures.wait()
+    # re-registers on every pending future per call, which is quadratic here
+    done = queue.SimpleQueue()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="storage-scan",
+                            initializer=thread_init) as pool:
+        def submit(path):
+            pool.submit(visit, path).add_done_callback(done.put)
+
+        submit(root)
+        outstanding = 1
+        while outstanding:
+            future = done.get()
+            outstanding -= 1
+            if cancel is not None and cancel.is_set():
+                pool.shutdown(wait=True, cancel_futures=True)
+                raise ScanCancelled(root)
+            try:
+                result = future.result()
+            except OSError:
+                errors += 1
+                continue
+            if result is None:
+                continue  # another filesystem mounted below root
+            path, record, was_cached = result
+            visited.add(path)
+            if was_cached:
+                reused += 1
+            else:
+                listed += 1
+            if use_index:
+                index.put(path, record)
+            if on_directory is not None:
+                on_directory(path, record)
+            for name in record.subdirs:
+                submit(os.path.join(path, name))
+                outstanding += 1
+
+    if use_index:
+        index.prune(root, visited)
+        index.aggregate(root)
+        index.save()
+    return ScanStats(len(visited), listed, reused, errors)
+
+
+def in_skipped_dir(path, root):
+    """True if path lies in a SKIP_DIRS directory below root"""
+    relative = os.path.relpath(path, root)
+    return relative != '.' and not SKIP_DIRS.isdisjoint(relative.split(os.sep))
+
+
+def scan_floor(min_size):
+    """Index floor to scan with: below INDEX_FLOOR the index cannot answer"""
+    return INDEX_FLOOR if min_size >= INDEX_FLOOR else min_size
+
+
+class TopK:
+    """Bounded min-heap of the K largest (size, path) pairs"""
+
+    def __init__(self, k):
+        self.k = k
+        self.heap = []
+
+    def push(self, size, path):
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, (size, path))
+        elif size > self.heap[0][0]:
+            heapq.heapreplace(self.heap, (size, path))
+
+    def largest(self):
+        return sorted(self.heap, reverse=True)
+
+
+def largest_files(root, min_size, k, index=None, **scan_options):
+    """The true top-k files of at least min_size bytes under root"""
+    top = TopK(k)
+    root = os.path.realpath(root)
+
+    def collect(path, record):
+        if in_skipped_dir(path, root):
+            return
+        for name, size in record.large:
+            if size >= min_size:
+                top.push(size, os.path.join(path, name))
+
+    stats = scan_tree(root, index, scan_floor(min_size), collect, **scan_options)
+    return top.largest(), stats
+
+
+class BackgroundSizer:
+    """One worker thread that fills the index for requested roots, deduplicated"""
+
+    def __init__(self, index):
+        self.index = index
+        self._queue = []
+        self._queued = set()
+        self._scanned = {}   # root -> start time of its last finished scan
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def request(self, root):
+        """Queue a scan of root unless it (or an ancestor) is already queued or running"""
+        with self._cond:
+            if any(root == q or root.startswith(q.rstrip('/') + '/') for q in self._queued):
+                return
+            self._queued.add(root)
+            self._queue.append(root)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="storage-sizer", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def pending(self, path):
+        with self._cond:
+            return any(path == q or path.startswith(q.rstrip('/') + '/') for q in self._queued)
+
+    def covered(self, path, since):
+        """True if a finished scan of path or an ancestor started at or after `since`"""
+        with self._cond:
+            while True:
+                started = self._scanned.get(path)
+                if started is not None and started >= since:
+                    return True
+                parent = os.path.dirname(path)
+                if parent == path:
+                    return False
+                path = parent
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+                root = self._queue.pop(0)
+            started = time.time()
+            try:
+                scan_tree(root, self.index, thread_init=set_idle_io_priority)
+            except OSError as e:
+                log.warning("storage size scan of %s failed: %s", root, e)
+            except Exception:
+                # One bad tree must not end the thread and leave later requests queued forever
+                log.exception("storage size scan of %s failed", root)
+            finally:
+                with self._cond:
+                    self._queued.discard(root)
+                    self._scanned[root] = started
@@ -0,0 +1,65 @@
+"""
+Snapshot board tests for readers racing a writer that never finishes an update
+"""
+
+import threading
+import time
+
+from utils import scheduler as scheduler_module
+from utils.board import SnapshotBoard, GEN, GEN_OFFSET
+from utils.scheduler import CollectorScheduler
+
+
+def stall_writer(writer, key):
+    """Leave the generation odd, as a writer stuck mid-update would"""
+    m = writer._writable_map(key, 0)
+    GEN.pack_into(m, GEN_OFFSET, GEN.unpack_from(m, GEN_OFFSET)[0] + 1)
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return predicate()
+
+
+def test_read_returns_none_instead_of_stale_copy(tmp_path):
+    writer = SnapshotBoard(str(tmp_path))
+    reader = SnapshotBoard(str(tmp_path))
+    writer.publish('cpu', {'usage': 10}, 100.0)
+    assert reader.read('cpu') == ({'usage': 10}, 100.0)
+
+    stall_writer(writer, 'cpu')
+    assert reader.read('cpu') is None
+
+    writer.publish('cpu', {'usage': 20}, 101.0)
+    assert reader.read('cpu') == ({'usage': 20}, 101.0)
+
+
+def test_follower_skips_tick_while_writer_is_busy(tmp_path, monkeypatch):
+    monkeypatch.setattr(scheduler_module, 'FOLLOW_POLL', 0.01)
+    writer = SnapshotBoard(str(tmp_path))
+    assert writer.try_acquire_sampler()
+    writer.publish('cpu', {'usage': 10}, 100.0)
+
+    follower = CollectorScheduler()
+    follower.register('cpu', lambda: {}, 1)
+    received = []
+    follower.subscribe(lambda key, data, timestamp: received.append((data, timestamp)))
+    thread = threading.Thread(target=follower._follow, args=(SnapshotBoard(str(tmp_path)), None))
+    thread.start()
+    try:
+        assert wait_for(lambda: received == [({'usage': 10}, 100.0)])
+        stall_writer(writer, 'cpu')
+        time.sleep(0.1)
+        assert received == [({'usage': 10}, 100.0)]
+
+        writer.publish('cpu', {'usage': 20}, 101.0)
+        assert wait_for(lambda: received[-1] == ({'usage': 20}, 101.0))
+        assert len(received) == 2
+    finally:
+        follower._stop.set()
+        thread.join()
+        writer.close()
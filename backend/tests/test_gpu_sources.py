@@ -0,0 +1,175 @@
+"""
+GPU source tests against a fake nvidia-smi on PATH and a fixture sysfs tree
+"""
+
+import os
+import sys
+import time
+
+import pytest
+
+from modules import gpu_sources
+from modules.gpu_sources import NvidiaSmiStream, DrmGpuReader, parse_nvidia_line
+
+# Prints one CSV row whose temperature counts launches, then exits or hangs
+FAKE_NVIDIA_SMI = """#!{python}
+import os, sys, time
+state = os.environ['FAKE_SMI_STATE']
+launches = int(open(state).read()) + 1 if os.path.exists(state) else 1
+with open(state, 'w') as f:
+    f.write(str(launches))
+with open(state + '.argv', 'w') as f:
+    f.write(' '.join(sys.argv[1:]))
+print(f"0, Fake GPU, {{40 + launches}}, 55, 12, 8192, 1024, 7168", flush=True)
+if os.environ.get('FAKE_SMI_MODE') == 'hang':
+    time.sleep(60)
+"""
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        result = predicate()
+        if result:
+            return result
+        time.sleep(0.02)
+    return predicate()
+
+
+@pytest.fixture
+def fake_smi(tmp_path, monkeypatch):
+    bindir = tmp_path / 'bin'
+    bindir.mkdir()
+    script = bindir / 'nvidia-smi'
+    script.write_text(FAKE_NVIDIA_SMI.format(python=sys.executable))
+    script.chmod(0o755)
+    state = tmp_path / 'launches'
+    monkeypatch.setenv('PATH', f"{bindir}{os.pathsep}{os.environ.get('PATH', '')}")
+    monkeypatch.setenv('FAKE_SMI_STATE', str(state))
+    streams = []
+
+    def make(mode='exit', interval_ms=250):
+        monkeypatch.setenv('FAKE_SMI_MODE', mode)
+        stream = NvidiaSmiStream(interval_ms=interval_ms)
+        streams.append(stream)
+        return stream
+
+    make.launches = lambda: int(state.read_text()) if state.exists() else 0
+    make.argv = lambda: (tmp_path / 'launches.argv').read_text().split()
+    yield make
+    for stream in streams:
+        stream.stop()
+
+
+def test_parse_nvidia_line_handles_unsupported_fields():
+    gpu = parse_nvidia_line("1, Tesla T4, [N/A], 7, [Not Supported], 15360, 0, 15360")
+    assert gpu['index'] == 1
+    assert gpu['temperature'] == 0
+    assert gpu['memory_utilization'] == 0
+    assert gpu['memory_total'] == 15360
+    assert parse_nvidia_line("0, too, short") is None
+
+
+def test_stream_reads_sample_from_long_running_child(fake_smi):
+    stream = fake_smi(mode='hang')
+    gpus = wait_for(lambda: stream.sample(max_age=10))
+    assert gpus == [{'vendor': 'NVIDIA', 'index': 0, 'name': 'Fake GPU', 'temperature': 41.0,
+                     'utilization': 55.0, 'memory_utilization': 12.0,
+                     'memory_total': 8192, 'memory_used': 1024, 'memory_free': 7168}]
+    assert fake_smi.argv()[-2:] == ['-lms', '250']
+    stream.sample(max_age=10)
+    assert fake_smi.launches() == 1
+
+
+def test_stream_restarts_child_after_exit(fake_smi, monkeypatch):
+    monkeypatch.setattr(gpu_sources, 'RESTART_BACKOFF', 0.0)
+    stream = fake_smi(mode='exit')
+    assert wait_for(lambda: stream.sample(max_age=10))
+    assert wait_for(lambda: stream._proc.poll() is not None)
+
+    restarted = wait_for(lambda: [g for g in stream.sample(max_age=10) if g['temperature'] == 42.0])
+    assert restarted
+    assert fake_smi.launches() == 2
+
+
+def test_stream_waits_out_backoff_before_restarting(fake_smi, monkeypatch):
+    monkeypatch.setattr(gpu_sources, 'RESTART_BACKOFF', 60.0)
+    stream = fake_smi(mode='exit')
+    assert wait_for(lambda: stream.sample(max_age=10))
+    assert wait_for(lambda: stream._proc.poll() is not None)
+    stream.sample(max_age=10)
+    assert fake_smi.launches() == 1
+
+
+def test_stale_sample_is_dropped(fake_smi):
+    stream = fake_smi(mode='hang')
+    assert wait_for(lambda: stream.sample(max_age=10))
+    time.sleep(0.3)
+    assert stream.sample(max_age=0.2) == []
+    assert len(stream.sample(max_age=10)) == 1
+
+
+def test_missing_binary_disables_stream(tmp_path):
+    stream = NvidiaSmiStream(binary=str(tmp_path / 'missing'))
+    assert stream.sample() == []
+    assert stream.available is False
+
+
+def write_tree(root, files):
+    for relative, content in files.items():
+        path = root / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+
+
+@pytest.fixture
+def sysfs(tmp_path):
+    write_tree(tmp_path, {
+        'class/drm/card0/device/vendor': '0x1002\n',
+        'class/drm/card0/device/device': '0x73bf\n',
+        'class/drm/card0/device/uevent': 'DRIVER=amdgpu\nPCI_SLOT_NAME=0000:03:00.0\n',
+        'class/drm/card0/device/product_name': 'Radeon RX 6800\n',
+        'class/drm/card0/device/gpu_busy_percent': '37\n',
+        'class/drm/card0/device/mem_info_vram_total': f"{16 * 1024 ** 3}\n",
+        'class/drm/card0/device/mem_info_vram_used': f"{4 * 1024 ** 3}\n",
+        'class/drm/card0/device/hwmon/hwmon3/temp1_input': '54000\n',
+        'class/drm/card0-HDMI-A-1/status': 'connected\n',
+        'class/drm/card1/device/vendor': '0x10de\n',
+        'class/drm/card1/device/uevent': 'DRIVER=nvidia\nPCI_SLOT_NAME=0000:01:00.0\n',
+        'class/drm/card2/device/vendor': '0x8086\n',
+        'class/drm/card2/device/device': '0x4680\n',
+        'class/drm/card2/device/uevent': 'DRIVER=i915\nPCI_SLOT_NAME=0000:00:02.0\n',
+        'class/drm/card3/device/vendor': '0x1002\n',
+        'class/drm/card3/device/uevent': 'DRIVER=amdgpu\nPCI_SLOT_NAME=0000:03:00.0\n',
+    })
+    return tmp_path
+
+
+def test_drm_reader_enumerates_cards_once(sysfs):
+    reader = DrmGpuReader(str(sysfs))
+    cards = reader.cards()
+    assert [(c['card'], c['vendor'], c['name'], c['pci_slot']) for c in cards] == [
+        ('card0', 'AMD', 'Radeon RX 6800', '0000:03:00.0'),
+        ('card2', 'Intel', 'Intel GPU [0x4680]', '0000:00:02.0'),
+    ]
+    write_tree(sysfs, {'class/drm/card4/device/vendor': '0x1002\n'})
+    assert reader.cards() is cards
+
+
+def test_drm_reader_samples_counters(sysfs):
+    reader = DrmGpuReader(str(sysfs))
+    amd, intel = reader.sample()
+    assert amd['utilization'] == 37.0
+    assert amd['temperature'] == 54.0
+    assert (amd['memory_total'], amd['memory_used'], amd['memory_free']) == (16384, 4096, 12288)
+    assert amd['memory_utilization'] == 25.0
+    assert amd['driver'] == 'amdgpu'
+    # Counters the driver does not expose read as zero
+    assert (intel['utilization'], intel['temperature'], intel['memory_total']) == (0, 0, 0)
+
+    (sysfs / 'class/drm/card0/device/gpu_busy_percent').write_text('81\n')
+    assert reader.sample()[0]['utilization'] == 81.0
+
+
+def test_drm_reader_handles_missing_tree(tmp_path):
+    assert DrmGpuReader(str(tmp_path / 'nothing')).sample() == []
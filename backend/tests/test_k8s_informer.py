@@ -0,0 +1,230 @@
+"""
+Pager and informer tests against a stub kubectl serving canned list pages and watch events
+"""
+
+import io
+import json
+import sys
+import time
+from urllib.parse import quote
+
+import pytest
+
+from modules import k8s_informer, k8s_pager
+from modules.k8s_informer import ResourceInformer, NotSynced
+from modules.k8s_pager import PagedList, ContinueExpired, iter_list
+
+# Answers `kubectl get --raw <path>` from a scenario file. Requests are keyed
+# 'watch', 'continue=<token>' or 'list'; the n-th request for a key gets the
+# n-th response (the last one repeats). Every path is appended to a log.
+STUB_KUBECTL = """#!{python}
+import json, os, sys, time
+scenario = json.load(open(os.environ['STUB_KUBECTL_SCENARIO']))
+path = sys.argv[3]
+with open(os.environ['STUB_KUBECTL_LOG'], 'a') as f:
+    f.write(path + '\\n')
+if 'watch=1' in path:
+    key = 'watch'
+elif 'continue=' in path:
+    key = 'continue=' + path.split('continue=')[1].split('&')[0]
+else:
+    key = 'list'
+counter = os.environ['STUB_KUBECTL_LOG'] + '.' + key.replace('/', '_').replace('%', '_')
+calls = int(open(counter).read()) if os.path.exists(counter) else 0
+with open(counter, 'w') as f:
+    f.write(str(calls + 1))
+responses = scenario[key]
+response = responses[min(calls, len(responses) - 1)]
+sys.stderr.write(response.get('warnings', ''))
+sys.stderr.flush()
+sys.stdout.write(response.get('stdout', ''))
+sys.stdout.flush()
+sys.stderr.write(response.get('stderr', ''))
+time.sleep(response.get('sleep', 0))
+sys.exit(response.get('exit', 0))
+"""
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        result = predicate()
+        if result:
+            return result
+        time.sleep(0.02)
+    return predicate()
+
+
+def pod(name, namespace='default', rv='1', phase='Running'):
+    return {'metadata': {'name': name, 'namespace': namespace, 'resourceVersion': rv},
+            'status': {'phase': phase}}
+
+
+def page(items, rv, token=None):
+    metadata = {'resourceVersion': rv}
+    if token:
+        metadata['continue'] = token
+    return {'stdout': json.dumps({'kind': 'PodList', 'apiVersion': 'v1', 'metadata': metadata,
+                                  'items': items}, indent=1)}
+
+
+def events(*events, sleep=30):
+    return {'stdout': ''.join(json.dumps(e) + '\n' for e in events), 'sleep': sleep}
+
+
+def project(item):
+    return {'name': item['metadata']['name'], 'phase': item['status']['phase']}
+
+
+@pytest.fixture
+def kubectl(tmp_path, monkeypatch):
+    script = tmp_path / 'kubectl'
+    script.write_text(STUB_KUBECTL.format(python=sys.executable))
+    script.chmod(0o755)
+    scenario = tmp_path / 'scenario.json'
+    log = tmp_path / 'requests.log'
+    monkeypatch.setenv('STUB_KUBECTL_SCENARIO', str(scenario))
+    monkeypatch.setenv('STUB_KUBECTL_LOG', str(log))
+    monkeypatch.setattr(k8s_informer, 'RETRY_BASE', 0.05)
+    informers = []
+
+    def serve(**responses):
+        scenario.write_text(json.dumps(responses))
+        return str(script)
+
+    def informer(**responses):
+        inf = ResourceInformer('pods', '/api/v1/pods', project, kubectl=serve(**responses), chunk_size=2)
+        informers.append(inf)
+        return inf
+
+    serve.informer = informer
+    serve.requests = lambda: log.read_text().split() if log.exists() else []
+    yield serve
+    for inf in informers:
+        inf.stop()
+        inf._thread.join(timeout=5)
+
+
+# --- Pager ---
+
+def test_iter_list_decodes_items_across_small_reads(monkeypatch):
+    monkeypatch.setattr(k8s_pager, 'READ_SIZE', 7)
+    body = json.dumps({'metadata': {'resourceVersion': '5', 'continue': 'x'},
+                       'items': [{'n': 123456789}, {'s': 'a,b}]'}, []], 'kind': 'List'})
+    metadata = {}
+    assert list(iter_list(io.StringIO(body), metadata)) == [{'n': 123456789}, {'s': 'a,b}]'}, []]
+    assert metadata == {'metadata': {'resourceVersion': '5', 'continue': 'x'}, 'kind': 'List'}
+
+
+def test_pager_follows_continue_tokens(kubectl):
+    token = 'eyJ2IjoibWV0YS/rIn0='
+    binary = kubectl(list=[page([pod('a'), pod('b')], '100', token)],
+                     **{f"continue={quote(token, safe='')}": [page([pod('c')], '101')]})
+    pages = PagedList(binary, '/api/v1/pods', chunk_size=2)
+    assert [item['metadata']['name'] for item in pages] == ['a', 'b', 'c']
+    assert pages.pages == 2
+    assert pages.resource_version == '100'   # the first page's version, not the last
+    first, second = kubectl.requests()
+    assert first == '/api/v1/pods?limit=2'
+    assert second == f"/api/v1/pods?limit=2&continue={quote(token, safe='')}"
+
+
+def test_pager_reports_expired_continue_token(kubectl):
+    binary = kubectl(list=[page([pod('a')], '100', 'stale')],
+                     **{'continue=stale': [{'stderr': 'Error from server (Expired): The provided continue '
+                                                      'parameter is too old (410)', 'exit': 1}]})
+    with pytest.raises(ContinueExpired):
+        list(PagedList(binary, '/api/v1/pods', chunk_size=1))
+
+
+def test_pager_raises_kubectl_errors(kubectl):
+    binary = kubectl(list=[{'stderr': 'error: You must be logged in to the server', 'exit': 1}])
+    with pytest.raises(RuntimeError, match='logged in'):
+        list(PagedList(binary, '/api/v1/pods'))
+
+
+def test_pager_survives_more_stderr_than_a_pipe_holds(kubectl, monkeypatch):
+    monkeypatch.setattr(k8s_pager, 'IDLE_TIMEOUT', 5.0)
+    warnings = 'Warning: v1 ComponentStatus is deprecated in v1.19+\n' * 4000
+    binary = kubectl(list=[dict(page([pod('a')], '5'), warnings=warnings)])
+    assert [item['metadata']['name'] for item in PagedList(binary, '/api/v1/pods')] == ['a']
+
+
+def test_pager_raises_on_malformed_output_without_hanging(kubectl):
+    binary = kubectl(list=[{'stdout': '{"items": [not json' + ' ' * 200000, 'sleep': 30}])
+    started = time.monotonic()
+    with pytest.raises(ValueError):
+        list(PagedList(binary, '/api/v1/pods'))
+    assert time.monotonic() - started < 10
+
+
+def test_pager_kills_stalled_page(kubectl, monkeypatch):
+    monkeypatch.setattr(k8s_pager, 'IDLE_TIMEOUT', 0.3)
+    binary = kubectl(list=[{'stdout': '{"items": [', 'sleep': 30}])
+    with pytest.raises(RuntimeError, match='no output'):
+        list(PagedList(binary, '/api/v1/pods'))
+
+
+# --- Informer ---
+
+def names(informer, namespace=None):
+    return sorted(item['name'] for item in informer.items(namespace))
+
+
+def test_informer_lists_then_applies_watch_events(kubectl):
+    informer = kubectl.informer(
+        list=[page([pod('a'), pod('b')], '10', 'p2')],
+        **{'continue=p2': [page([pod('d', 'kube-system')], '11')]},
+        watch=[events({'type': 'ADDED', 'object': pod('c', rv='12')},
+                      {'type': 'MODIFIED', 'object': pod('a', rv='13', phase='Failed')},
+                      {'type': 'DELETED', 'object': pod('b', rv='14')},
+                      {'type': 'BOOKMARK', 'object': {'metadata': {'resourceVersion': '15'}}})])
+    assert wait_for(lambda: names(informer) == ['a', 'c', 'd'])
+    assert informer.get('default', 'a') == {'name': 'a', 'phase': 'Failed'}
+    assert names(informer, 'kube-system') == ['d']
+    assert wait_for(lambda: informer._resource_version == '15')
+    watch = [r for r in kubectl.requests() if 'watch=1' in r]
+    assert watch == ['/api/v1/pods?watch=1&allowWatchBookmarks=true&resourceVersion=10']
+
+
+def test_informer_relists_after_410_watch_error(kubectl):
+    gone = {'type': 'ERROR', 'object': {'kind': 'Status', 'code': 410, 'reason': 'Expired',
+                                        'message': 'too old resource version: 10 (500)'}}
+    informer = kubectl.informer(
+        list=[page([pod('a')], '10'), page([pod('a'), pod('z')], '500')],
+        watch=[events(gone, sleep=0), events()])
+    assert wait_for(lambda: names(informer) == ['a', 'z'])
+    requests = kubectl.requests()
+    assert sum('watch=1' not in r for r in requests) == 2
+    assert wait_for(lambda: any(r.endswith('resourceVersion=500') for r in kubectl.requests()))
+    assert informer.error is None
+
+
+def test_informer_relists_from_start_when_continue_token_expires(kubectl):
+    expired = {'stderr': 'Error from server (Expired): continue parameter is too old (410)', 'exit': 1}
+    informer = kubectl.informer(
+        list=[page([pod('a'), pod('b')], '10', 'old'), page([pod('a'), pod('c')], '20')],
+        **{'continue=old': [expired]},
+        watch=[events()])
+    assert wait_for(lambda: names(informer) == ['a', 'c'])
+    assert informer._resource_version == '20'
+    assert informer.error is None
+
+
+def test_informer_resumes_ended_watch_without_relisting(kubectl):
+    informer = kubectl.informer(
+        list=[page([pod('a')], '10')],
+        watch=[events({'type': 'ADDED', 'object': pod('b', rv='11')}, sleep=0), events()])
+    assert wait_for(lambda: names(informer) == ['a', 'b'])
+    assert wait_for(lambda: any(r.endswith('resourceVersion=11') for r in kubectl.requests()))
+    assert sum('watch=1' not in r for r in kubectl.requests()) == 1
+
+
+def test_informer_fails_fast_once_first_list_failed(kubectl):
+    informer = kubectl.informer(list=[{'stderr': 'connection refused', 'exit': 1}])
+    started = time.monotonic()
+    with pytest.raises(NotSynced, match='connection refused'):
+        informer.items(wait=5.0)
+    with pytest.raises(NotSynced):
+        informer.items(wait=5.0)
+    assert time.monotonic() - started < 3
@@ -0,0 +1,314 @@
+"""
+On-Disk Metric Archive
+Author: M. Nafiurohman
+
+Stores metric history in memory-mapped segment files so it survives restarts
+and covers days rather than minutes. Each segment covers one time window at one
+resolution and is laid out column-major: one fixed-width float64 column per
+series, one slot per step, NaN for missing samples. Column names live in an
+append-only sidecar file.
+
+    <data_dir>/1s/<window_start>.seg   raw samples, 1 hour per segment
+    <data_dir>/1m/<window_start>.seg   1 minute averages, 1 day per segment
+    <data_dir>/1h/<window_start>.seg   1 hour averages, 30 days per segment
+
+Writes go straight into the mapping with no fsync; the kernel writes pages back.
+A background thread rolls closed 1s segments into 1m and 1m into 1h, then
+applies age- and size-based retention.
+"""
+
+import logging
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+DEFAULT_DATA_DIR = "/opt/bmonitor/data/metrics"
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+COMPACTION_INTERVAL = 300
+
+# resolution: (step seconds, window seconds)
+RESOLUTIONS = {
+    '1s': (1, 3600),
+    '1m': (60, 86400),
+    '1h': (3600, 30 * 86400),
+}
+ROLLUPS = [('1s', '1m'), ('1m', '1h')]
+DEFAULT_RETENTION = {
+    '1s': 2 * 86400,
+    '1m': 30 * 86400,
+    '1h': 365 * 86400,
+}
+
+SLOT_SIZE = 8
+NAN = float('nan')
+NAN_BYTES = struct.pack('d', NAN)
+
+
+class Segment:
+    """One memory-mapped, column-major segment file"""
+
+    def __init__(self, path, start, step, slots, writable=False):
+        self.path = path
+        self.start = start
+        self.step = step
+        self.slots = slots
+        self.writable = writable
+        self.columns = {}
+        self._map = None
+        self._fd = None
+
+        if os.path.exists(self.cols_path):
+            with open(self.cols_path) as f:
+                for line in f:
+                    name = line.rstrip('\n')
+                    if name:
+                        self.columns[name] = len(self.columns)
+
+        if writable:
+            self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        else:
+            self._fd = os.open(path, os.O_RDONLY)
+        self._remap()
+
+    @property
+    def cols_path(self):
+        return self.path[:-4] + '.cols'
+
+    @property
+    def column_bytes(self):
+        return self.slots * SLOT_SIZE
+
+    def _remap(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        size = os.fstat(self._fd).st_size
+        # Columns appended by the writer after the sidecar was read are ignored
+        usable = min(len(self.columns), size // self.column_bytes)
+        if usable < len(self.columns):
+            self.columns = {n: i for n, i in self.columns.items() if i < usable}
+        if size:
+            access = mmap.ACCESS_WRITE if self.writable else mmap.ACCESS_READ
+            self._map = mmap.mmap(self._fd, size, access=access)
+
+    def _add_column(self, name):
+        index = len(self.columns)
+        offset = index * self.column_bytes
+        os.ftruncate(self._fd, offset + self.column_bytes)
+        os.pwrite(self._fd, NAN_BYTES * self.slots, offset)
+        with open(self.cols_path, 'a') as f:
+            f.write(name + '\n')
+        self.columns[name] = index
+        self._remap()
+        return index
+
+    def write(self, name, slot, value):
+        index = self.columns.get(name)
+        if index is None:
+            index = self._add_column(name)
+        offset = index * self.column_bytes + slot * SLOT_SIZE
+        self._map[offset:offset + SLOT_SIZE] = struct.pack('d', value)
+
+    def read(self, name, lo=0, hi=None):
+        """Values for slots [lo, hi) of a column, read through the mapping"""
+        index = self.columns[name]
+        hi = self.slots if hi is None else hi
+        base = index * self.column_bytes
+        view = memoryview(self._map)[base + lo * SLOT_SIZE:base + hi * SLOT_SIZE].cast('d')
+        try:
+            return view.tolist()
+        finally:
+            view.release()
+
+    def close(self):
+        if self._map is not None:
+            if self.writable:
+                self._map.flush()
+            self._map.close()
+            self._map = None
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+def _match(patterns, names):
+    matched = []
+    for pattern in patterns:
+        if pattern.endswith('*'):
+            matched += [n for n in names if n.startswith(pattern[:-1])]
+        elif pattern in names:
+            matched.append(pattern)
+    return matched
+
+
+class MetricArchive:
+    """Append-only segment store with rollup compaction and retention"""
+
+    def __init__(self, data_dir=DEFAULT_DATA_DIR, max_bytes=DEFAULT_MAX_BYTES, retention=None):
+        self.data_dir = data_dir
+        self.max_bytes = max_bytes
+        self.retention = dict(DEFAULT_RETENTION, **(retention or {}))
+        self._writers = {}  # resolution -> open writable Segment
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        for res in RESOLUTIONS:
+            os.makedirs(os.path.join(data_dir, res), exist_ok=True)
+
+    def _path(self, res, start):
+        return os.path.join(self.data_dir, res, f"{start}.seg")
+
+    def _windows(self, res):
+        starts = []
+        for name in os.listdir(os.path.join(self.data_dir, res)):
+            if name.endswith('.seg'):
+                starts.append(int(name[:-4]))
+        return sorted(starts)
+
+    def _writer(self, res, start):
+        seg = self._writers.get(res)
+        if seg is None or seg.start != start:
+            if seg is not None:
+                seg.close()
+            step, window = RESOLUTIONS[res]
+            seg = Segment(self._path(res, start), start, step, window // step, writable=True)
+            self._writers[res] = seg
+        return seg
+
+    def write(self, name, timestamp, value, res='1s'):
+        """Store one sample in the segment covering its timestamp"""
+        if value is None:
+            return
+        step, window = RESOLUTIONS[res]
+        ts = int(timestamp)
+        start = ts - ts % window
+        with self._lock:
+            self._writer(res, start).write(name, (ts - start) // step, float(value))
+
+    def query(self, patterns, start, end, res=None):
+        """Samples for matching series in [start, end] as {name: {'timestamps', 'values'}}"""
+        res = res or self.pick_resolution(end - start)
+        step, window = RESOLUTIONS[res]
+        slots = window // step
+        result = {}
+        with self._lock:
+            for wstart in self._windows(res):
+                if wstart + window <= start or wstart > end:
+                    continue
+                writer = self._writers.get(res)
+                if writer is not None and writer.start == wstart:
+                    seg, owned = writer, False
+                else:
+                    seg, owned = Segment(self._path(res, wstart), wstart, step, slots), True
+                try:
+                    lo = max(0, int(start - wstart) // step)
+                    hi = min(slots, int(end - wstart) // step + 1)
+                    for name in _match(patterns, list(seg.columns)):
+                        series = result.setdefault(name, {'timestamps': [], 'values': []})
+                        for i, value in enumerate(seg.read(name, lo, hi)):
+                            if not math.isnan(value):
+                                series['timestamps'].append(wstart + (lo + i) * step)
+                                series['values'].append(value)
+                finally:
+                    if owned:
+                        seg.close()
+        return {'resolution': res, 'series': result}
+
+    def pick_resolution(self, span):
+        if span <= 6 * 3600:
+            return '1s'
+        if span <= 7 * 86400:
+            return '1m'
+        return '1h'
+
+    def compact(self, now=None):
+        """Roll closed segments into coarser resolutions, then apply retention"""
+        now = now if now is not None else time.time()
+        for src, dst in ROLLUPS:
+            step, window = RESOLUTIONS[src]
+            dst_step = RESOLUTIONS[dst][0]
+            per_bucket = dst_step // step
+            for wstart in self._windows(src):
+                marker = self._path(src, wstart)[:-4] + '.rolled'
+                if wstart + window > now or os.path.exists(marker):
+                    continue
+                seg = Segment(self._path(src, wstart), wstart, step, window // step)
+                try:
+                    for name in list(seg.columns):
+                        values = seg.read(name)
+                        for b in range(0, len(values), per_bucket):
+                            bucket = [v for v in values[b:b + per_bucket] if not math.isnan(v)]
+                            if bucket:
+                                self.write(name, wstart + b * step, sum(bucket) / len(bucket), res=dst)
+                finally:
+                    seg.close()
+                open(marker, 'w').close()
+        self.apply_retention(now)
+
+    def apply_retention(self, now):
+        """Drop segments past their age limit, then the oldest until under max_bytes"""
+        segments = []
+        for res in RESOLUTIONS:
+            window = RESOLUTIONS[res][1]
+            for wstart in self._windows(res):
+                if wstart + window < now - self.retention[res]:
+                    self._remove(res, wstart)
+                else:
+                    segments.append((res, wstart))
+
+        total = sum(self._size(res, w) for res, w in segments)
+        # Finest resolution goes first: its data already lives on in rollups
+        for res, wstart in sorted(segments, key=lambda s: (list(RESOLUTIONS).index(s[0]), s[1])):
+            if total <= self.max_bytes:
+                break
+            writer = self._writers.get(res)
+            if writer is not None and writer.start == wstart:
+                continue
+            total -= self._size(res, wstart)
+            self._remove(res, wstart)
+
+    def _size(self, res, wstart):
+        path = self._path(res, wstart)
+        try:
+            return os.path.getsize(path) + os.path.getsize(path[:-4] + '.cols')
+        except OSError:
+            return 0
+
+    def _remove(self, res, wstart):
+        base = self._path(res, wstart)[:-4]
+        with self._lock:
+            writer = self._writers.get(res)
+            if writer is not None and writer.start == wstart:
+                writer.close()
+                del self._writers[res]
+            for suffix in ('.seg', '.cols', '.rolled'):
+                try:
+                    os.remove(base + suffix)
+                except FileNotFoundError:
+                    pass
+
+    def start(self, interval=COMPACTION_INTERVAL):
+        """Run compaction in a background daemon thread"""
+        if self._thread:
+            return
+        self._thread = threading.Thread(target=self._loop, args=(interval,), name="archive-compaction", daemon=True)
+        self._thread.start()
+
+    def _loop(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.compact()
+            except Exception as e:
+                log.warning("archive compaction failed: %s", e)
+
+    def close(self):
+        self._stop.set()
+        with self._lock:
+            for seg in self._writers.values():
+                seg.close()
+            self._writers = {}
@@ -0,0 +1,175 @@
+"""
+Shared-Memory Snapshot Board
+Author: M. Nafiurohman
+
+Lets one sampler process publish collector snapshots that every other local
+process (gunicorn workers, the CLI) reads without running collectors itself.
+Each collector gets one memory-mapped file under /dev/shm:
+
+    header (32 bytes): magic 'BMSNAP01' | generation u64 | timestamp f64 | length u64
+    payload:           JSON-encoded snapshot
+
+The generation counter is a seqlock: the writer makes it odd before touching
+the payload and even again afterwards. Readers never lock; they retry if the
+generation is odd or changed while they copied the payload, and reuse their
+last decoded value while the generation is unchanged. A reader that cannot get
+a consistent copy within READ_RETRIES attempts reports nothing rather than an
+older snapshot.
+
+The sampler is elected with an exclusive flock on sampler.lock, so a worker
+that dies hands sampling over to the next worker that grabs the lock.
+"""
+
+import fcntl
+import json
+import mmap
+import os
+import struct
+
+DEFAULT_BOARD_DIR = "/dev/shm/bmonitor" if os.path.isdir("/dev/shm") else "/tmp/bmonitor-board"
+
+MAGIC = b'BMSNAP01'
+HEADER = struct.Struct('<8sQdQ')
+GEN = struct.Struct('<Q')
+GEN_OFFSET = 8
+INITIAL_SIZE = 64 * 1024
+READ_RETRIES = 8
+
+
+class SnapshotBoard:
+    """Per-collector seqlock snapshot files shared between processes"""
+
+    def __init__(self, path=DEFAULT_BOARD_DIR):
+        self.path = path
+        self._maps = {}    # key -> (fd, mmap, writable)
+        self._decoded = {}  # key -> (generation, data, timestamp)
+        self._lock_fd = None
+
+    def _file(self, key):
+        return os.path.join(self.path, f"{key}.snap")
+
+    def try_acquire_sampler(self):
+        """Become the single sampler for this board; False if another process is"""
+        if self._lock_fd is not None:
+            return True
+        os.makedirs(self.path, exist_ok=True)
+        fd = os.open(os.path.join(self.path, "sampler.lock"), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        return True
+
+    # --- Writer ---
+
+    def _writable_map(self, key, needed):
+        entry = self._maps.get(key)
+        if entry is None or not entry[2]:
+            if entry is not None:
+                self._close(key)
+            fd = os.open(self._file(key), os.O_RDWR | os.O_CREAT, 0o644)
+            size = os.fstat(fd).st_size
+            if size < HEADER.size:
+                size = INITIAL_SIZE
+                os.ftruncate(fd, size)
+            m = mmap.mmap(fd, size, access=mmap.ACCESS_WRITE)
+            if m[:8] != MAGIC:
+                m[:HEADER.size] = HEADER.pack(MAGIC, 0, 0.0, 0)
+            entry = self._maps[key] = (fd, m, True)
+        fd, m, _ = entry
+        if needed > len(m):
+            size = len(m)
+            while size < needed:
+                size *= 2
+            m.close()
+            os.ftruncate(fd, size)
+            m = mmap.mmap(fd, size, access=mmap.ACCESS_WRITE)
+            entry = self._maps[key] = (fd, m, True)
+        return m
+
+    def publish(self, key, data, timestamp):
+        """Write a snapshot; usable directly as a scheduler subscriber"""
+        payload = json.dumps(data, default=str).encode()
+        m = self._writable_map(key, HEADER.size + len(payload))
+        generation = GEN.unpack_from(m, GEN_OFFSET)[0]
+        if generation & 1:
+            generation += 1  # a previous writer died mid-update
+        GEN.pack_into(m, GEN_OFFSET, generation + 1)
+        m[HEADER.size:HEADER.size + len(payload)] = payload
+        HEADER.pack_into(m, 0, MAGIC, generation + 1, timestamp, len(payload))
+        GEN.pack_into(m, GEN_OFFSET, generation + 2)
+
+    # --- Readers ---
+
+    def _readable_map(self, key, remap=False):
+        entry = self._maps.get(key)
+        if entry is not None and not remap:
+            return entry[1]
+        if entry is not None:
+            if entry[2]:
+                return entry[1]
+            self._close(key)
+        try:
+            fd = os.open(self._file(key), os.O_RDONLY)
+        except FileNotFoundError:
+            return None
+        size = os.fstat(fd).st_size
+        if size < HEADER.size:
+            os.close(fd)
+            return None
+        m = mmap.mmap(fd, size, access=mmap.ACCESS_READ)
+        self._maps[key] = (fd, m, False)
+        return m
+
+    def generation(self, key):
+        """Current generation of a key without decoding it (0 if absent)"""
+        m = self._readable_map(key)
+        if m is None:
+            return 0
+        return GEN.unpack_from(m, GEN_OFFSET)[0]
+
+    def read(self, key):
+        """Latest (data, timestamp) for a key, or None if never published or
+        no consistent copy could be taken while the writer was busy"""
+        cached = self._decoded.get(key)
+        m = self._readable_map(key)
+        if m is None:
+            return None
+        for _ in range(READ_RETRIES):
+            magic, generation, timestamp, length = HEADER.unpack_from(m, 0)
+            if magic != MAGIC or generation == 0:
+                return None
+            if generation & 1:
+                continue
+            if cached and cached[0] == generation:
+                return cached[1], cached[2]
+            if HEADER.size + length > len(m):
+                m = self._readable_map(key, remap=True)
+                continue
+            payload = m[HEADER.size:HEADER.size + length]
+            if GEN.unpack_from(m, GEN_OFFSET)[0] != generation:
+                continue
+            data = json.loads(payload)
+            self._decoded[key] = (generation, data, timestamp)
+            return data, timestamp
+        return None
+
+    def keys(self):
+        try:
+            return sorted(name[:-5] for name in os.listdir(self.path) if name.endswith('.snap'))
+        except FileNotFoundError:
+            return []
+
+    def _close(self, key):
+        fd, m, _ = self._maps.pop(key)
+        m.close()
+        os.close(fd)
+
+    def close(self):
+        for key in list(self._maps):
+            self._close(key)
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
@@ -0,0 +1,141 @@
+"""
+Single-Flight Cache
+Author: M. Nafiurohman
+
+Thread-safe TTL cache for on-demand collectors. Concurrent misses for a key
+collapse into one computation, expired values are served while a background
+refresh runs (stale-while-revalidate), and failing collectors are negatively
+cached with exponential backoff. Per-key hit/miss/latency counters are kept.
+"""
+
+import threading
+import time
+import logging
+
+log = logging.getLogger(__name__)
+
+DEFAULT_TTL = 1.0
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+
+
+def is_error_result(value):
+    """Collectors in this codebase report failure as {'error': ...}"""
+    return isinstance(value, dict) and 'error' in value
+
+
+class _Entry:
+    __slots__ = ('value', 'stored_at', 'ttl', 'error', 'failures', 'retry_at', 'flight')
+
+    def __init__(self, ttl):
+        self.value = None
+        self.stored_at = None
+        self.ttl = ttl
+        self.error = None
+        self.failures = 0
+        self.retry_at = 0.0
+        self.flight = None  # threading.Event while a computation runs
+
+
+class SingleFlightCache:
+    """Per-key TTL cache with request collapsing and stale-while-revalidate"""
+
+    def __init__(self, default_ttl=DEFAULT_TTL):
+        self.default_ttl = default_ttl
+        self._entries = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, func, ttl=None):
+        """Return a cached value for key, computing it with func() at most once per TTL"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _Entry(ttl or self.default_ttl)
+            elif ttl:
+                entry.ttl = ttl
+            stats = self._stats.setdefault(key, {'hits': 0, 'stale_hits': 0, 'misses': 0,
+                                                 'errors': 0, 'computations': 0, 'total_latency': 0.0,
+                                                 'last_latency': 0.0})
+
+            has_value = entry.stored_at is not None
+            fresh = has_value and now - entry.stored_at < entry.ttl
+            backing_off = entry.failures and now < entry.retry_at
+
+            if fresh or (backing_off and has_value):
+                stats['hits'] += 1
+                return entry.value
+            if backing_off:
+                stats['hits'] += 1
+                return {'error': entry.error}
+            if has_value:
+                # Serve stale and revalidate in the background
+                stats['stale_hits'] += 1
+                if entry.flight is None:
+                    entry.flight = threading.Event()
+                    threading.Thread(target=self._compute, args=(key, entry, func),
+                                     name=f"cache-refresh-{key}", daemon=True).start()
+                return entry.value
+
+            stats['misses'] += 1
+            flight = entry.flight
+            leader = flight is None
+            if leader:
+                flight = entry.flight = threading.Event()
+
+        if leader:
+            self._compute(key, entry, func)
+        else:
+            flight.wait()
+        with self._lock:
+            if entry.stored_at is None:
+                return {'error': entry.error}
+            return entry.value
+
+    def _compute(self, key, entry, func):
+        started = time.monotonic()
+        try:
+            value = func()
+            error = value['error'] if is_error_result(value) else None
+        except Exception as e:
+            log.warning("cached collector %s failed: %s", key, e)
+            value, error = None, str(e)
+        finished = time.monotonic()
+
+        with self._lock:
+            stats = self._stats[key]
+            stats['computations'] += 1
+            stats['last_latency'] = round(finished - started, 4)
+            stats['total_latency'] += finished - started
+            if error is None:
+                entry.value = value
+                entry.stored_at = finished
+                entry.failures = 0
+                entry.error = None
+            else:
+                stats['errors'] += 1
+                entry.failures += 1
+                entry.error = error
+                entry.retry_at = finished + min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (entry.failures - 1))
+            flight = entry.flight
+            entry.flight = None
+        flight.set()
+
+    def invalidate(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.stored_at = None
+                entry.failures = 0
+
+    def stats(self):
+        """Per-key counters including average computation latency"""
+        with self._lock:
+            result = {}
+            for key, s in self._stats.items():
+                s = dict(s)
+                s['avg_latency'] = round(s['total_latency'] / s['computations'], 4) if s['computations'] else 0
+                s['total_latency'] = round(s['total_latency'], 4)
+                result[key] = s
+            return result
@@ -43,5 +43,5 @@ def get_cpu_name():
         import platform
         return platform.processor() or "Unknown CPU"
     else:
-        result = run_cmd("lscpu | grep 'Model name' | cut -d':' -f2 | xargs")
-        return result if result else "Unknown CPU"
+        from utils.sysinfo import cpu_model
+        return cpu_model() or platform.processor() or "Unknown CPU"
@@ -0,0 +1,141 @@
+"""
+Metric History Store
+Author: M. Nafiurohman
+
+Fixed-memory ring buffers, one per metric series, backed by preallocated
+array('d') storage. Appends are O(1) and range reads locate their start with a
+binary search over the ring. NumPy is used for reads when installed.
+"""
+
+import math
+import threading
+from array import array
+from bisect import bisect_left
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+DEFAULT_RETENTION = 3600  # Seconds of history kept per series
+
+
+class RingSeries:
+    """Preallocated ring of (timestamp, value) samples"""
+
+    __slots__ = ('capacity', 'times', 'values', 'head', 'count')
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.times = array('d', bytes(8 * capacity))
+        self.values = array('d', bytes(8 * capacity))
+        self.head = 0   # next write position
+        self.count = 0
+
+    def append(self, timestamp, value):
+        self.times[self.head] = timestamp
+        self.values[self.head] = value
+        self.head = (self.head + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    def _segments(self):
+        """Ring contents in time order as (start, stop) index ranges"""
+        if self.count < self.capacity:
+            return [(0, self.count)]
+        return [(self.head, self.capacity), (0, self.head)]
+
+    def range(self, since):
+        """Samples with timestamp >= since, oldest first, as (times, values) lists"""
+        times = []
+        values = []
+        if np is not None:
+            t_all = np.frombuffer(self.times, dtype=np.float64)
+            v_all = np.frombuffer(self.values, dtype=np.float64)
+        for start, stop in self._segments():
+            if np is not None:
+                lo = start + int(np.searchsorted(t_all[start:stop], since, side='left'))
+                times.extend(t_all[lo:stop].tolist())
+                values.extend(v_all[lo:stop].tolist())
+            else:
+                lo = bisect_left(self.times, since, start, stop)
+                times.extend(self.times[lo:stop])
+                values.extend(self.values[lo:stop])
+        return times, values
+
+    def last(self):
+        if not self.count:
+            return None
+        i = (self.head - 1) % self.capacity
+        return self.times[i], self.values[i]
+
+
+class HistoryStore:
+    """Named ring-buffer series with per-collector capacities"""
+
+    def __init__(self, retention=DEFAULT_RETENTION):
+        self.retention = retention
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, timestamp, value, interval=1.0):
+        """Append a sample, creating the series sized for `retention / interval`"""
+        if value is None:
+            return
+        with self._lock:
+            series = self._series.get(name)
+            if series is None:
+                series = RingSeries(max(1, math.ceil(self.retention / interval)))
+                self._series[name] = series
+            series.append(timestamp, float(value))
+
+    def names(self):
+        with self._lock:
+            return sorted(self._series)
+
+    def query(self, patterns, since):
+        """Read samples newer than `since` for names or trailing-'*' prefixes"""
+        result = {}
+        with self._lock:
+            for pattern in patterns:
+                if pattern.endswith('*'):
+                    names = [n for n in self._series if n.startswith(pattern[:-1])]
+                else:
+                    names = [pattern] if pattern in self._series else []
+                for name in names:
+                    times, values = self._series[name].range(since)
+                    result[name] = {'timestamps': times, 'values': values}
+        return result
+
+
+def extract_series(key, data):
+    """Map a collector's published output to (series name, value) pairs"""
+    if not isinstance(data, (dict, list)) or (isinstance(data, dict) and 'error' in data):
+        return []
+    points = []
+    if key == 'cpu':
+        points.append(('cpu.total', data.get('usage_total')))
+        for field, value in data.get('times_percent', {}).items():
+            if field != 'busy':  # same value as usage_total, already kept as cpu.total
+                points.append((f'cpu.{field}', value))
+        for i, usage in enumerate(data.get('usage_per_core', [])):
+            points.append((f'cpu.core.{i}', usage))
+        load = data.get('load_average', {})
+        for period in ('1min', '5min', '15min'):
+            points.append((f'load.{period}', load.get(period)))
+    elif key == 'memory':
+        ram = data.get('ram', {})
+        swap = data.get('swap', {})
+        points += [('memory.percent', ram.get('percent')), ('memory.used', ram.get('used')),
+                   ('swap.percent', swap.get('percent')), ('swap.used', swap.get('used'))]
+    elif key == 'network_traffic':
+        for iface in data:
+            points.append((f"net.{iface['name']}.rx_rate", iface.get('download_rate')))
+            points.append((f"net.{iface['name']}.tx_rate", iface.get('upload_rate')))
+    elif key == 'performance':
+        for name in ('ctx_switches_rate', 'interrupts_rate', 'soft_interrupts_rate', 'procs_blocked'):
+            points.append((f'perf.{name}', data.get(name)))
+    elif key == 'storage':
+        for part in data:
+            points.append((f"disk.{part['mountpoint']}.percent", part.get('percent')))
+    return points
@@ -0,0 +1,217 @@
+"""
+Persistent Pseudo-File Readers
+Author: M. Nafiurohman
+
+Hot procfs/sysfs counters are re-read every tick. Instead of open/read/close
+each time, descriptors stay open and are re-read from offset 0 with pread into
+a preallocated buffer that grows when a file outgrows it. hwmon temperature
+inputs are discovered once and re-discovered when devices appear or disappear.
+"""
+
+import glob
+import os
+import threading
+from collections import namedtuple
+
+INITIAL_BUFFER = 4096
+HWMON_ROOT = "/sys/class/hwmon"
+
+Temperature = namedtuple('Temperature', ['label', 'current', 'high', 'critical'])
+NetIO = namedtuple('NetIO', ['bytes_recv', 'packets_recv', 'errin', 'dropin',
+                             'bytes_sent', 'packets_sent', 'errout', 'dropout'])
+MemInfo = namedtuple('MemInfo', ['total', 'available', 'percent', 'used', 'free', 'active',
+                                 'inactive', 'buffers', 'cached', 'shared', 'slab'])
+SwapInfo = namedtuple('SwapInfo', ['total', 'used', 'free', 'percent', 'sin', 'sout'])
+
+
+class PseudoFile:
+    """An open descriptor re-read from offset 0 into a reusable buffer"""
+
+    __slots__ = ('path', 'fd', 'buffer', 'view')
+
+    def __init__(self, path):
+        self.path = path
+        self.fd = os.open(path, os.O_RDONLY)
+        self.buffer = bytearray(INITIAL_BUFFER)
+        self.view = memoryview(self.buffer)
+
+    def read(self):
+        """Whole file content as bytes"""
+        while True:
+            n = os.preadv(self.fd, [self.view], 0)
+            if n < len(self.buffer):
+                return bytes(self.view[:n])
+            # Filled the buffer; the file may be longer
+            self.view.release()
+            self.buffer = bytearray(len(self.buffer) * 2)
+            self.view = memoryview(self.buffer)
+
+    def close(self):
+        self.view.release()
+        os.close(self.fd)
+
+
+class PseudoFileCache:
+    """Registry of open pseudo-files keyed by path"""
+
+    def __init__(self):
+        self._files = {}
+        self._lock = threading.Lock()
+
+    def read(self, path):
+        """Content of path as bytes; raises OSError like open() would"""
+        with self._lock:
+            f = self._files.get(path)
+            if f is None:
+                f = self._files[path] = PseudoFile(path)
+            try:
+                return f.read()
+            except OSError:
+                # The backing object went away (device unplugged, pid exited)
+                self._files.pop(path, None)
+                f.close()
+                raise
+
+    def read_text(self, path, default=None):
+        try:
+            return self.read(path).decode()
+        except OSError:
+            return default
+
+    def read_int(self, path, default=0):
+        try:
+            return int(self.read(path).split()[0])
+        except (OSError, ValueError, IndexError):
+            return default
+
+    def forget(self, paths):
+        with self._lock:
+            for path in paths:
+                f = self._files.pop(path, None)
+                if f is not None:
+                    f.close()
+
+
+files = PseudoFileCache()
+
+
+def _read_static(path):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+class HwmonSensors:
+    """hwmon temperature inputs, discovered once and kept open"""
+
+    def __init__(self, root=HWMON_ROOT, cache=files):
+        self.root = root
+        self.cache = cache
+        self._devices = None   # sorted hwmon dir names seen at discovery
+        self._inputs = []      # (chip, label, input path, high, critical)
+        self._lock = threading.Lock()
+
+    def _discover(self, devices):
+        self.cache.forget(entry[2] for entry in self._inputs)
+        inputs = []
+        for device in devices:
+            base = os.path.join(self.root, device)
+            chip = _read_static(os.path.join(base, 'name')) or device
+            for path in sorted(glob.glob(os.path.join(base, 'temp*_input'))):
+                prefix = path[:-len('_input')]
+                label = _read_static(prefix + '_label') or ''
+                limits = []
+                for suffix in ('_max', '_crit'):
+                    value = _read_static(prefix + suffix)
+                    limits.append(int(value) / 1000 if value and value.lstrip('-').isdigit() else None)
+                inputs.append((chip, label, path, limits[0], limits[1]))
+        self._inputs = inputs
+        self._devices = devices
+
+    def temperatures(self):
+        """Same shape as psutil.sensors_temperatures(): chip -> [Temperature]"""
+        with self._lock:
+            try:
+                devices = sorted(os.listdir(self.root))
+            except OSError:
+                devices = []
+            if devices != self._devices:
+                self._discover(devices)
+
+            result = {}
+            stale = False
+            for chip, label, path, high, critical in self._inputs:
+                try:
+                    current = int(self.cache.read(path)) / 1000
+                except OSError:
+                    stale = True  # sensor vanished without its hwmon dir going away
+                    continue
+                except ValueError:
+                    continue
+                result.setdefault(chip, []).append(Temperature(label, current, high, critical))
+            if stale:
+                self._devices = None
+            return result
+
+
+sensors = HwmonSensors()
+
+
+def _field(data, key, default=0):
+    """Integer after `key` at the start of a line in a key/value pseudo-file"""
+    i = data.find(b'\n' + key)
+    if i < 0:
+        if not data.startswith(key):
+            return default
+        i = -1
+    fields = data[i + 1 + len(key):data.find(b'\n', i + 1)].split()
+    return int(fields[0]) if fields else default
+
+
+def read_meminfo():
+    """RAM figures from /proc/meminfo, computed the way psutil does"""
+    data = files.read('/proc/meminfo')
+
+    def kb(key):
+        return _field(data, key + b':') * 1024
+
+    total = kb(b'MemTotal')
+    free = kb(b'MemFree')
+    buffers = kb(b'Buffers')
+    cached = kb(b'Cached') + kb(b'SReclaimable')
+    available = kb(b'MemAvailable') if b'\nMemAvailable:' in data else free + buffers + cached
+    used = total - free - cached - buffers
+    if used < 0:
+        used = total - free
+    return MemInfo(total=total, available=available,
+                   percent=round((total - available) / total * 100, 1) if total else 0,
+                   used=used, free=free, active=kb(b'Active'), inactive=kb(b'Inactive'),
+                   buffers=buffers, cached=cached, shared=kb(b'Shmem'), slab=kb(b'Slab'))
+
+
+def read_swap():
+    """Swap figures from /proc/meminfo and swap-in/out bytes from /proc/vmstat"""
+    data = files.read('/proc/meminfo')
+    total = _field(data, b'SwapTotal:') * 1024
+    free = _field(data, b'SwapFree:') * 1024
+    used = total - free
+    vmstat = files.read('/proc/vmstat')
+    page = os.sysconf('SC_PAGE_SIZE')
+    return SwapInfo(total=total, used=used, free=free,
+                    percent=round(used / total * 100, 1) if total else 0,
+                    sin=_field(vmstat, b'pswpin ') * page, sout=_field(vmstat, b'pswpout ') * page)
+
+
+def read_net_dev():
+    """Per-interface counters from /proc/net/dev, attribute-compatible with psutil"""
+    counters = {}
+    for line in files.read('/proc/net/dev').split(b'\n')[2:]:
+        name, sep, rest = line.partition(b':')
+        if not sep:
+            continue
+        v = rest.split()
+        counters[name.strip().decode()] = NetIO(int(v[0]), int(v[1]), int(v[2]), int(v[3]),
+                                                int(v[8]), int(v[9]), int(v[10]), int(v[11]))
+    return counters
@@ -0,0 +1,222 @@
+"""
+Background Collection Scheduler
+Author: M. Nafiurohman
+
+Runs every collector on its own cadence in a background thread and keeps the
+latest published result, so HTTP handlers only read snapshots. Missing or stale
+snapshots can be refreshed concurrently on a bounded pool with per-collector
+deadlines, returning partial results instead of blocking.
+
+With a SnapshotBoard, only one process on the host samples; the others follow
+the board passively and never run collectors themselves.
+"""
+
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait
+
+log = logging.getLogger(__name__)
+
+DEFAULT_DEADLINE = 1.5  # Seconds a request waits for a collector refresh
+POOL_WORKERS = 4
+FOLLOW_POLL = 0.25  # Seconds between board generation checks in passive mode
+LEADER_RETRY = 5.0  # Seconds between attempts to take over sampling
+
+
+class CollectorScheduler:
+    """Per-collector interval scheduler with a latest-snapshot store"""
+
+    def __init__(self):
+        self._jobs = {}
+        self._snapshots = {}
+        self._lock = threading.Lock()
+        self._published = threading.Condition(self._lock)
+        self._stop = threading.Event()
+        self._threads = []
+        self._subscribers = []
+        self._pool = ThreadPoolExecutor(max_workers=POOL_WORKERS, thread_name_prefix="collect")
+        self._inflight = {}
+        self.passive = False
+
+    def register(self, key, func, interval, deadline=DEFAULT_DEADLINE):
+        """Register a collector to run every `interval` seconds"""
+        self._jobs[key] = {'func': func, 'interval': float(interval), 'deadline': float(deadline)}
+
+    def keys(self):
+        return list(self._jobs)
+
+    def interval(self, key):
+        return self._jobs[key]['interval']
+
+    def run_now(self, key):
+        """Run a collector inline and publish its result"""
+        job = self._jobs[key]
+        try:
+            data = job['func']()
+        except Exception as e:
+            log.warning("collector %s failed: %s", key, e)
+            data = {'error': str(e)}
+        self.publish(key, data)
+        return data
+
+    def subscribe(self, callback):
+        """Call callback(key, data, timestamp) after every publish"""
+        self._subscribers.append(callback)
+
+    def publish(self, key, data, timestamp=None):
+        timestamp = timestamp if timestamp is not None else time.time()
+        with self._lock:
+            self._snapshots[key] = (data, timestamp)
+            self._published.notify_all()
+        for callback in self._subscribers:
+            try:
+                callback(key, data, timestamp)
+            except Exception as e:
+                log.warning("subscriber failed for %s: %s", key, e)
+
+    def get(self, key):
+        """Latest snapshot for a collector, collecting inline if none exists yet"""
+        entry = self.get_entry(key)
+        if entry is None:
+            if self.passive:
+                entry = self._wait_published(key, self._jobs[key]['deadline'])
+                return entry[0] if entry else {'error': 'collector has not published yet'}
+            return self.refresh(key).result()
+        return entry[0]
+
+    def _wait_published(self, key, timeout):
+        with self._published:
+            self._published.wait_for(lambda: key in self._snapshots, timeout)
+            return self._snapshots.get(key)
+
+    def is_stale(self, key, timestamp, now=None):
+        """A snapshot is stale once it missed about two collection rounds"""
+        now = now if now is not None else time.time()
+        return now - timestamp > 2 * self._jobs[key]['interval'] + 1
+
+    def refresh(self, key):
+        """Submit a collector to the worker pool, reusing an in-flight run"""
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is None or future.done():
+                future = self._pool.submit(self.run_now, key)
+                self._inflight[key] = future
+            return future
+
+    def collect(self, keys):
+        """Fan out over collectors and wait at most each one's deadline.
+
+        Returns (data, meta); meta[key] holds 'state' (fresh, stale, timeout or
+        error) and the 'age' of the returned value in seconds.
+        """
+        now = time.time()
+        data = {}
+        meta = {}
+        pending = {}
+        for key in keys:
+            entry = self.get_entry(key)
+            if entry is not None and not self.is_stale(key, entry[1], now):
+                data[key] = entry[0]
+                meta[key] = {'state': 'fresh', 'age': round(now - entry[1], 3)}
+            elif self.passive:
+                # The sampler process owns collection; never run collectors here
+                if entry is None:
+                    entry = self._wait_published(key, self._jobs[key]['deadline'])
+                data[key] = entry[0] if entry else None
+                meta[key] = ({'state': 'stale', 'age': round(now - entry[1], 3)} if entry
+                             else {'state': 'timeout', 'age': None})
+            else:
+                pending[key] = self.refresh(key)
+
+        started = time.monotonic()
+        for key in sorted(pending, key=lambda k: self._jobs[k]['deadline']):
+            remaining = self._jobs[key]['deadline'] - (time.monotonic() - started)
+            wait([pending[key]], timeout=max(0.0, remaining))
+
+        now = time.time()
+        for key, future in pending.items():
+            entry = self.get_entry(key)
+            if future.done() and entry is not None:
+                data[key] = entry[0]
+                failed = isinstance(entry[0], dict) and 'error' in entry[0]
+                meta[key] = {'state': 'error' if failed else 'fresh', 'age': round(now - entry[1], 3)}
+            elif entry is not None:
+                data[key] = entry[0]
+                meta[key] = {'state': 'stale', 'age': round(now - entry[1], 3)}
+            else:
+                data[key] = None
+                meta[key] = {'state': 'timeout', 'age': None}
+        return data, meta
+
+    def get_entry(self, key):
+        """Return (data, timestamp) of the latest snapshot, or None"""
+        with self._lock:
+            return self._snapshots.get(key)
+
+    def start(self):
+        """Start one daemon thread per registered collector"""
+        if self._threads:
+            return
+        self._stop.clear()
+        for key in self._jobs:
+            t = threading.Thread(target=self._loop, args=(key,), name=f"collector-{key}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def start_with_board(self, board, on_leader=None):
+        """Sample and publish to the board if elected, otherwise follow it.
+
+        A follower keeps retrying the election and takes over sampling if the
+        current sampler exits. on_leader() runs once this process samples.
+        """
+        if board.try_acquire_sampler():
+            self._lead(board, on_leader)
+            return
+        self.passive = True
+        threading.Thread(target=self._follow, args=(board, on_leader),
+                         name="board-follower", daemon=True).start()
+
+    def _lead(self, board, on_leader):
+        self.subscribe(board.publish)
+        self.passive = False
+        self.start()
+        if on_leader:
+            on_leader()
+
+    def _follow(self, board, on_leader):
+        seen = {}
+        next_election = time.monotonic() + LEADER_RETRY
+        while not self._stop.is_set():
+            for key in self._jobs:
+                try:
+                    generation = board.generation(key)
+                    if generation and generation != seen.get(key):
+                        entry = board.read(key)
+                        # None: the sampler kept rewriting it; retry next poll
+                        if entry is not None:
+                            seen[key] = generation
+                            self.publish(key, entry[0], entry[1])
+                except (OSError, ValueError) as e:
+                    log.warning("board read failed for %s: %s", key, e)
+            if time.monotonic() >= next_election:
+                next_election = time.monotonic() + LEADER_RETRY
+                if board.try_acquire_sampler():
+                    log.info("taking over sampling from exited sampler")
+                    self._lead(board, on_leader)
+                    return
+            self._stop.wait(FOLLOW_POLL)
+
+    def stop(self):
+        self._stop.set()
+        for t in self._threads:
+            t.join(timeout=1)
+        self._threads = []
+
+    def _loop(self, key):
+        interval = self._jobs[key]['interval']
+        while not self._stop.is_set():
+            started = time.monotonic()
+            self.run_now(key)
+            elapsed = time.monotonic() - started
+            self._stop.wait(max(0.0, interval - elapsed))
@@ -0,0 +1,147 @@
+"""
+Push Streaming Hub
+Author: M. Nafiurohman
+
+Broadcasts published collector samples over Socket.IO so dashboards stop
+polling. Clients subscribe to a topic at a rate; subscribers sharing a
+(topic, rate) pair share one room, so each sample is encoded once per room and
+server cost stays roughly constant in the number of viewers. Only the latest
+sample is ever sent, and clients with a send backlog skip samples until they
+catch up.
+
+Client protocol:
+    emit('subscribe', {'topic': 'cpu', 'rate': 2})   -> 'sample' events
+    emit('unsubscribe', {'topic': 'cpu'})
+    'sample' payload: {'topic', 'timestamp', 'data'}
+"""
+
+import threading
+import time
+import logging
+from flask import request
+from flask_socketio import join_room, leave_room
+
+log = logging.getLogger(__name__)
+
+RATES = (1, 2, 5, 10, 30, 60)  # Allowed push intervals in seconds
+MAX_BACKLOG = 4  # Queued packets after which a client skips samples
+TICK = 0.25
+
+
+class StreamHub:
+    """Topic/rate rooms fed from scheduler publishes"""
+
+    def __init__(self, socketio, intervals):
+        self.socketio = socketio
+        self.intervals = intervals  # topic -> collection interval
+        self._latest = {}  # topic -> (timestamp, data)
+        self._rooms = {}   # (topic, rate) -> {'members': set, 'sent': ts, 'due': monotonic}
+        self._member_rooms = {}  # sid -> {topic: room key}
+        self._lock = threading.Lock()
+        self._started = False
+
+        socketio.on_event('subscribe', self._on_subscribe)
+        socketio.on_event('unsubscribe', self._on_unsubscribe)
+        socketio.on_event('disconnect', self._on_disconnect)
+
+    @staticmethod
+    def room_name(topic, rate):
+        return f"{topic}@{rate}"
+
+    def quantize_rate(self, topic, rate):
+        """Smallest allowed rate no faster than requested or collected"""
+        floor = max(float(rate or 0), self.intervals.get(topic, 1))
+        return next((r for r in RATES if r >= floor), RATES[-1])
+
+    def publish(self, key, data, timestamp):
+        """Scheduler subscriber: remember the latest sample per topic"""
+        self._latest[key] = (timestamp, data)
+
+    def _on_subscribe(self, message):
+        message = message if isinstance(message, dict) else {}
+        topic = message.get('topic')
+        if not isinstance(topic, str) or topic not in self.intervals:
+            return {'status': 'error', 'error': f"unknown topic: {topic}"}
+        try:
+            rate = self.quantize_rate(topic, message.get('rate'))
+        except (TypeError, ValueError):  # e.g. "fast" or a list from the client
+            return {'status': 'error', 'error': f"invalid rate: {message.get('rate')!r}"}
+        sid = request.sid
+        key = (topic, rate)
+        with self._lock:
+            self._leave(sid, topic)
+            room = self._rooms.setdefault(key, {'members': set(), 'sent': 0, 'due': 0})
+            room['members'].add(sid)
+            self._member_rooms.setdefault(sid, {})[topic] = key
+        join_room(self.room_name(topic, rate))
+
+        latest = self._latest.get(topic)
+        if latest:
+            self.socketio.emit('sample', {'topic': topic, 'timestamp': latest[0], 'data': latest[1]}, to=sid)
+        return {'status': 'success', 'topic': topic, 'rate': rate}
+
+    def _on_unsubscribe(self, message):
+        topic = (message if isinstance(message, dict) else {}).get('topic')
+        with self._lock:
+            key = self._leave(request.sid, topic)
+        if key:
+            leave_room(self.room_name(*key))
+        return {'status': 'success'}
+
+    def _on_disconnect(self, *args):
+        sid = request.sid
+        with self._lock:
+            for topic in list(self._member_rooms.get(sid, {})):
+                self._leave(sid, topic)
+            self._member_rooms.pop(sid, None)
+
+    def _leave(self, sid, topic):
+        key = self._member_rooms.get(sid, {}).pop(topic, None)
+        if key and key in self._rooms:
+            self._rooms[key]['members'].discard(sid)
+            if not self._rooms[key]['members']:
+                del self._rooms[key]
+        return key
+
+    def _backlogged(self, members):
+        """Clients whose outgoing queue is too deep to take another sample"""
+        slow = []
+        try:
+            server = self.socketio.server
+            for sid in members:
+                eio_sid = server.manager.eio_sid_from_sid(sid, '/')
+                sock = server.eio.sockets.get(eio_sid)
+                if sock is not None and sock.queue.qsize() > MAX_BACKLOG:
+                    slow.append(sid)
+        except Exception:
+            return []
+        return slow
+
+    def start(self):
+        if self._started:
+            return
+        self._started = True
+        self.socketio.start_background_task(self._loop)
+
+    def _loop(self):
+        while True:
+            self.socketio.sleep(TICK)
+            now = time.monotonic()
+            with self._lock:
+                due = [(key, room['sent'], list(room['members']))
+                       for key, room in self._rooms.items() if room['due'] <= now]
+                for key, _, _ in due:
+                    self._rooms[key]['due'] = now + key[1]
+            for (topic, rate), sent, members in due:
+                latest = self._latest.get(topic)
+                if not latest or latest[0] <= sent:
+                    continue
+                payload = {'topic': topic, 'timestamp': latest[0], 'data': latest[1]}
+                try:
+                    self.socketio.emit('sample', payload, to=self.room_name(topic, rate),
+                                       skip_sid=self._backlogged(members))
+                except Exception as e:
+                    log.warning("push to %s@%s failed: %s", topic, rate, e)
+                with self._lock:
+                    if (topic, rate) in self._rooms:
+                        self._rooms[(topic, rate)]['sent'] = latest[0]
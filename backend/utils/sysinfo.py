@@ -0,0 +1,157 @@
+"""
+Native procfs/sysfs Readers
+Author: M. Nafiurohman
+
+Reads the facts the collectors used to get from shell pipelines (lscpu, zramctl,
+ulimit, cat, df) straight from /proc, /sys, the resource module and statvfs.
+Static hardware facts are probed once and memoized.
+"""
+
+import glob
+import os
+from functools import lru_cache
+from utils.pseudofiles import files
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+SYS_CPU = "/sys/devices/system/cpu"
+
+
+def read_text(path, default=None):
+    """Read a small pseudo-file, stripped, or default if unreadable"""
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return default
+
+
+def read_int(path, default=0):
+    value = read_text(path)
+    try:
+        return int(value.split()[0]) if value else default
+    except ValueError:
+        return default
+
+
+def parse_size(text):
+    """Parse sysfs sizes such as '32768K' or '1M' into bytes"""
+    units = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+    text = text.strip()
+    if text and text[-1].upper() in units:
+        return int(text[:-1]) * units[text[-1].upper()]
+    return int(text)
+
+
+def format_size(num):
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if num < 1024 or unit == 'GiB':
+            return f"{num:g} {unit}" if unit == 'B' else f"{num:.4g} {unit}"
+        num /= 1024
+
+
+@lru_cache(maxsize=None)
+def cpu_model():
+    """CPU model name from /proc/cpuinfo (x86 'model name', ARM 'Hardware'/'Processor')"""
+    fallback = None
+    try:
+        with open('/proc/cpuinfo') as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                key = key.strip()
+                if key == 'model name' and value.strip():
+                    return value.strip()
+                if key in ('Hardware', 'Processor', 'cpu model') and value.strip() and not fallback:
+                    fallback = value.strip()
+    except OSError:
+        pass
+    return fallback
+
+
+@lru_cache(maxsize=None)
+def l3_cache_size():
+    """Size of cpu0's L3 (or last-level) cache as a human string, or None"""
+    best = None
+    for index in glob.glob(f"{SYS_CPU}/cpu0/cache/index*"):
+        level = read_int(os.path.join(index, 'level'))
+        size = read_text(os.path.join(index, 'size'))
+        if not size:
+            continue
+        if best is None or level > best[0]:
+            best = (level, size)
+    if best is None:
+        return None
+    try:
+        return format_size(parse_size(best[1]))
+    except ValueError:
+        return best[1]
+
+
+def zram_devices():
+    """zram devices from /sys/block/zram*/, with the columns zramctl shows
+
+    disksize, data, compr and total are human-readable as zramctl prints them
+    by default; the *_bytes fields carry the raw values.
+    """
+    devices = []
+    for path in sorted(glob.glob('/sys/block/zram*')):
+        disksize = read_int(os.path.join(path, 'disksize'))
+        if not disksize:
+            continue  # unconfigured device
+        stat = (read_text(os.path.join(path, 'mm_stat')) or '').split()
+        # mm_stat: orig_data_size compr_data_size mem_used_total ...
+        data, compr, total = (int(v) for v in (stat[:3] if len(stat) >= 3 else (0, 0, 0)))
+        device = {'device': f"/dev/{os.path.basename(path)}"}
+        for name, value in (('disksize', disksize), ('data', data), ('compr', compr), ('total', total)):
+            device[name] = format_size(value)
+            device[f"{name}_bytes"] = value
+        devices.append(device)
+    return devices
+
+
+def open_files_limit():
+    """Soft RLIMIT_NOFILE of this process (what `ulimit -n` reports)"""
+    if resource is None:
+        return 0
+    soft = resource.getrlimit(resource.RLIMIT_NOFILE)[0]
+    return soft if soft != resource.RLIM_INFINITY else 0
+
+
+def max_user_processes():
+    """Soft RLIMIT_NPROC of this process (what `ulimit -u` reports)"""
+    if resource is None or not hasattr(resource, 'RLIMIT_NPROC'):
+        return 0
+    soft = resource.getrlimit(resource.RLIMIT_NPROC)[0]
+    return soft if soft != resource.RLIM_INFINITY else 0
+
+
+def file_handles():
+    """(allocated, max) system-wide file handles from /proc/sys/fs"""
+    nr = (read_text('/proc/sys/fs/file-nr') or '0').split()
+    return int(nr[0]), read_int('/proc/sys/fs/file-max')
+
+
+def local_port_range():
+    parts = (read_text('/proc/sys/net/ipv4/ip_local_port_range') or '').split()
+    return (int(parts[0]), int(parts[1])) if len(parts) == 2 else None
+
+
+def inode_usage(path='/'):
+    """(used, total, percent) inodes of the filesystem holding path"""
+    st = os.statvfs(path)
+    used = st.f_files - st.f_ffree
+    percent = round(used / st.f_files * 100, 1) if st.f_files else 0
+    return used, st.f_files, percent
+
+
+def throttle_count(cpu=0):
+    return files.read_int(f"{SYS_CPU}/cpu{cpu}/thermal_throttle/core_throttle_count")
+
+
+def probe_static_facts():
+    """Warm the memoized hardware facts once at startup"""
+    cpu_model()
+    l3_cache_size()
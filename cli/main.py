@@ -17,6 +17,7 @@ CONFIG_DIR = "/opt/bmonitor/config"
 CONFIG_FILE = os.path.join(CONFIG_DIR, "app.ini")
 USERS_FILE = os.path.join(CONFIG_DIR, "users.json")
 SERVICE_NAME = "bmonitor"
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
 
 
 def run(cmd, capture=True):
@@ -188,6 +189,33 @@ def list_users():
         click.echo(f"  - {name}")
 
 
+@cli.command()
+@click.argument("key", required=False)
+def snapshot(key):
+    """Print the latest collector snapshot published by the running service."""
+    sys.path.insert(0, BACKEND_DIR)
+    from utils.board import SnapshotBoard, DEFAULT_BOARD_DIR
+
+    config = load_config()
+    board = SnapshotBoard(config.get("board", "path", fallback=DEFAULT_BOARD_DIR))
+    if not key:
+        keys = board.keys()
+        if not keys:
+            click.secho("No snapshots published. Is bmonitor running?", fg="red")
+            return
+        click.echo("Snapshots:")
+        for name in keys:
+            click.echo(f"  - {name}")
+        return
+
+    entry = board.read(key)
+    if entry is None:
+        click.secho(f"No snapshot for '{key}'.", fg="red")
+        return
+    data, timestamp = entry
+    click.echo(json.dumps({"key": key, "timestamp": timestamp, "data": data}, indent=2))
+
+
 @cli.command()
 def update():
     """Update bmonitor to the latest version."""
@@ -104,7 +104,7 @@ Type=simple
 User=bmonitor
 Group=bmonitor
 WorkingDirectory=$SRC_DIR/backend
-ExecStart=$VENV_DIR/bin/gunicorn -w 1 -b 0.0.0.0:9999 app:app
+ExecStart=$VENV_DIR/bin/gunicorn -w 1 --threads 100 -b 0.0.0.0:9999 app:app
 Restart=on-failure
 RestartSec=5
 
@@ -12,6 +12,7 @@ function loadPage(page) {
     if (pageElement) {
         pageElement.classList.add('active');
         loadPageData(page);
+        setStreamPage(page);
     }
 }
 
@@ -269,28 +270,34 @@ function updateServerTime() {
     document.getElementById('serverTime').textContent = timeStr;
 }
 
+// Latest dashboard data: loaded over REST, then kept current by stream samples
+let dashboardData = {};
+
 // Load all data
 async function loadAllData() {
     try {
         const response = await fetch('/api/all');
-        const data = await response.json();
-        
-        // Always update overview if it's the active page
-        const activePage = document.querySelector('.page-content.active');
-        if (activePage) {
-            const pageId = activePage.id.replace('-page', '');
-            
-            if (pageId === 'overview') {
-                updateOverview(data);
-            } else if (pageId === 'server-status') {
-                updateServerStatus(data);
-            }
-        }
+        Object.assign(dashboardData, await response.json());
+        renderActivePage();
     } catch (error) {
         console.error('Error loading data:', error);
     }
 }
 
+// Re-render the live panels of the active page from dashboardData
+function renderActivePage() {
+    const activePage = document.querySelector('.page-content.active');
+    if (activePage) {
+        const pageId = activePage.id.replace('-page', '');
+        
+        if (pageId === 'overview') {
+            updateOverview(dashboardData);
+        } else if (pageId === 'server-status') {
+            updateServerStatus(dashboardData);
+        }
+    }
+}
+
 // Update Overview
 function updateOverview(data) {
     // System info horizontal
@@ -1056,15 +1063,18 @@ let sortDirection = 'desc';
 async function loadProcessManager() {
     try {
         const response = await fetch('/api/process-list');
-        const data = await response.json();
-        
-        allProcesses = data.processes || [];
-        renderProcessTable();
+        renderProcessList(await response.json());
     } catch (error) {
         console.error('Error loading processes:', error);
     }
 }
 
+function renderProcessList(data) {
+    allProcesses = data.processes || [];
+    const searchInput = document.getElementById('process-search');
+    renderProcessTable(searchInput ? searchInput.value : '');
+}
+
 function renderProcessTable(filter = '') {
     const tableDiv = document.getElementById('process-manager-table');
     if (!tableDiv) return;
@@ -1359,10 +1369,17 @@ function updateSecurity(data) {
     const failedDiv = document.getElementById('security-failed');
     failedDiv.innerHTML = '';
     
-    if (data.security.failed_logins && data.security.failed_logins.length > 0) {
+    const failed = data.security.failed_logins;
+    if (failed && failed.total > 0) {
         const logContainer = document.createElement('div');
         logContainer.className = 'log-container';
-        data.security.failed_logins.slice(0, 20).forEach(line => {
+        const lines = failed.top_ips.map(o => `${o.ip}: ${o.count} failed attempts`);
+        failed.recent.slice().reverse().forEach(e => {
+            lines.push(typeof e === 'string' ? e :
+                `${new Date(e.timestamp * 1000).toLocaleString()} ${e.method} for ${e.user} from ${e.ip}` +
+                (e.count > 1 ? ` (x${e.count})` : ''));
+        });
+        lines.forEach(line => {
             if (line.trim()) {
                 const logLine = document.createElement('div');
                 logLine.className = 'log-line';
@@ -1599,6 +1616,84 @@ async function loadLogs() {
     }
 }
 
+// Live updates over the Socket.IO push stream
+// REST loads each page once; after that the samples the server pushes keep it
+// current. The refresh timers only poll while the stream is not connected.
+const STREAM_TOPICS = { system: 60, cpu: 2, memory: 2, gpu: 2, processes: 2, security: 60 };
+const PAGE_TOPICS = {
+    processes: { process_list: 2 },
+    network: { network_traffic: 2 }
+};
+let streamSocket = null;
+let streamPageTopics = [];
+let renderQueued = false;
+
+function streamConnected() {
+    return streamSocket !== null && streamSocket.connected;
+}
+
+function startStream() {
+    if (typeof io !== 'function') {
+        console.warn('⚠️ Socket.IO client not loaded - polling instead');
+        return;
+    }
+    streamSocket = io();
+    streamSocket.on('connect', () => {
+        // Subscriptions do not survive a reconnect; renew them every time
+        Object.entries(STREAM_TOPICS).forEach(([topic, rate]) => subscribeTopic(topic, rate));
+        streamPageTopics = [];
+        setStreamPage(window.currentPage);
+    });
+    streamSocket.on('sample', ({ topic, data }) => applySample(topic, data));
+}
+
+function subscribeTopic(topic, rate) {
+    streamSocket.emit('subscribe', { topic, rate }, (reply) => {
+        if (reply && reply.status === 'error') {
+            console.warn(`Stream subscription to ${topic} failed: ${reply.error}`);
+        }
+    });
+}
+
+// Follow only the heavy topics the visible page shows
+function setStreamPage(page) {
+    if (!streamConnected()) return;
+    streamPageTopics.forEach(topic => streamSocket.emit('unsubscribe', { topic }));
+    const topics = PAGE_TOPICS[page] || {};
+    Object.entries(topics).forEach(([topic, rate]) => subscribeTopic(topic, rate));
+    streamPageTopics = Object.keys(topics);
+}
+
+function applySample(topic, data) {
+    if (!data || data.error) return;
+    switch (topic) {
+        case 'process_list':
+            if (window.currentPage === 'processes') renderProcessList(data);
+            return;
+        case 'network_traffic':
+            if (window.currentPage === 'network') renderNetworkTraffic(data);
+            return;
+        case 'cpu':
+            renderCPUCoreChart(data);
+            break;
+        case 'gpu':
+            renderGPUChart(data);
+            break;
+    }
+    dashboardData[topic] = data;
+    queueRender();
+}
+
+// Coalesce samples that arrive together into one re-render
+function queueRender() {
+    if (renderQueued || document.hidden) return;
+    renderQueued = true;
+    requestAnimationFrame(() => {
+        renderQueued = false;
+        renderActivePage();
+    });
+}
+
 // Initialize
 document.addEventListener('DOMContentLoaded', () => {
     console.log('🚀 Initializing dashboard...');
@@ -1643,18 +1738,22 @@ document.addEventListener('DOMContentLoaded', () => {
     updateServerTime();
     setInterval(updateServerTime, 1000);
     
+    // Live panels follow the push stream
+    startStream();
+    
     // ANTI-PANAS: 3 detik interval + tab visibility detection
+    // The timers below are a fallback while the stream is down
     function startRefresh() {
         // Main data refresh every 3 seconds
         setInterval(() => {
-            if (!document.hidden) {
+            if (!document.hidden && !streamConnected()) {
                 loadAllData();
             }
         }, 3000);
         
         // Charts refresh every 5 seconds
         setInterval(() => {
-            if (!document.hidden) {
+            if (!document.hidden && !streamConnected()) {
                 updateCPUCoreChart();
                 updateGPUChart();
             }
@@ -1662,12 +1761,12 @@ document.addEventListener('DOMContentLoaded', () => {
         
         // Network traffic refresh every 5 seconds
         setInterval(() => {
-            if (!document.hidden && window.currentPage === 'network') {
+            if (!document.hidden && !streamConnected() && window.currentPage === 'network') {
                 loadNetworkTraffic();
             }
         }, 5000);
         
-        // Kubernetes refresh every 10 seconds
+        // Kubernetes refresh every 10 seconds (not a collector topic, so never streamed)
         setInterval(() => {
             if (!document.hidden && window.currentPage === 'kubernetes') {
                 loadKubernetes();
@@ -1684,7 +1783,11 @@ document.addEventListener('DOMContentLoaded', () => {
             console.log('⏸️ Tab hidden - refresh paused');
         } else {
             console.log('▶️ Tab visible - refresh resumed');
-            loadAllData();
+            if (streamConnected()) {
+                renderActivePage();
+            } else {
+                loadAllData();
+            }
         }
     });
     
@@ -1815,63 +1918,65 @@ let networkTrafficChart;
 async function loadNetworkTraffic() {
     try {
         const response = await fetch('/api/network/traffic');
-        const interfaces = await response.json();
-        
-        const trafficDiv = document.getElementById('network-traffic-details');
-        if (!trafficDiv) return;
-        
-        trafficDiv.innerHTML = '';
+        renderNetworkTraffic(await response.json());
+    } catch (error) {
+        console.error('Error loading network traffic:', error);
+    }
+}
+
+function renderNetworkTraffic(interfaces) {
+    const trafficDiv = document.getElementById('network-traffic-details');
+    if (!trafficDiv) return;
+    
+    trafficDiv.innerHTML = '';
+    
+    interfaces.forEach(iface => {
+        if (iface.name === 'lo') return; // Skip loopback
         
-        interfaces.forEach(iface => {
-            if (iface.name === 'lo') return; // Skip loopback
-            
-            const item = document.createElement('div');
-            item.className = 'traffic-interface';
-            item.innerHTML = `
-                <div class="interface-header">
-                    <span class="interface-name">${iface.name}</span>
-                    <span class="status-badge ${iface.status === 'up' ? 'status-active' : 'status-inactive'}">${iface.status}</span>
-                </div>
-                <div class="traffic-stats">
-                    <div class="stat-item">
-                        <i class="fas fa-arrow-up text-warning"></i>
-                        <span class="stat-label">Upload</span>
-                        <span class="stat-value">${iface.upload_rate_human}</span>
-                    </div>
-                    <div class="stat-item">
-                        <i class="fas fa-arrow-down text-info"></i>
-                        <span class="stat-label">Download</span>
-                        <span class="stat-value">${iface.download_rate_human}</span>
-                    </div>
-                    <div class="stat-item">
-                        <i class="fas fa-exchange-alt"></i>
-                        <span class="stat-label">Total Sent</span>
-                        <span class="stat-value">${iface.bytes_sent_human}</span>
-                    </div>
-                    <div class="stat-item">
-                        <i class="fas fa-exchange-alt"></i>
-                        <span class="stat-label">Total Recv</span>
-                        <span class="stat-value">${iface.bytes_recv_human}</span>
-                    </div>
+        const item = document.createElement('div');
+        item.className = 'traffic-interface';
+        item.innerHTML = `
+            <div class="interface-header">
+                <span class="interface-name">${iface.name}</span>
+                <span class="status-badge ${iface.status === 'up' ? 'status-active' : 'status-inactive'}">${iface.status}</span>
+            </div>
+            <div class="traffic-stats">
+                <div class="stat-item">
+                    <i class="fas fa-arrow-up text-warning"></i>
+                    <span class="stat-label">Upload</span>
+                    <span class="stat-value">${iface.upload_rate_human}</span>
                 </div>
-                <div class="info-row">
-                    <span class="label">Packets Sent/Recv</span>
-                    <span class="value">${iface.packets_sent_rate}/s | ${iface.packets_recv_rate}/s</span>
+                <div class="stat-item">
+                    <i class="fas fa-arrow-down text-info"></i>
+                    <span class="stat-label">Download</span>
+                    <span class="stat-value">${iface.download_rate_human}</span>
                 </div>
-                <div class="info-row">
-                    <span class="label">Errors (In/Out)</span>
-                    <span class="value">${iface.errors_in} / ${iface.errors_out}</span>
+                <div class="stat-item">
+                    <i class="fas fa-exchange-alt"></i>
+                    <span class="stat-label">Total Sent</span>
+                    <span class="stat-value">${iface.bytes_sent_human}</span>
                 </div>
-                <div class="info-row">
-                    <span class="label">Drops (In/Out)</span>
-                    <span class="value">${iface.drops_in} / ${iface.drops_out}</span>
+                <div class="stat-item">
+                    <i class="fas fa-exchange-alt"></i>
+                    <span class="stat-label">Total Recv</span>
+                    <span class="stat-value">${iface.bytes_recv_human}</span>
                 </div>
-            `;
-            trafficDiv.appendChild(item);
-        });
-    } catch (error) {
-        console.error('Error loading network traffic:', error);
-    }
+            </div>
+            <div class="info-row">
+                <span class="label">Packets Sent/Recv</span>
+                <span class="value">${iface.packets_sent_rate}/s | ${iface.packets_recv_rate}/s</span>
+            </div>
+            <div class="info-row">
+                <span class="label">Errors (In/Out)</span>
+                <span class="value">${iface.errors_in} / ${iface.errors_out}</span>
+            </div>
+            <div class="info-row">
+                <span class="label">Drops (In/Out)</span>
+                <span class="value">${iface.drops_in} / ${iface.drops_out}</span>
+            </div>
+        `;
+        trafficDiv.appendChild(item);
+    });
 }
 
 // Kubernetes Monitoring
@@ -2017,21 +2122,23 @@ function initGPUChart() {
 async function updateGPUChart() {
     try {
         const response = await fetch('/api/gpu');
-        const data = await response.json();
-        
-        if (!gpuChart || !data.gpus || data.gpus.length === 0) return;
-        
-        const labels = data.gpus.map((gpu, i) => `GPU ${i}`);
-        const utilization = data.gpus.map(gpu => gpu.utilization || 0);
-        
-        gpuChart.data.labels = labels;
-        gpuChart.data.datasets[0].data = utilization;
-        gpuChart.update('none');
+        renderGPUChart(await response.json());
     } catch (error) {
         console.error('Error updating GPU chart:', error);
     }
 }
 
+function renderGPUChart(data) {
+    if (!gpuChart || !data.gpus || data.gpus.length === 0) return;
+    
+    const labels = data.gpus.map((gpu, i) => `GPU ${i}`);
+    const utilization = data.gpus.map(gpu => gpu.utilization || 0);
+    
+    gpuChart.data.labels = labels;
+    gpuChart.data.datasets[0].data = utilization;
+    gpuChart.update('none');
+}
+
 // CPU Per-Core Chart
 let cpuCoreChart;
 
@@ -2081,21 +2188,23 @@ function initCPUCoreChart() {
 async function updateCPUCoreChart() {
     try {
         const response = await fetch('/api/cpu');
-        const data = await response.json();
-        
-        if (!cpuCoreChart || !data.usage_per_core) return;
-        
-        const labels = data.usage_per_core.map((_, i) => `T${i}`);
-        const usage = data.usage_per_core;
-        
-        cpuCoreChart.data.labels = labels;
-        cpuCoreChart.data.datasets[0].data = usage;
-        cpuCoreChart.update('none');
+        renderCPUCoreChart(await response.json());
     } catch (error) {
         console.error('Error updating CPU core chart:', error);
     }
 }
 
+function renderCPUCoreChart(data) {
+    if (!cpuCoreChart || !data.usage_per_core) return;
+    
+    const labels = data.usage_per_core.map((_, i) => `T${i}`);
+    const usage = data.usage_per_core;
+    
+    cpuCoreChart.data.labels = labels;
+    cpuCoreChart.data.datasets[0].data = usage;
+    cpuCoreChart.update('none');
+}
+
 // Performance Metrics
 async function loadPerformanceMetrics() {
     try {